@@ -35,6 +35,9 @@ def main() -> int:
     ap.add_argument("--dir", default="import_models", help="Folder that contains model import scripts")
     ap.add_argument("--stop-on-error", action="store_true", help="Stop at first failing script")
     ap.add_argument("--only", nargs="*", default=None, help="Run only scripts whose filename contains any of these strings")
+    ap.add_argument("--pack", action="store_true", help="Convert the downloaded models to safetensors packs afterwards")
+    ap.add_argument("--pack-dtype", choices=["float32", "float16", "bfloat16"], default="float32",
+                    help="Precision of the packed weights (with --pack)")
     args = ap.parse_args()
 
     repo_root = Path(__file__).resolve().parents[1]
@@ -59,6 +62,15 @@ def main() -> int:
         if rc != 0:
             return rc
 
+    if args.pack:
+        pack_cmd = [sys.executable, str(repo_root / "tools" / "pack_models.py"), "--dtype", args.pack_dtype]
+        print(">", " ".join(pack_cmd))
+        try:
+            subprocess.check_call(pack_cmd)
+        except subprocess.CalledProcessError as e:
+            print(f"Failed: pack_models.py (exit code {e.returncode})")
+            return e.returncode
+
     print("Done.")
     return 0
 
@@ -13,6 +13,8 @@ BASE_DEPS: Dict[str, str] = {
     "praw": "praw",
     "pytest": "pytest",
     "matplotlib": "matplotlib",
+    "zstandard": "zstandard",
+    "pyarrow": "pyarrow",
 }
 
 TORCH_INDEX_URLS: Dict[str, str] = {
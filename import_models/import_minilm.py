@@ -0,0 +1,13 @@
+from transformers import AutoTokenizer, AutoModel
+
+# Small sentence encoder used by the topic classifier cascade
+model_id = "sentence-transformers/all-MiniLM-L6-v2"
+save_dir = "../models/embedding/local_models/minilm"
+
+tokenizer = AutoTokenizer.from_pretrained(model_id)
+model = AutoModel.from_pretrained(model_id)
+
+tokenizer.save_pretrained(save_dir)
+model.save_pretrained(save_dir)
+
+print(f"✅ Sentence embedding model saved to '{save_dir}'")
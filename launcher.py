@@ -68,7 +68,8 @@ class LauncherApp:
         ttk.Button(pipeline_frame, text="2) Process Reddit", command=self.run_process_reddit).grid(row=0, column=1, padx=5, pady=5, sticky="we")
         ttk.Button(pipeline_frame, text="3) Analyze Sentiment", command=self.run_analyze_sentiment).grid(row=0, column=2, padx=5, pady=5, sticky="we")
         ttk.Button(pipeline_frame, text="4) Analyze Topics", command=self.run_analyze_topics).grid(row=0, column=3, padx=5, pady=5, sticky="we")
-        ttk.Button(pipeline_frame, text="Run all pipelines", command=self.run_all_pipelines).grid(row=1, column=0, columnspan=4, padx=5, pady=(8, 5), sticky="we")
+        ttk.Button(pipeline_frame, text="Run all pipelines", command=self.run_all_pipelines).grid(row=1, column=0, columnspan=2, padx=5, pady=(8, 5), sticky="we")
+        ttk.Button(pipeline_frame, text="Run all in one process (models stay loaded)", command=self.run_all_single_process).grid(row=1, column=2, columnspan=2, padx=5, pady=(8, 5), sticky="we")
 
         for i in range(4):
             pipeline_frame.columnconfigure(i, weight=1)
@@ -336,6 +337,20 @@ class LauncherApp:
         ]
         self._run_commands_async(commands, "Run all pipelines")
 
+    def run_all_single_process(self) -> None:
+        dirs = self._validate_dirs()
+        if not dirs:
+            return
+        input_dir, output_dir = dirs
+
+        script = self._find_script(["pipelines/run_pipeline.py"])
+        if not script:
+            return
+
+        # One subprocess for all stages, so the log keeps streaming while models are shared
+        cmd = [sys.executable, str(script), "--input-dir", str(input_dir), "--output-dir", str(output_dir)]
+        self._run_commands_async([cmd], "Run all pipelines (single process)")
+
     def open_visualizer(self) -> None:
         dirs = self._validate_dirs()
         if not dirs:
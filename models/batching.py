@@ -0,0 +1,37 @@
+def length_sorted_batches(lengths, batch_size=32, max_batch_tokens=None):
+    """
+    Groups item indices into mini-batches of similar length.
+
+    Indices are sorted by length (longest first) so every batch only needs to be
+    padded to its own longest item. A batch is closed when it reaches batch_size
+    items or when padding it to its longest item would exceed max_batch_tokens.
+    Returns a list of index lists.
+    """
+    batch_size = max(1, int(batch_size))
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+
+    batches = []
+    current = []
+    current_max = 0
+
+    for idx in order:
+        length = max(1, int(lengths[idx]))
+        new_max = max(current_max, length)
+
+        too_many = len(current) >= batch_size
+        too_big = (
+            max_batch_tokens is not None
+            and current
+            and new_max * (len(current) + 1) > max_batch_tokens
+        )
+        if too_many or too_big:
+            batches.append(current)
+            current = []
+            new_max = length
+
+        current.append(idx)
+        current_max = new_max
+
+    if current:
+        batches.append(current)
+    return batches
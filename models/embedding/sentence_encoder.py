@@ -0,0 +1,47 @@
+import os
+import numpy as np
+
+from models.batching import length_sorted_batches
+from models.registry import registry
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "local_models", "minilm")
+MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+MODEL_NAME = "sentence_encoder"
+
+registry.register_pretrained(MODEL_NAME, MODEL_PATH, "AutoModel")
+
+def encode(texts, batch_size: int = 64, max_tokens: int = 256) -> np.ndarray:
+    """
+    Mean-pooled, L2-normalized sentence embeddings as a (len(texts), dim) array.
+    Texts are length-sorted and padded per mini-batch.
+    """
+    import torch
+    texts = [str(t) for t in texts]
+    embeddings = np.zeros((len(texts), registry.config(MODEL_NAME).hidden_size), dtype=np.float32)
+    if not texts:
+        return embeddings
+
+    tokenizer, model = registry.get(MODEL_NAME)
+    device = registry.device
+
+    encoded = tokenizer(texts, truncation=True, max_length=max_tokens)
+    input_ids = encoded["input_ids"]
+    attention_mask = encoded["attention_mask"]
+
+    for batch in length_sorted_batches([len(ids) for ids in input_ids], batch_size=batch_size):
+        features = {
+            "input_ids": [input_ids[j] for j in batch],
+            "attention_mask": [attention_mask[j] for j in batch],
+        }
+        inputs = tokenizer.pad(features, padding="longest", return_tensors="pt")
+        inputs = {k: v.to(device) for k, v in inputs.items()}
+
+        with torch.no_grad():
+            hidden = model(**inputs).last_hidden_state
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+
+        embeddings[batch] = pooled.float().cpu().numpy()
+
+    return embeddings
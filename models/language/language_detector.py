@@ -1,32 +1,74 @@
 import os
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch.nn.functional as F
+import numpy as np
+
+from models.batching import length_sorted_batches
+from models.registry import registry
 
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "local_models", "xlm_roberta")
-_device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+MODEL_NAME = "language_detector"
+
+# Language ID only needs the first few sentences, not the whole post
+LID_MAX_TOKENS = 128
+
+registry.register_pretrained(MODEL_NAME, MODEL_PATH, "AutoModelForSequenceClassification")
+
+def detect_languages(texts, threshold: float = 0.8, batch_size: int = 32, max_tokens: int = LID_MAX_TOKENS):
+    """
+    Batched language detection.
+    Texts are tokenized once (truncated to max_tokens), sorted by length and run in
+    mini-batches that are padded only to their longest item.
+    Returns (labels, confidences) as NumPy arrays in input order. Labels below the
+    threshold and empty texts are 'unknown'.
+    """
+    import torch
+    import torch.nn.functional as F
+    texts = [str(t) if t is not None else "" for t in texts]
+    labels = np.full(len(texts), "unknown", dtype=object)
+    confidences = np.zeros(len(texts), dtype=np.float32)
+
+    todo = [i for i, t in enumerate(texts) if t.strip()]
+    if not todo:
+        return labels, confidences
+
+    tokenizer, model = registry.get(MODEL_NAME)
+    device = registry.device
+
+    encoded = tokenizer([texts[i] for i in todo], truncation=True, max_length=max_tokens)
+    input_ids = encoded["input_ids"]
+    attention_mask = encoded["attention_mask"]
+
+    id2label = model.config.id2label
+    batches = length_sorted_batches([len(ids) for ids in input_ids], batch_size=batch_size)
+
+    for batch in batches:
+        features = {
+            "input_ids": [input_ids[j] for j in batch],
+            "attention_mask": [attention_mask[j] for j in batch],
+        }
+        inputs = tokenizer.pad(features, padding="longest", return_tensors="pt")
+        inputs = {k: v.to(device) for k, v in inputs.items()}
+
+        with torch.no_grad():
+            logits = model(**inputs).logits
+            probs = F.softmax(logits, dim=1)
+            batch_conf, batch_ids = torch.max(probs, dim=1)
+
+        for j, conf, label_id in zip(batch, batch_conf.tolist(), batch_ids.tolist()):
+            pos = todo[j]
+            confidences[pos] = conf
+            if conf >= threshold:
+                labels[pos] = id2label[label_id].replace("__label__", "")
 
-_tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-_model = AutoModelForSequenceClassification.from_pretrained(MODEL_PATH).to(_device)
+    return labels, confidences
 
 def detect_language(text: str, threshold: float = 0.8, return_confidence: bool = False):
     """
     Returns ISO 639-1 code or 'unknown' if confidence is below threshold.
     If return_confidence=True, returns a tuple: (label, confidence)
     """
-    if not text.strip():
-        return ("unknown", 0.0) if return_confidence else "unknown"
-    
-    inputs = _tokenizer(text, return_tensors="pt", truncation=True, max_length=512, padding="max_length")
-    inputs = {k: v.to(_device) for k, v in inputs.items()}
-
-    with torch.no_grad():
-        logits = _model(**inputs).logits
-        probs = F.softmax(logits, dim=1)[0]
-        confidence = torch.max(probs).item()
-        label_id = torch.argmax(probs).item()
-        label = _model.config.id2label[label_id].replace("__label__", "")
+    labels, confidences = detect_languages([text], threshold=threshold, batch_size=1, max_tokens=512)
+    label, confidence = str(labels[0]), float(confidences[0])
 
     if return_confidence:
-        return (label if confidence >= threshold else "unknown", confidence)
-    return label if confidence >= threshold else "unknown"
+        return (label, confidence)
+    return label
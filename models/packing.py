@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# Packed copies live next to the original weights: <model dir>/packed/
+PACKED_DIRNAME = "packed"
+MANIFEST_NAME = "manifest.json"
+
+# Set to 0 to always load the original save_pretrained folders
+USE_PACKED_ENV_VAR = "MODEL_USE_PACKED"
+
+WEIGHT_SUFFIXES = (".safetensors", ".bin", ".pt", ".pth", ".h5", ".msgpack")
+
+
+def weight_files(model_dir) -> list[Path]:
+    model_dir = Path(model_dir)
+    if not model_dir.is_dir():
+        return []
+    return sorted(f for f in model_dir.iterdir() if f.is_file() and f.suffix in WEIGHT_SUFFIXES)
+
+
+def source_fingerprint(model_dir) -> list:
+    """[name, size, mtime_ns] of each weight file; changes when the original model is re-downloaded."""
+    return [[f.name, f.stat().st_size, f.stat().st_mtime_ns] for f in weight_files(model_dir)]
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_manifest(model_dir) -> dict | None:
+    manifest_path = Path(model_dir) / PACKED_DIRNAME / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(model_dir, manifest: dict) -> Path:
+    manifest_path = Path(model_dir) / PACKED_DIRNAME / MANIFEST_NAME
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path
+
+
+def packing_enabled() -> bool:
+    return os.environ.get(USE_PACKED_ENV_VAR, "1").strip().lower() not in ("0", "false", "no")
+
+
+def packed_path(model_dir) -> str | None:
+    """
+    The packed folder for model_dir if it exists and still matches the
+    original weights, else None. Only sizes and mtimes are compared here so
+    the check stays cheap at load time; the file hashes in the manifest are
+    for verify runs of tools/pack_models.py.
+    """
+    if not model_dir or not packing_enabled():
+        return None
+
+    manifest = read_manifest(model_dir)
+    if manifest is None or manifest.get("source_fingerprint") != source_fingerprint(model_dir):
+        return None
+
+    packed_dir = Path(model_dir) / PACKED_DIRNAME
+    if not all((packed_dir / name).exists() for name in manifest.get("files", {})):
+        return None
+    return str(packed_dir).replace("\\", "/")
+
+
+def resolve_model_path(model_dir) -> tuple[str, dict | None]:
+    """(path to load from, manifest or None): the packed folder when it is usable, else model_dir."""
+    packed = packed_path(model_dir)
+    if packed is None:
+        return model_dir, None
+    return packed, read_manifest(model_dir)
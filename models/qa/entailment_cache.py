@@ -0,0 +1,96 @@
+import hashlib
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(str(text).encode("utf-8")).hexdigest()
+
+
+class EntailmentCache:
+    """
+    On-disk store of raw NLI logits keyed by (model id, text hash, hypothesis).
+    Scores for any label set can be recomputed from the cached logits, so
+    changing the configured labels only costs inference for new hypotheses.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entailment (
+                model_id TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                hypothesis TEXT NOT NULL,
+                logits BLOB NOT NULL,
+                PRIMARY KEY (model_id, text_hash, hypothesis)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get_many(self, model_id: str, pairs) -> dict:
+        """
+        Looks up (text, hypothesis) pairs.
+        Returns {(text, hypothesis): logits array} for the pairs found.
+        """
+        wanted = {}
+        for text, hypothesis in pairs:
+            wanted.setdefault(text_key(text), {}).setdefault(hypothesis, text)
+
+        found = {}
+        hashes = list(wanted)
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT text_hash, hypothesis, logits FROM entailment "
+                f"WHERE model_id = ? AND text_hash IN ({placeholders})",
+                [model_id, *chunk],
+            ).fetchall()
+            for text_hash, hypothesis, blob in rows:
+                text = wanted[text_hash].get(hypothesis)
+                if text is not None:
+                    found[(text, hypothesis)] = np.frombuffer(blob, dtype=np.float32)
+
+        requested = sum(len(h) for h in wanted.values())
+        self.hits += len(found)
+        self.misses += requested - len(found)
+        return found
+
+    def put_many(self, model_id: str, items) -> None:
+        """Stores ((text, hypothesis), logits) items."""
+        rows = [
+            (model_id, text_key(text), hypothesis, np.asarray(logits, dtype=np.float32).tobytes())
+            for (text, hypothesis), logits in items
+        ]
+        if not rows:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO entailment (model_id, text_hash, hypothesis, logits) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM entailment").fetchone()[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def close(self) -> None:
+        self._conn.close()
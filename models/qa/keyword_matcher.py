@@ -0,0 +1,78 @@
+import re
+
+
+class KeywordMatcher:
+    """
+    Compiled keyword lookup for the topic classifier's keyword shortcuts.
+
+    Keywords are lowercased, de-duplicated across labels and compiled once;
+    match_labels() finds the hits of every label in one pass over the keyword
+    set, first_label() stops at the first label (in config order) with a hit.
+    With word_boundary=True (the default) a keyword only counts as a whole
+    word, so "ba" no longer matches inside "basel"; the cheap substring test
+    runs first and the boundary regex is only evaluated for the rare keywords
+    that occur as substrings. With word_boundary=False matching is plain
+    substring search, identical to the old per-label keyword loop.
+    """
+
+    def __init__(self, keywords_by_label: dict, word_boundary: bool = True):
+        self.labels = list(keywords_by_label)
+        self.word_boundary = word_boundary
+
+        labels_by_keyword = {}
+        for label, keywords in keywords_by_label.items():
+            for kw in keywords:
+                kw = str(kw).lower()
+                if kw:
+                    labels_by_keyword.setdefault(kw, set()).add(label)
+
+        patterns = {
+            kw: re.compile(rf"(?<!\w){re.escape(kw)}(?!\w)") if word_boundary else None
+            for kw in labels_by_keyword
+        }
+        self._keywords = [(kw, patterns[kw], frozenset(labels)) for kw, labels in labels_by_keyword.items()]
+        self._keywords_by_label = [
+            (label, [(str(kw).lower(), patterns[str(kw).lower()]) for kw in keywords if str(kw)])
+            for label, keywords in keywords_by_label.items()
+        ]
+
+    @staticmethod
+    def _hit(kw, pattern, text_lower) -> bool:
+        return kw in text_lower and (pattern is None or pattern.search(text_lower) is not None)
+
+    def match_labels(self, text: str) -> set:
+        """Returns the set of labels with at least one keyword in text."""
+        if not text:
+            return set()
+
+        text_lower = text.lower()
+        found = set()
+
+        for kw, pattern, labels in self._keywords:
+            if not labels <= found and self._hit(kw, pattern, text_lower):
+                found |= labels
+                if len(found) == len(self.labels):
+                    break
+
+        return found
+
+    def first_label(self, text: str):
+        """Returns the first label (in config order) with a keyword hit, or None."""
+        if not text:
+            return None
+
+        text_lower = text.lower()
+        for label, keywords in self._keywords_by_label:
+            if any(self._hit(kw, pattern, text_lower) for kw, pattern in keywords):
+                return label
+        return None
+
+    def has_label(self, text: str, label: str) -> bool:
+        if not text:
+            return False
+
+        text_lower = text.lower()
+        for name, keywords in self._keywords_by_label:
+            if name == label:
+                return any(self._hit(kw, pattern, text_lower) for kw, pattern in keywords)
+        return False
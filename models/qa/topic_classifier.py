@@ -1,24 +1,46 @@
 import json
 import os
 import re
-from collections import Counter
 from pathlib import Path
 
-import torch
-from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+import numpy as np
+
+from models.batching import length_sorted_batches
+from models.qa.keyword_matcher import KeywordMatcher
+from models.registry import registry
 
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "local_models", "bart_mnli")
-_device = 0 if torch.cuda.is_available() else -1
+MODEL_ID = "facebook/bart-large-mnli"
+MODEL_NAME = "topic_bart_mnli"
+
+# Same hypothesis the HF zero-shot pipeline uses
+HYPOTHESIS_TEMPLATE = "This example is {}."
+
+# Limits for the (premise, hypothesis) mini-batches in classify_many
+DEFAULT_NLI_BATCH_SIZE = 32
+DEFAULT_NLI_MAX_BATCH_TOKENS = 8192
+
+registry.register_pretrained(MODEL_NAME, MODEL_PATH, "AutoModelForSequenceClassification")
+
 
-_tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-_model = AutoModelForSequenceClassification.from_pretrained(MODEL_PATH)
+class _ZeroShotClassifier:
+    """
+    Stand-in for the HF zero-shot pipeline that used to be built at import.
+    The pipeline is built per call around the registry's model, so it never
+    keeps an unloaded model alive.
+    """
 
-classifier = pipeline(
-    "zero-shot-classification",
-    model=_model,
-    tokenizer=_tokenizer,
-    device=_device
-)
+    def __call__(self, *args, **kwargs):
+        from transformers import pipeline
+
+        tokenizer, model = registry.get(MODEL_NAME)
+        zero_shot = pipeline("zero-shot-classification", model=model, tokenizer=tokenizer, device=registry.device)
+        return zero_shot(*args, **kwargs)
+
+
+classifier = _ZeroShotClassifier()
+
+_entailment_cache = None
 
 _CONFIG = {
     "main_topic_label": "",
@@ -27,8 +49,25 @@ _CONFIG = {
     "aspect_labels": [],
     "degree_keywords": {},
     "aspect_keywords": {},
+    "keyword_word_boundary": True,
+    "degree_matcher": KeywordMatcher({}),
+    "aspect_matcher": KeywordMatcher({}),
+    "cascade_enabled": False,
+    "cascade_margin": 0.1,
 }
 
+# Config keys each task reads, besides the cascade settings; results of a
+# task stay valid when only other keys change
+TASK_CONFIG_KEYS = {
+    "main_topic": ["main_topic_label", "candidate_labels"],
+    "degree": ["degree_labels", "degree_keywords", "keyword_word_boundary"],
+    "aspect": ["aspect_labels", "aspect_keywords", "keyword_word_boundary"],
+}
+
+# Label embeddings for the cascade, rebuilt after every config load
+_LABEL_EMBEDDINGS = {}
+_CASCADE_STATS = {"texts": 0, "escalated": 0}
+
 
 def load_topic_classifier_config(input_dir: str | Path) -> None:
     input_dir = Path(input_dir)
@@ -58,6 +97,48 @@ def load_topic_classifier_config(input_dir: str | Path) -> None:
     _CONFIG["aspect_labels"] = cfg["aspect_labels"]
     _CONFIG["degree_keywords"] = cfg["degree_keywords"]
     _CONFIG["aspect_keywords"] = cfg["aspect_keywords"]
+    _CONFIG["keyword_word_boundary"] = bool(cfg.get("keyword_word_boundary", True))
+
+    # Keyword lists are compiled once here instead of scanned per label per text
+    word_boundary = _CONFIG["keyword_word_boundary"]
+    _CONFIG["degree_matcher"] = KeywordMatcher(cfg["degree_keywords"], word_boundary=word_boundary)
+    _CONFIG["aspect_matcher"] = KeywordMatcher(cfg["aspect_keywords"], word_boundary=word_boundary)
+
+    cascade = cfg.get("cascade", {})
+    _CONFIG["cascade_enabled"] = bool(cascade.get("enabled", False))
+    _CONFIG["cascade_margin"] = float(cascade.get("margin_threshold", 0.1))
+    _LABEL_EMBEDDINGS.clear()
+
+    # Stats are per stage; a single-process run loads the config once per stage
+    _CASCADE_STATS["texts"] = 0
+    _CASCADE_STATS["escalated"] = 0
+
+
+def configure_cascade(enabled: bool, margin_threshold: float | None = None) -> None:
+    """Turns the embedding prefilter on or off and optionally sets its margin."""
+    _CONFIG["cascade_enabled"] = bool(enabled)
+    if margin_threshold is not None:
+        _CONFIG["cascade_margin"] = float(margin_threshold)
+
+
+def task_config(task: str) -> dict:
+    """The loaded config values a task ("main_topic", "degree" or "aspect") depends on."""
+    _ensure_config_loaded()
+    values = {key: _CONFIG[key] for key in TASK_CONFIG_KEYS[task]}
+    values["cascade_enabled"] = _CONFIG["cascade_enabled"]
+    if _CONFIG["cascade_enabled"]:
+        values["cascade_margin"] = _CONFIG["cascade_margin"]
+    return values
+
+
+def task_models() -> list[str]:
+    """Registry names of the models the classifier runs with the loaded config."""
+    if not _CONFIG["cascade_enabled"]:
+        return [MODEL_NAME]
+
+    from models.embedding import sentence_encoder
+
+    return [MODEL_NAME, sentence_encoder.MODEL_NAME]
 
 
 def _ensure_config_loaded() -> None:
@@ -68,89 +149,340 @@ def _ensure_config_loaded() -> None:
         )
 
 
-def is_about_main_topic(text: str, threshold: float = 0.5) -> bool:
+def _entailment_id() -> int:
+    for label, idx in registry.config(MODEL_NAME).label2id.items():
+        if label.lower().startswith("entail"):
+            return int(idx)
+    return -1
+
+
+def set_entailment_cache(cache) -> None:
+    """Sets the EntailmentCache used by classify_many (None disables it)."""
+    global _entailment_cache
+    _entailment_cache = cache
+
+
+def get_entailment_cache():
+    return _entailment_cache
+
+
+def _run_nli(pairs, batch_size: int, max_batch_tokens: int) -> np.ndarray:
+    import torch
+    tokenizer, model = registry.get(MODEL_NAME)
+    encoded = tokenizer([p for p, _ in pairs], [h for _, h in pairs], truncation="only_first")
+    input_ids = encoded["input_ids"]
+    attention_mask = encoded["attention_mask"]
+
+    logits = np.zeros((len(pairs), model.config.num_labels), dtype=np.float32)
+
+    batches = length_sorted_batches(
+        [len(ids) for ids in input_ids],
+        batch_size=batch_size,
+        max_batch_tokens=max_batch_tokens,
+    )
+    for batch in batches:
+        features = {
+            "input_ids": [input_ids[j] for j in batch],
+            "attention_mask": [attention_mask[j] for j in batch],
+        }
+        inputs = tokenizer.pad(features, padding="longest", return_tensors="pt")
+        inputs = {k: v.to(registry.device) for k, v in inputs.items()}
+
+        with torch.no_grad():
+            batch_logits = model(**inputs).logits
+        logits[batch] = batch_logits.float().cpu().numpy()
+
+    return logits
+
+
+def _cache_model_id() -> str:
+    """Entailment cache key of the NLI model: its hub id and registry version."""
+    return f"{MODEL_ID}@{registry.version(MODEL_NAME)}"
+
+
+def _nli_logits(pairs, batch_size: int, max_batch_tokens: int) -> dict:
+    """Raw NLI logits for unique (premise, hypothesis) pairs, served from the cache when possible."""
+    unique = list(dict.fromkeys(pairs))
+
+    cached = {}
+    if _entailment_cache is not None:
+        cached = _entailment_cache.get_many(_cache_model_id(), unique)
+
+    missing = [pair for pair in unique if pair not in cached]
+    if missing:
+        computed = _run_nli(missing, batch_size, max_batch_tokens)
+        if _entailment_cache is not None:
+            _entailment_cache.put_many(_cache_model_id(), zip(missing, computed))
+        cached.update(zip(missing, computed))
+
+    return cached
+
+
+def classify_many(
+    texts,
+    label_set,
+    batch_size: int = DEFAULT_NLI_BATCH_SIZE,
+    max_batch_tokens: int = DEFAULT_NLI_MAX_BATCH_TOKENS,
+) -> np.ndarray:
+    """
+    Zero-shot scores for many texts at once.
+    Builds every (text, hypothesis) pair for the batch, runs them through the NLI
+    model in length-sorted, token-budgeted mini-batches and softmaxes the
+    entailment logits over label_set, like the single-label HF pipeline.
+    With an entailment cache set, only pairs not seen before are computed.
+    Returns a (len(texts), len(label_set)) float array.
+    """
+    texts = [str(t) for t in texts]
+    labels = list(label_set)
+    if not texts or not labels:
+        return np.zeros((len(texts), len(labels)), dtype=np.float32)
+
+    hypotheses = [HYPOTHESIS_TEMPLATE.format(label) for label in labels]
+    pairs = [(t, h) for t in texts for h in hypotheses]
+    pair_logits = _nli_logits(pairs, batch_size, max_batch_tokens)
+
+    entailment_id = _entailment_id()
+    logits = np.array([pair_logits[pair][entailment_id] for pair in pairs], dtype=np.float32)
+
+    logits = logits.reshape(len(texts), len(labels))
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def _label_embeddings(labels) -> np.ndarray:
+    from models.embedding import sentence_encoder
+
+    key = tuple(labels)
+    if key not in _LABEL_EMBEDDINGS:
+        _LABEL_EMBEDDINGS[key] = sentence_encoder.encode(list(labels))
+    return _LABEL_EMBEDDINGS[key]
+
+
+def embedding_scores(texts, label_set) -> np.ndarray:
+    """Cosine similarity between sentence embeddings of texts and labels."""
+    from models.embedding import sentence_encoder
+
+    return sentence_encoder.encode(texts) @ _label_embeddings(label_set).T
+
+
+def _margins(similarities: np.ndarray) -> np.ndarray:
+    if similarities.shape[1] < 2:
+        return np.full(similarities.shape[0], np.inf)
+    top2 = np.sort(similarities, axis=1)[:, -2:]
+    return top2[:, 1] - top2[:, 0]
+
+
+def cascade_classify(texts, label_set, margin_threshold: float | None = None) -> np.ndarray:
+    """
+    Embedding prefilter in front of classify_many.
+    Texts whose top-1/top-2 label similarity margin reaches margin_threshold are
+    decided by the embedding model and get a one-hot score row; the rest
+    escalate to the NLI model. Returns the same shape as classify_many.
+    """
+    texts = [str(t) for t in texts]
+    labels = list(label_set)
+    if margin_threshold is None:
+        margin_threshold = _CONFIG["cascade_margin"]
+
+    scores = np.zeros((len(texts), len(labels)), dtype=np.float32)
+    if not texts or not labels:
+        return scores
+
+    similarities = embedding_scores(texts, labels)
+    confident = _margins(similarities) >= margin_threshold
+    scores[confident, similarities[confident].argmax(axis=1)] = 1.0
+
+    escalate = np.flatnonzero(~confident)
+    if len(escalate):
+        scores[escalate] = classify_many([texts[i] for i in escalate], labels)
+
+    _CASCADE_STATS["texts"] += len(texts)
+    _CASCADE_STATS["escalated"] += len(escalate)
+    return scores
+
+
+def cascade_stats() -> dict:
+    texts = _CASCADE_STATS["texts"]
+    escalated = _CASCADE_STATS["escalated"]
+    return {
+        "texts": texts,
+        "escalated": escalated,
+        "escalation_rate": escalated / texts if texts else 0.0,
+    }
+
+
+def cascade_report(texts, label_set, thresholds) -> list[dict]:
+    """
+    Escalation rate and top-label agreement with pure NLI for each margin threshold.
+    Both models run once over texts; the sweep itself is pure NumPy.
+    """
+    texts = [str(t) for t in texts]
+    labels = list(label_set)
+
+    similarities = embedding_scores(texts, labels)
+    margins = _margins(similarities)
+    embedding_top = similarities.argmax(axis=1)
+    nli_top = classify_many(texts, labels).argmax(axis=1)
+
+    report = []
+    for threshold in thresholds:
+        confident = margins >= threshold
+        cascade_top = np.where(confident, embedding_top, nli_top)
+        accepted = int(confident.sum())
+        report.append({
+            "margin_threshold": float(threshold),
+            "escalation_rate": 1.0 - accepted / len(texts) if texts else 0.0,
+            "agreement": float((cascade_top == nli_top).mean()) if texts else 1.0,
+            "agreement_on_accepted": float((embedding_top[confident] == nli_top[confident]).mean()) if accepted else 1.0,
+        })
+    return report
+
+
+def _score_many(texts, label_set) -> np.ndarray:
+    if _CONFIG["cascade_enabled"]:
+        return cascade_classify(texts, label_set)
+    return classify_many(texts, label_set)
+
+
+def is_about_main_topic_many(texts, threshold: float = 0.5) -> list[bool]:
     _ensure_config_loaded()
 
-    result = classifier(text, candidate_labels=_CONFIG["candidate_labels"])
+    labels = _CONFIG["candidate_labels"]
     main_label = _CONFIG["main_topic_label"]
+    if main_label not in labels:
+        return [False] * len(texts)
+
+    scores = _score_many(texts, labels)
+    main_scores = scores[:, labels.index(main_label)]
+    return [bool(score >= threshold) for score in main_scores]
 
-    for label, score in zip(result["labels"], result["scores"]):
-        if label == main_label and score >= threshold:
-            return True
-    return False
+
+def is_about_main_topic(text: str, threshold: float = 0.5) -> bool:
+    return is_about_main_topic_many([text], threshold=threshold)[0]
 
 
 def is_about_degree(text: str, degree_label: str, threshold: float = 0.5) -> bool:
     _ensure_config_loaded()
 
-    text_lower = text.lower()
-    degree_keywords = _CONFIG["degree_keywords"]
-
-    if degree_label in degree_keywords and any(kw in text_lower for kw in degree_keywords[degree_label]):
+    if _CONFIG["degree_matcher"].has_label(text, degree_label):
         return True
 
-    result = classifier(text, candidate_labels=_CONFIG["degree_labels"])
-    return any(
-        label == degree_label and score >= threshold
-        for label, score in zip(result["labels"], result["scores"])
-    )
+    labels = _CONFIG["degree_labels"]
+    if degree_label not in labels:
+        return False
 
+    scores = _score_many([text], labels)[0]
+    return bool(scores[labels.index(degree_label)] >= threshold)
 
-def get_most_likely_degree(text: str, threshold: float = 0.5) -> str:
+
+def get_most_likely_degree_many(texts, threshold: float = 0.5) -> list[str]:
     _ensure_config_loaded()
 
-    text_lower = text.lower()
+    degree_matcher = _CONFIG["degree_matcher"]
+    results = [None] * len(texts)
+    pending = []
 
-    for degree_label, keywords in _CONFIG["degree_keywords"].items():
-        if any(kw in text_lower for kw in keywords):
-            return degree_label
+    for i, text in enumerate(texts):
+        results[i] = degree_matcher.first_label(text)
+        if results[i] is None:
+            pending.append(i)
 
-    result = classifier(text, candidate_labels=_CONFIG["degree_labels"])
-    if result["scores"][0] >= threshold:
-        return result["labels"][0]
-    return "unknown"
+    if pending:
+        labels = _CONFIG["degree_labels"]
+        scores = _score_many([texts[i] for i in pending], labels)
+        best = scores.argmax(axis=1)
+        for i, label_id, row in zip(pending, best, scores):
+            results[i] = labels[label_id] if row[label_id] >= threshold else "unknown"
 
+    return results
 
-def get_main_aspect(text: str, threshold: float = 0.2) -> str:
+
+def get_most_likely_degree(text: str, threshold: float = 0.5) -> str:
+    return get_most_likely_degree_many([text], threshold=threshold)[0]
+
+
+def _split_sentences(text: str) -> list[str]:
+    sentences = re.split(r"[.!?]\s+", text.strip())
+    return [s for s in sentences if len(s) > 5]
+
+
+def _aggregate_aspect_votes(scores: np.ndarray, owners: np.ndarray, n_texts: int, threshold: float) -> np.ndarray:
+    """
+    Vectorized form of the per-post sentence vote.
+    Each sentence votes for its top label with its score if the score reaches the
+    threshold. A post takes the label with the highest vote total; ties go to the
+    label that received its first vote earliest. Returns the winning label index
+    per post, or -1 when a post got no votes.
+    """
+    n_sentences, n_labels = scores.shape
+    best = scores.argmax(axis=1)
+    best_score = scores[np.arange(n_sentences), best].astype(np.float64)
+    voted = best_score >= threshold
+
+    owners_v = owners[voted]
+    best_v = best[voted]
+
+    votes = np.zeros((n_texts, n_labels), dtype=np.float64)
+    counts = np.zeros((n_texts, n_labels), dtype=np.int64)
+    first_vote = np.full((n_texts, n_labels), np.iinfo(np.int64).max, dtype=np.int64)
+
+    np.add.at(votes, (owners_v, best_v), best_score[voted])
+    np.add.at(counts, (owners_v, best_v), 1)
+    np.minimum.at(first_vote, (owners_v, best_v), np.flatnonzero(voted))
+
+    has_vote = counts > 0
+    masked = np.where(has_vote, votes, -np.inf)
+    is_max = has_vote & (masked == masked.max(axis=1, keepdims=True))
+    winner = np.where(is_max, first_vote, np.iinfo(np.int64).max).argmin(axis=1)
+
+    return np.where(has_vote.any(axis=1), winner, -1)
+
+
+def get_main_aspect_many(texts, threshold: float = 0.2) -> list[str]:
     _ensure_config_loaded()
 
-    if not text or len(text.strip()) < 5:
-        return "unknown"
+    aspect_matcher = _CONFIG["aspect_matcher"]
+    results = ["unknown"] * len(texts)
 
-    text_lower = text.lower()
-    aspect_keywords = _CONFIG["aspect_keywords"]
+    pending = []
+    sentences = []
+    owners = []
 
-    for aspect_label, keywords in aspect_keywords.items():
-        if any(kw in text_lower for kw in keywords):
-            return aspect_label
+    for i, text in enumerate(texts):
+        if not text or len(text.strip()) < 5:
+            continue
 
-    sentences = re.split(r"[.!?]\s+", text.strip())
-    sentences = [s for s in sentences if len(s) > 5]
-
-    for sentence in sentences:
-        s_lower = sentence.lower()
-        for aspect_label, keywords in aspect_keywords.items():
-            if any(kw in s_lower for kw in keywords):
-                return aspect_label
-
-    votes = Counter()
-    best_label = "unknown"
-    best_score = 0.0
-
-    for sentence in sentences:
-        result = classifier(sentence, candidate_labels=_CONFIG["aspect_labels"])
-        label = result["labels"][0]
-        score = result["scores"][0]
-
-        if score >= threshold:
-            votes[label] += score
-            if score > best_score:
-                best_label = label
-                best_score = score
-
-    if votes:
-        return max(votes, key=votes.get)
-    return best_label
+        label = aspect_matcher.first_label(text)
+        if label is None:
+            text_sentences = _split_sentences(text)
+            for sentence in text_sentences:
+                label = aspect_matcher.first_label(sentence)
+                if label is not None:
+                    break
+
+        if label is not None:
+            results[i] = label
+            continue
+
+        pending.append(i)
+        sentences.extend(text_sentences)
+        owners.extend([len(pending) - 1] * len(text_sentences))
+
+    if sentences:
+        labels = _CONFIG["aspect_labels"]
+        scores = _score_many(sentences, labels)
+        winners = _aggregate_aspect_votes(scores, np.asarray(owners), len(pending), threshold)
+
+        for i, label_id in zip(pending, winners):
+            if label_id >= 0:
+                results[i] = labels[label_id]
+
+    return results
+
+
+def get_main_aspect(text: str, threshold: float = 0.2) -> str:
+    return get_main_aspect_many([text], threshold=threshold)[0]
 
 
 def get_topic_labels() -> list[str]:
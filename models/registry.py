@@ -0,0 +1,339 @@
+import gc
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from models.packing import packed_path, resolve_model_path, source_fingerprint
+
+# Device for every registered model: "auto" (CUDA when available), "cpu", "cuda", "cuda:1", ...
+DEVICE_ENV_VAR = "MODEL_DEVICE"
+
+# Memory budget in MiB for the resident models on that device (unset or 0 = unlimited)
+BUDGET_ENV_VAR = "MODEL_MEMORY_BUDGET_MB"
+
+_WEIGHT_SUFFIXES = (".safetensors", ".bin", ".pt", ".pth")
+
+
+def configured_device() -> str:
+    value = os.environ.get(DEVICE_ENV_VAR, "auto").strip().lower()
+    if value in ("", "auto"):
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    return value
+
+
+def configured_budget_bytes() -> int | None:
+    value = os.environ.get(BUDGET_ENV_VAR, "").strip()
+    if not value or float(value) <= 0:
+        return None
+    return int(float(value) * 2 ** 20)
+
+
+def process_rss_bytes() -> int | None:
+    """Resident set size of this process, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+def weight_file_bytes(path) -> int:
+    """Size of the weight files in a model folder; estimates the footprint of a model before its first load."""
+    if not path or not Path(path).is_dir():
+        return 0
+    return sum(f.stat().st_size for f in Path(path).iterdir() if f.suffix in _WEIGHT_SUFFIXES)
+
+
+def module_bytes(value) -> int:
+    """Bytes held by the parameters and buffers of the torch modules in value (a module, or a tuple/list/dict of them)."""
+    if isinstance(value, dict):
+        return sum(module_bytes(v) for v in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(module_bytes(v) for v in value)
+    if hasattr(value, "parameters") and hasattr(value, "buffers"):
+        tensors = list(value.parameters()) + list(value.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    return 0
+
+
+def load_pretrained(path: str, model_class: str, tokenizer_class: str | None, device, **kwargs):
+    """
+    Loads a (tokenizer, model) pair from a local folder and moves the model to device.
+    A packed copy written by tools/pack_models.py is used when it is up to date;
+    its safetensors weights are memory-mapped and keep their stored precision.
+    """
+    import transformers
+
+    load_path, manifest = resolve_model_path(path)
+    model_kwargs = dict(kwargs)
+    if manifest is not None:
+        model_kwargs.setdefault("torch_dtype", "auto")
+
+    tokenizer = getattr(transformers, tokenizer_class).from_pretrained(load_path, **kwargs) if tokenizer_class else None
+    model = getattr(transformers, model_class).from_pretrained(load_path, **model_kwargs).to(device)
+    model.eval()
+    return tokenizer, model
+
+
+class ModelRegistry:
+    """
+    Loads models on first use instead of at import time.
+
+    Modules register a loader per model name; get(name) runs it once, on the
+    configured device, and keeps the result until unload(name). Load time,
+    parameter memory and the number of loads are recorded per model.
+    Different models can load concurrently; each name has its own lock.
+
+    With a memory budget, resident models are kept in least-recently-used
+    order. Before a model loads, older models are evicted until its expected
+    size fits the budget, and get() reloads an evicted model transparently.
+    A model larger than the whole budget still loads, on its own. Eviction
+    only drops the registry's reference: a caller still holding the model
+    keeps it alive until that call returns.
+    """
+
+    def __init__(self, device: str | None = None, budget_bytes: int | None = None):
+        self._device_name = device
+        self._device = None
+        self.budget_bytes = budget_bytes if budget_bytes is not None else configured_budget_bytes()
+        self.peak_bytes = 0
+        self._loaders = {}
+        self._paths = {}
+        self._configs = {}
+        self._loaded = OrderedDict()
+        self._info = {}
+        self._lock = threading.Lock()
+        self._name_locks = {}
+
+    @property
+    def device(self):
+        """torch.device the models are placed on; resolved on first access."""
+        if self._device is None:
+            import torch
+            self._device = torch.device(self._device_name or configured_device())
+        return self._device
+
+    def set_memory_budget(self, megabytes: float | None) -> None:
+        """Sets the resident-model budget in MiB (None or 0 = unlimited) and evicts down to it."""
+        self.budget_bytes = int(megabytes * 2 ** 20) if megabytes else None
+        self._make_room(0)
+
+    def register(self, name: str, loader, path: str | None = None) -> None:
+        """
+        Registers loader(device) -> model object under name. Re-registering replaces the loader.
+        path is the model's local folder, if it has one.
+        """
+        with self._lock:
+            if path is not None:
+                self._paths[name] = path
+            self._loaders[name] = loader
+            self._name_locks.setdefault(name, threading.Lock())
+            self._info.setdefault(name, {
+                "load_seconds": 0.0,
+                "bytes": 0,
+                "rss_delta_bytes": None,
+                "loads": 0,
+                "evictions": 0,
+                "last_used": None,
+                "packed": False,
+            })
+
+    def register_pretrained(
+        self,
+        name: str,
+        path: str,
+        model_class: str,
+        tokenizer_class: str | None = "AutoTokenizer",
+        **kwargs,
+    ) -> None:
+        """Registers a local transformers model; get(name) returns (tokenizer, model)."""
+        self.register(
+            name,
+            lambda device: load_pretrained(path, model_class, tokenizer_class, device, **kwargs),
+            path=path,
+        )
+
+    def path(self, name: str) -> str:
+        return self._paths[name]
+
+    def version(self, name: str) -> str:
+        """
+        Short hash of a model's name, weight files (names, sizes, mtimes) and
+        the dtype of the packed copy it loads from, read without loading it;
+        changes when the model is swapped, re-downloaded or re-packed.
+        """
+        files, dtype = [], None
+        if name in self._paths:
+            files = source_fingerprint(self._paths[name])
+            _, manifest = resolve_model_path(self._paths[name])
+            if manifest is not None:
+                dtype = manifest.get("dtype")
+        return hashlib.sha1(json.dumps([name, files, dtype]).encode("utf-8")).hexdigest()[:16]
+
+    def config(self, name: str):
+        """The transformers config of a pretrained entry, read without loading the weights."""
+        loaded = self._loaded.get(name)
+        if loaded is not None:
+            return loaded[1].config
+        if name not in self._configs:
+            from transformers import AutoConfig
+            self._configs[name] = AutoConfig.from_pretrained(self._paths[name])
+        return self._configs[name]
+
+    def _touch(self, name: str):
+        """Returns the loaded model and marks it most recently used, or None."""
+        with self._lock:
+            value = self._loaded.get(name)
+            if value is not None:
+                self._loaded.move_to_end(name)
+                self._info[name]["last_used"] = time.time()
+            return value
+
+    def get(self, name: str):
+        value = self._touch(name)
+        if value is not None:
+            return value
+
+        if name not in self._loaders:
+            raise KeyError(f"No model registered as '{name}'")
+
+        with self._name_locks[name]:
+            value = self._touch(name)
+            if value is not None:
+                return value
+
+            info = self._info[name]
+            estimate = info["bytes"] or weight_file_bytes(packed_path(self._paths.get(name)) or self._paths.get(name))
+            self._make_room(estimate, keep=name)
+
+            rss_before = process_rss_bytes()
+            started = time.perf_counter()
+            value = self._loaders[name](self.device)
+            elapsed = time.perf_counter() - started
+            rss_after = process_rss_bytes()
+
+            with self._lock:
+                info["load_seconds"] = elapsed
+                info["bytes"] = module_bytes(value)
+                info["rss_delta_bytes"] = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+                info["loads"] += 1
+                info["last_used"] = time.time()
+                info["packed"] = packed_path(self._paths.get(name)) is not None
+                self._loaded[name] = value
+                self.peak_bytes = max(self.peak_bytes, self._resident_bytes_locked())
+
+            source = "packed" if info["packed"] else "original"
+            print(f"[Models] Loaded {name} ({source}) on {self.device} in {elapsed:.1f}s "
+                  f"({info['bytes'] / 2 ** 20:.0f} MiB)", flush=True)
+
+            # The measured size can exceed the estimate; settle the budget without evicting this model
+            self._make_room(0, keep=name)
+            return value
+
+    def _resident_bytes_locked(self) -> int:
+        return sum(self._info[name]["bytes"] for name in self._loaded)
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return self._resident_bytes_locked()
+
+    def _make_room(self, incoming_bytes: int, keep: str | None = None) -> None:
+        """Evicts least-recently-used models until incoming_bytes more fit the budget."""
+        if not self.budget_bytes:
+            return
+
+        while True:
+            with self._lock:
+                if self._resident_bytes_locked() + incoming_bytes <= self.budget_bytes:
+                    return
+                victims = [name for name in self._loaded if name != keep]
+                if not victims:
+                    return
+                victim = victims[0]
+
+            if self.unload(victim):
+                with self._lock:
+                    self._info[victim]["evictions"] += 1
+                print(f"[Models] Evicted {victim} to stay within the "
+                      f"{self.budget_bytes / 2 ** 20:.0f} MiB model budget", flush=True)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._loaded
+
+    def loaded(self) -> list[str]:
+        """Loaded model names, least recently used first."""
+        with self._lock:
+            return list(self._loaded)
+
+    def unload(self, name: str) -> bool:
+        """Drops the registry's reference to a model. Returns False if it was not loaded."""
+        with self._lock:
+            value = self._loaded.pop(name, None)
+        if value is None:
+            return False
+
+        del value
+        gc.collect()
+        if self.device.type == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+        return True
+
+    def unload_all(self) -> None:
+        for name in self.loaded():
+            self.unload(name)
+
+    def stats(self) -> dict:
+        """
+        {name: {"loaded", "load_seconds", "bytes", "rss_delta_bytes", "loads", "evictions", "last_used", "packed"}}
+        for every registered model. bytes is the parameter and buffer memory of
+        the last load; rss_delta_bytes the process RSS growth it caused.
+        """
+        with self._lock:
+            return {
+                name: {"loaded": name in self._loaded, **info}
+                for name, info in self._info.items()
+            }
+
+    def memory_report(self) -> dict:
+        """Totals for logging: resident and peak model memory, the budget, evictions and process RSS."""
+        with self._lock:
+            return {
+                "resident_bytes": self._resident_bytes_locked(),
+                "peak_bytes": self.peak_bytes,
+                "budget_bytes": self.budget_bytes,
+                "evictions": sum(info["evictions"] for info in self._info.values()),
+                "process_rss_bytes": process_rss_bytes(),
+                "resident": {name: self._info[name]["bytes"] for name in self._loaded},
+            }
+
+
+registry = ModelRegistry()
+
+
+def log_memory_report(tag: str) -> None:
+    """Prints the registry's per-model load and memory figures with a '[tag]' prefix."""
+    report = registry.memory_report()
+    mib = 2 ** 20
+
+    for name, info in registry.stats().items():
+        if not info["loads"]:
+            continue
+        rss = f", RSS +{info['rss_delta_bytes'] / mib:.0f} MiB" if info["rss_delta_bytes"] is not None else ""
+        print(f"[{tag}] Model {name}: {info['bytes'] / mib:.0f} MiB{rss}, loaded {info['loads']}x "
+              f"(last load {info['load_seconds']:.1f}s), evicted {info['evictions']}x", flush=True)
+
+    budget = f"{report['budget_bytes'] / mib:.0f} MiB" if report["budget_bytes"] else "unlimited"
+    rss = f", process RSS {report['process_rss_bytes'] / mib:.0f} MiB" if report["process_rss_bytes"] else ""
+    print(f"[{tag}] Model memory: peak {report['peak_bytes'] / mib:.0f} MiB, budget {budget}, "
+          f"{report['evictions']} evictions{rss}", flush=True)
@@ -0,0 +1,146 @@
+import numpy as np
+
+from models.batching import length_sorted_batches
+from models.sentiment.vote_policies import SENTIMENT_LABELS
+
+DEFAULT_BATCH_SIZE = 32
+MAX_TOKENS = 512
+DEFAULT_WINDOW_OVERLAP = 128
+DEFAULT_LENGTH_POWER = 1.0
+
+# Long-text settings, set once per run by configure_long_text()
+_LONG_TEXT = {
+    "window_overlap": DEFAULT_WINDOW_OVERLAP,
+    "length_power": DEFAULT_LENGTH_POWER,
+}
+
+
+def configure_long_text(window_overlap: int | None = None, length_power: float | None = None) -> None:
+    """
+    Sets how long texts are windowed when predict_probs(long_text=True) is used.
+    window_overlap is the number of tokens shared by neighbouring windows;
+    length_power weights each window's logits by (window length ** length_power),
+    so 0 averages windows uniformly and 1 weights them by their token count.
+    """
+    if window_overlap is not None:
+        if window_overlap < 0:
+            raise ValueError("window_overlap must be >= 0")
+        _LONG_TEXT["window_overlap"] = int(window_overlap)
+    if length_power is not None:
+        _LONG_TEXT["length_power"] = float(length_power)
+
+
+def sentiment_matrix(id_to_sentiment) -> np.ndarray:
+    """(num_labels, 3) 0/1 matrix that sums raw label probabilities into sentiment classes."""
+    matrix = np.zeros((len(id_to_sentiment), len(SENTIMENT_LABELS)), dtype=np.float32)
+    for label_id, sentiment in enumerate(id_to_sentiment):
+        matrix[label_id, SENTIMENT_LABELS.index(sentiment)] = 1.0
+    return matrix
+
+
+def neutral_probs(n: int) -> np.ndarray:
+    probs = np.zeros((n, len(SENTIMENT_LABELS)), dtype=np.float32)
+    probs[:, SENTIMENT_LABELS.index("Neutral")] = 1.0
+    return probs
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def split_windows(token_ids, window_tokens: int, overlap: int) -> list:
+    """
+    Splits token ids into windows of at most window_tokens, each starting
+    window_tokens - overlap after the previous one. The last window ends at
+    the last token. Short sequences stay a single window.
+    """
+    if len(token_ids) <= window_tokens:
+        return [token_ids]
+
+    step = max(1, window_tokens - overlap)
+    windows = []
+    for start in range(0, len(token_ids), step):
+        windows.append(token_ids[start:start + window_tokens])
+        if start + window_tokens >= len(token_ids):
+            break
+    return windows
+
+
+def aggregate_windows(logits: np.ndarray, owners, lengths, n_texts: int, length_power: float = DEFAULT_LENGTH_POWER) -> np.ndarray:
+    """
+    Combines per-window logits into one probability row per text.
+    owners[k] is the text index of window k and lengths[k] its token count;
+    each text gets softmax of the (length ** length_power)-weighted mean of
+    its window logits.
+    """
+    owners = np.asarray(owners, dtype=np.int64)
+    weights = np.asarray(lengths, dtype=np.float64) ** length_power
+
+    summed = np.zeros((n_texts, logits.shape[1]), dtype=np.float64)
+    np.add.at(summed, owners, logits * weights[:, None])
+    total = np.bincount(owners, weights=weights, minlength=n_texts)
+    return softmax(summed / total[:, None]).astype(np.float32)
+
+
+def _run_model(tokenizer, model, device, input_ids, batch_size):
+    """Logits for pre-built input id lists, in input order."""
+    import torch
+    logits = np.zeros((len(input_ids), model.config.num_labels), dtype=np.float32)
+
+    for batch in length_sorted_batches([len(ids) for ids in input_ids], batch_size=batch_size):
+        features = {
+            "input_ids": [input_ids[j] for j in batch],
+            "attention_mask": [[1] * len(input_ids[j]) for j in batch],
+        }
+        inputs = tokenizer.pad(features, padding="longest", return_tensors="pt")
+        inputs = {k: v.to(device) for k, v in inputs.items()}
+
+        with torch.no_grad():
+            logits[batch] = model(**inputs).logits.float().cpu().numpy()
+
+    return logits
+
+
+def predict_probs(
+    tokenizer,
+    model,
+    device,
+    texts,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_tokens: int = MAX_TOKENS,
+    long_text: bool = False,
+):
+    """
+    Runs a sequence classifier over texts in length-sorted, dynamically padded batches.
+    Empty texts are skipped. Returns (indices, probs): the positions of the
+    non-empty texts and a (len(indices), num_labels) probability array.
+
+    By default texts are truncated to max_tokens. With long_text=True, texts
+    longer than that are split into overlapping windows (see configure_long_text);
+    the windows of all texts are batched together and their logits are
+    aggregated back into one row per text.
+    """
+    indices = [i for i, t in enumerate(texts) if str(t).strip()]
+    if not indices:
+        return indices, np.zeros((0, model.config.num_labels), dtype=np.float32)
+
+    batch_texts = [str(texts[i]) for i in indices]
+
+    if not long_text:
+        input_ids = tokenizer(batch_texts, truncation=True, max_length=max_tokens)["input_ids"]
+        return indices, softmax(_run_model(tokenizer, model, device, input_ids, batch_size))
+
+    window_tokens = max_tokens - tokenizer.num_special_tokens_to_add(pair=False)
+    overlap = min(_LONG_TEXT["window_overlap"], window_tokens - 1)
+
+    input_ids, owners, lengths = [], [], []
+    for owner, token_ids in enumerate(tokenizer(batch_texts, add_special_tokens=False, verbose=False)["input_ids"]):
+        for window in split_windows(token_ids, window_tokens, overlap):
+            input_ids.append(tokenizer.build_inputs_with_special_tokens(window))
+            owners.append(owner)
+            lengths.append(max(1, len(window)))
+
+    logits = _run_model(tokenizer, model, device, input_ids, batch_size)
+    return indices, aggregate_windows(logits, owners, lengths, len(indices), _LONG_TEXT["length_power"])
@@ -1,28 +1,42 @@
 import os
-import torch
-import torch.nn.functional as F
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import numpy as np
 
-# === Load local model and tokenizer ===
+from models.registry import registry
+from models.sentiment.batch_inference import DEFAULT_BATCH_SIZE, neutral_probs, predict_probs, sentiment_matrix
+
+# === Local model and tokenizer, loaded by the registry on first use ===
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "local_models", "cardiff")
-_device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+MODEL_NAME = "sentiment_cardiff"
 
-_tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-_model = AutoModelForSequenceClassification.from_pretrained(MODEL_PATH).to(_device)
+registry.register_pretrained(MODEL_NAME, MODEL_PATH, "AutoModelForSequenceClassification")
 
 # === Labels are already 'Negative', 'Neutral', 'Positive' (in that order)
 _LABELS = ["Negative", "Neutral", "Positive"]
 
+_ID_TO_SENTIMENT = np.array(_LABELS, dtype=object)
+
+_SENTIMENT_MATRIX = sentiment_matrix(_ID_TO_SENTIMENT)
+
+def predict_batch(texts, batch_size: int = DEFAULT_BATCH_SIZE, long_text: bool = False):
+    """
+    Returns (labels, sentiment_probs): one label per text and a (len(texts), 3)
+    array of probabilities summed into Negative/Neutral/Positive.
+    Empty texts are 'Neutral' with probability 1. With long_text=True texts
+    over 512 tokens are scored over overlapping windows instead of truncated.
+    """
+    labels = np.full(len(texts), "Neutral", dtype=object)
+    sentiment_probs = neutral_probs(len(texts))
+    tokenizer, model = registry.get(MODEL_NAME)
+    indices, probs = predict_probs(tokenizer, model, registry.device, texts, batch_size=batch_size, long_text=long_text)
+    if indices:
+        labels[indices] = _ID_TO_SENTIMENT[probs.argmax(axis=1)]
+        sentiment_probs[indices] = probs @ _SENTIMENT_MATRIX
+    return labels.tolist(), sentiment_probs
+
+def classify_batch(texts, batch_size: int = DEFAULT_BATCH_SIZE, long_text: bool = False) -> list[str]:
+    """Batched classify(): one label per text, 'Neutral' for empty texts."""
+    return predict_batch(texts, batch_size=batch_size, long_text=long_text)[0]
+
 def classify(text: str) -> str:
     """Returns: 'Positive', 'Negative', or 'Neutral'."""
-    if not text.strip():
-        return "Neutral"
-    
-    inputs = _tokenizer(text, return_tensors="pt", truncation=True, max_length=512, padding="max_length")
-    inputs = {k: v.to(_device) for k, v in inputs.items()}
-
-    with torch.no_grad():
-        logits = _model(**inputs).logits
-        probs = F.softmax(logits, dim=1)[0]
-        label_id = torch.argmax(probs).item()
-        return _LABELS[label_id]
+    return classify_batch([text])[0]
@@ -0,0 +1,257 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from models.sentiment import bert_emotion
+from models.sentiment import cardiff
+from models.sentiment import hartmann
+from models.sentiment.batch_inference import DEFAULT_BATCH_SIZE
+
+SENTIMENT_MODELS = {
+    "cardiff": cardiff,
+    "hartmann": hartmann,
+    "bert_emotion": bert_emotion,
+}
+DEFAULT_ORDER = ["cardiff", "hartmann", "bert_emotion"]
+
+
+def majority_vote(predictions):
+    labels = [p for p in predictions if p in ("Positive", "Neutral", "Negative")]
+    if not labels:
+        return "UNKNOWN"
+    return max(set(labels), key=labels.count)
+
+
+def measure_latency(texts, names=None, batch_size: int = DEFAULT_BATCH_SIZE, sample_size: int = 32) -> dict:
+    """Seconds per text for each model, measured on a sample after one warm-up call."""
+    names = list(names or DEFAULT_ORDER)
+    sample = [t for t in texts if str(t).strip()][:sample_size]
+    if not sample:
+        return {name: 0.0 for name in names}
+
+    latencies = {}
+    for name in names:
+        model = SENTIMENT_MODELS[name]
+        model.classify_batch(sample[:1])
+        started = time.perf_counter()
+        model.classify_batch(sample, batch_size=batch_size)
+        latencies[name] = (time.perf_counter() - started) / len(sample)
+    return latencies
+
+
+def order_by_latency(latencies: dict) -> list[str]:
+    return sorted(latencies, key=latencies.get)
+
+
+def run_ensemble(
+    texts,
+    order=None,
+    early_exit: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    long_text: bool = False,
+) -> dict:
+    """
+    Runs the three sentiment models over texts and takes the majority vote.
+
+    Models run in the given order. With early_exit=True the third model only runs
+    on texts where the first two disagree, since it cannot change the majority
+    otherwise. Returns a dict with per-model label lists (None where a model was
+    skipped), the "majority" labels, the "models_run" per text, the number of
+    "skipped" third-model calls and per-model "probs" arrays of shape
+    (len(texts), 3) in SENTIMENT_LABELS order, NaN where a model was skipped.
+    long_text is passed through to each model's predict_batch().
+    """
+    order = list(order or DEFAULT_ORDER)
+    if sorted(order) != sorted(SENTIMENT_MODELS):
+        raise ValueError(f"Model order must be a permutation of {sorted(SENTIMENT_MODELS)}, got {order}")
+
+    texts = list(texts)
+    first, second, third = order
+
+    first_labels, first_probs = SENTIMENT_MODELS[first].predict_batch(texts, batch_size=batch_size, long_text=long_text)
+    second_labels, second_probs = SENTIMENT_MODELS[second].predict_batch(texts, batch_size=batch_size, long_text=long_text)
+    pending = _third_model_subset(first_labels, second_labels, early_exit)
+
+    third_result = None
+    if pending:
+        third_result = SENTIMENT_MODELS[third].predict_batch(
+            [texts[i] for i in pending], batch_size=batch_size, long_text=long_text
+        )
+
+    return _combine(
+        order,
+        len(texts),
+        (first_labels, first_probs),
+        (second_labels, second_probs),
+        pending,
+        third_result,
+    )
+
+
+def _third_model_subset(first_labels, second_labels, early_exit: bool) -> list[int]:
+    if early_exit:
+        return [i for i, (a, b) in enumerate(zip(first_labels, second_labels)) if a != b]
+    return list(range(len(first_labels)))
+
+
+def _combine(order, n_texts, first_result, second_result, pending, third_result) -> dict:
+    first, second, third = order
+    labels = {name: [None] * n_texts for name in order}
+    probs = {name: np.full((n_texts, 3), np.nan, dtype=np.float32) for name in order}
+
+    labels[first], probs[first] = list(first_result[0]), first_result[1]
+    labels[second], probs[second] = list(second_result[0]), second_result[1]
+
+    if pending:
+        third_labels, third_probs = third_result
+        for i, label in zip(pending, third_labels):
+            labels[third][i] = label
+        probs[third][pending] = third_probs
+
+    majority = []
+    models_run = []
+    for i in range(n_texts):
+        ran = [name for name in order if labels[name][i] is not None]
+        majority.append(majority_vote([labels[name][i] for name in ran]))
+        models_run.append(ran)
+
+    return {
+        "labels": labels,
+        "majority": majority,
+        "models_run": models_run,
+        "skipped": n_texts - len(pending),
+        "probs": probs,
+    }
+
+
+class ParallelEnsembleRunner:
+    """
+    Runs the sentiment models concurrently, one worker thread per model.
+
+    Each model owns a single-thread executor, so a model (and its tokenizer) is
+    never used by two threads at once while different models overlap. Batches
+    keep the early-exit logic of run_ensemble: the third model is queued for a
+    batch as soon as the first two have finished it. At most max_pending
+    batches are in flight, and results come back in submission order.
+    """
+
+    def __init__(
+        self,
+        order=None,
+        early_exit: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        threads_per_model: int | None = None,
+        max_pending: int = 4,
+        long_text: bool = False,
+    ):
+        self.order = list(order or DEFAULT_ORDER)
+        if sorted(self.order) != sorted(SENTIMENT_MODELS):
+            raise ValueError(f"Model order must be a permutation of {sorted(SENTIMENT_MODELS)}, got {self.order}")
+
+        self.early_exit = early_exit
+        self.batch_size = batch_size
+        self.long_text = long_text
+        self.max_pending = max(1, int(max_pending))
+        self.busy_seconds = {name: 0.0 for name in self.order}
+        self.wall_seconds = 0.0
+
+        self._lock = threading.Lock()
+        self._executors = {
+            name: ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix=f"sentiment-{name}",
+                initializer=self._init_worker,
+                initargs=(threads_per_model,),
+            )
+            for name in self.order
+        }
+
+    @staticmethod
+    def _init_worker(threads_per_model):
+        # Best effort: with OpenMP builds the intra-op thread count is per calling thread
+        if threads_per_model:
+            import torch
+            torch.set_num_threads(int(threads_per_model))
+
+    def _predict(self, name, texts):
+        started = time.perf_counter()
+        try:
+            return SENTIMENT_MODELS[name].predict_batch(texts, batch_size=self.batch_size, long_text=self.long_text)
+        finally:
+            with self._lock:
+                self.busy_seconds[name] += time.perf_counter() - started
+
+    def _submit_batch(self, texts) -> Future:
+        first, second, third = self.order
+        done = Future()
+        first_future = self._executors[first].submit(self._predict, first, texts)
+        second_future = self._executors[second].submit(self._predict, second, texts)
+        remaining = [2]
+
+        def finish(pending, third_result):
+            done.set_result(_combine(
+                self.order,
+                len(texts),
+                first_future.result(),
+                second_future.result(),
+                pending,
+                third_result,
+            ))
+
+        def after_pair(_):
+            with self._lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            try:
+                pending = _third_model_subset(first_future.result()[0], second_future.result()[0], self.early_exit)
+                if not pending:
+                    finish(pending, None)
+                    return
+
+                third_future = self._executors[third].submit(self._predict, third, [texts[i] for i in pending])
+
+                def after_third(future):
+                    try:
+                        finish(pending, future.result())
+                    except Exception as e:
+                        done.set_exception(e)
+
+                third_future.add_done_callback(after_third)
+            except Exception as e:
+                done.set_exception(e)
+
+        first_future.add_done_callback(after_pair)
+        second_future.add_done_callback(after_pair)
+        return done
+
+    def run(self, batches):
+        """Yields one run_ensemble-style result per batch of texts, in input order."""
+        started = time.perf_counter()
+        in_flight = deque()
+        try:
+            for texts in batches:
+                in_flight.append(self._submit_batch(list(texts)))
+                if len(in_flight) >= self.max_pending:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+        finally:
+            self.wall_seconds += time.perf_counter() - started
+
+    def report(self) -> dict:
+        """Per-model busy time and utilization relative to the wall time of run()."""
+        wall = self.wall_seconds
+        return {
+            "wall_seconds": wall,
+            "busy_seconds": dict(self.busy_seconds),
+            "utilization": {name: (busy / wall if wall else 0.0) for name, busy in self.busy_seconds.items()},
+            "slowest_model": max(self.busy_seconds, key=self.busy_seconds.get),
+        }
+
+    def close(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown(wait=True)
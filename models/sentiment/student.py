@@ -0,0 +1,57 @@
+import os
+import numpy as np
+
+from models.embedding import sentence_encoder
+from models.sentiment.batch_inference import DEFAULT_BATCH_SIZE, neutral_probs
+from models.sentiment.student_head import HEAD_PATH, load_head, predict_head
+from models.sentiment.vote_policies import SENTIMENT_LABELS
+
+# === Distilled student: sentence embeddings + softmax head trained on the ensemble ===
+MODEL_PATH = str(HEAD_PATH)
+
+_head = None
+
+
+def _load_head():
+    """Loads the head on first use, so importing this module never touches the file."""
+    global _head
+    if _head is None:
+        if not os.path.exists(MODEL_PATH):
+            raise FileNotFoundError(
+                f"Missing sentiment student head: {MODEL_PATH}. Run tools/train_sentiment_student.py first."
+            )
+        head = load_head(MODEL_PATH)
+        if head["encoder_id"] != sentence_encoder.MODEL_ID:
+            raise ValueError(
+                f"Student head was trained on '{head['encoder_id']}' embeddings, "
+                f"but the local encoder is '{sentence_encoder.MODEL_ID}'. Retrain the student."
+            )
+        _head = head
+    return _head
+
+_ID_TO_SENTIMENT = np.array(SENTIMENT_LABELS, dtype=object)
+
+def predict_batch(texts, batch_size: int = DEFAULT_BATCH_SIZE, long_text: bool = False):
+    """
+    Returns (labels, sentiment_probs) like the ensemble models.
+    Empty texts are 'Neutral' with probability 1. long_text is accepted for
+    interface compatibility; the sentence encoder truncates long texts.
+    """
+    labels = np.full(len(texts), "Neutral", dtype=object)
+    sentiment_probs = neutral_probs(len(texts))
+    indices = [i for i, t in enumerate(texts) if str(t).strip()]
+    if indices:
+        head = _load_head()
+        embeddings = sentence_encoder.encode([str(texts[i]) for i in indices], batch_size=batch_size)
+        probs = predict_head(head["weights"], head["bias"], embeddings)
+        labels[indices] = _ID_TO_SENTIMENT[probs.argmax(axis=1)]
+        sentiment_probs[indices] = probs
+    return labels.tolist(), sentiment_probs
+
+def classify_batch(texts, batch_size: int = DEFAULT_BATCH_SIZE, long_text: bool = False) -> list[str]:
+    """Batched classify(): one label per text, 'Neutral' for empty texts."""
+    return predict_batch(texts, batch_size=batch_size, long_text=long_text)[0]
+
+def classify(text: str) -> str:
+    """Returns: 'Positive', 'Negative', or 'Neutral'."""
+    return classify_batch([text])[0]
@@ -0,0 +1,116 @@
+from pathlib import Path
+
+import numpy as np
+
+from models.sentiment.vote_policies import SENTIMENT_LABELS
+
+HEAD_PATH = Path(__file__).resolve().parent / "local_models" / "student" / "student_head.npz"
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def train_head(
+    features: np.ndarray,
+    targets: np.ndarray,
+    epochs: int = 500,
+    learning_rate: float = 0.5,
+    l2: float = 1e-4,
+    momentum: float = 0.9,
+    sample_weights=None,
+):
+    """
+    Fits a softmax-regression head on fixed features.
+    targets are (n, num_classes) probability rows, so both hard one-hot
+    labels and soft ensemble probabilities work. Trained with full-batch
+    gradient descent with momentum. Returns (weights, bias).
+    """
+    features = np.asarray(features, dtype=np.float64)
+    targets = np.asarray(targets, dtype=np.float64)
+    n, dim = features.shape
+    num_classes = targets.shape[1]
+
+    if sample_weights is None:
+        sample_weights = np.ones(n)
+    sample_weights = np.asarray(sample_weights, dtype=np.float64)
+    sample_weights = sample_weights / sample_weights.sum()
+
+    weights = np.zeros((dim, num_classes))
+    bias = np.zeros(num_classes)
+    velocity_w = np.zeros_like(weights)
+    velocity_b = np.zeros_like(bias)
+
+    for _ in range(epochs):
+        error = (_softmax(features @ weights + bias) - targets) * sample_weights[:, None]
+        grad_w = features.T @ error + l2 * weights
+        grad_b = error.sum(axis=0)
+
+        velocity_w = momentum * velocity_w - learning_rate * grad_w
+        velocity_b = momentum * velocity_b - learning_rate * grad_b
+        weights += velocity_w
+        bias += velocity_b
+
+    return weights.astype(np.float32), bias.astype(np.float32)
+
+
+def predict_head(weights: np.ndarray, bias: np.ndarray, features: np.ndarray) -> np.ndarray:
+    """(n, num_classes) class probabilities."""
+    return _softmax(np.asarray(features, dtype=np.float32) @ weights + bias).astype(np.float32)
+
+
+def save_head(path: str | Path, weights: np.ndarray, bias: np.ndarray, encoder_id: str) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(
+        path,
+        weights=weights,
+        bias=bias,
+        labels=np.asarray(SENTIMENT_LABELS),
+        encoder_id=np.asarray(encoder_id),
+    )
+
+
+def load_head(path: str | Path) -> dict:
+    """Returns {"weights", "bias", "labels", "encoder_id"} from a head saved by save_head."""
+    with np.load(Path(path)) as data:
+        head = {
+            "weights": data["weights"],
+            "bias": data["bias"],
+            "labels": data["labels"].tolist(),
+            "encoder_id": str(data["encoder_id"]),
+        }
+
+    if head["labels"] != SENTIMENT_LABELS:
+        raise ValueError(f"Student head labels {head['labels']} do not match {SENTIMENT_LABELS}")
+    return head
+
+
+def agreement_report(student_labels, ensemble_labels) -> dict:
+    """
+    Compares student labels with the ensemble labels they were trained on.
+    Returns overall agreement, per-label agreement (recall of each ensemble
+    label) and a confusion matrix with ensemble labels as rows.
+    """
+    index = {label: i for i, label in enumerate(SENTIMENT_LABELS)}
+    confusion = np.zeros((len(SENTIMENT_LABELS), len(SENTIMENT_LABELS)), dtype=np.int64)
+    for student, reference in zip(student_labels, ensemble_labels):
+        if student in index and reference in index:
+            confusion[index[reference], index[student]] += 1
+
+    total = int(confusion.sum())
+    support = confusion.sum(axis=1)
+    return {
+        "n": total,
+        "agreement": float(np.trace(confusion) / total) if total else 0.0,
+        "per_label": {
+            label: {
+                "support": int(support[i]),
+                "agreement": float(confusion[i, i] / support[i]) if support[i] else 0.0,
+            }
+            for i, label in enumerate(SENTIMENT_LABELS)
+        },
+        "confusion": confusion.tolist(),
+    }
@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import numpy as np
+
+# Column order of the per-model sentiment probability vectors
+SENTIMENT_LABELS = ["Negative", "Neutral", "Positive"]
+
+POLICIES = ["majority", "mean", "weighted", "max_confidence"]
+
+
+def label_ids(labels) -> np.ndarray:
+    """Maps sentiment label strings to SENTIMENT_LABELS indices, -1 for missing labels."""
+    lookup = {label: i for i, label in enumerate(SENTIMENT_LABELS)}
+    return np.asarray([lookup.get(label, -1) for label in labels], dtype=np.int8)
+
+
+def save_probabilities(path: str | Path, ids, model_names, probs, votes) -> None:
+    """
+    Writes the ensemble probability sidecar. ids are record keys ("type:id"),
+    as posts and comments have separate id spaces.
+    probs has shape (len(model_names), len(ids), 3); rows of models that were
+    skipped for an item are NaN. votes holds each model's own label as a
+    SENTIMENT_LABELS index (-1 when skipped), shape (len(model_names), len(ids)).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        path,
+        ids=np.asarray([str(i) for i in ids]),
+        models=np.asarray(list(model_names)),
+        labels=np.asarray(SENTIMENT_LABELS),
+        probs=np.asarray(probs, dtype=np.float32),
+        votes=np.asarray(votes, dtype=np.int8),
+    )
+
+
+def load_probabilities(path: str | Path):
+    """Returns (ids, model_names, probs, votes) from a sidecar written by save_probabilities."""
+    with np.load(Path(path)) as data:
+        return data["ids"].tolist(), data["models"].tolist(), data["probs"], data["votes"]
+
+
+def _labels_from_ids(ids: np.ndarray, known: np.ndarray) -> list[str]:
+    labels = np.asarray(SENTIMENT_LABELS, dtype=object)[ids]
+    labels[~known] = "UNKNOWN"
+    return labels.tolist()
+
+
+def majority(probs: np.ndarray, votes: np.ndarray) -> list[str]:
+    """
+    Majority over each model's own label (votes).
+    Ties (all models disagree) go to the tied label with the highest summed
+    probability, where majority_vote() in the ensemble picks arbitrarily.
+    """
+    present = votes >= 0
+    counts = np.zeros(probs.shape[1:], dtype=np.float64)
+    for m in range(votes.shape[0]):
+        np.add.at(counts, (np.flatnonzero(present[m]), votes[m][present[m]]), 1.0)
+
+    mass = np.nansum(probs, axis=0)
+    is_max = counts == counts.max(axis=1, keepdims=True)
+    winner = np.where(is_max, mass, -np.inf).argmax(axis=1)
+    return _labels_from_ids(winner, present.any(axis=0))
+
+
+def weighted(probs: np.ndarray, weights) -> list[str]:
+    """Argmax of the weighted mean probability over the models that ran."""
+    weights = np.asarray(weights, dtype=np.float64).reshape(-1, 1, 1)
+    present = ~np.isnan(probs)
+    total = np.sum(np.where(present, probs * weights, 0.0), axis=0)
+    norm = np.sum(np.where(present, weights, 0.0), axis=0)
+    known = (norm > 0).any(axis=1)
+    mean = np.divide(total, norm, out=np.zeros_like(total), where=norm > 0)
+    return _labels_from_ids(mean.argmax(axis=1), known)
+
+
+def mean(probs: np.ndarray) -> list[str]:
+    return weighted(probs, np.ones(probs.shape[0]))
+
+
+def max_confidence(probs: np.ndarray) -> list[str]:
+    """Label of the single most confident model per item."""
+    present = ~np.isnan(probs).any(axis=2)
+    confidence = np.where(present, np.nan_to_num(probs).max(axis=2), -np.inf)
+    best_model = confidence.argmax(axis=0)
+    items = np.arange(probs.shape[1])
+    winner = np.nan_to_num(probs)[best_model, items].argmax(axis=1)
+    return _labels_from_ids(winner, present.any(axis=0))
+
+
+def apply_policy(policy: str, probs: np.ndarray, votes: np.ndarray, weights=None) -> list[str]:
+    if policy == "majority":
+        return majority(probs, votes)
+    if policy == "mean":
+        return mean(probs)
+    if policy == "weighted":
+        if weights is None:
+            raise ValueError("The weighted policy needs one weight per model")
+        return weighted(probs, weights)
+    if policy == "max_confidence":
+        return max_confidence(probs)
+    raise ValueError(f"Unknown vote policy '{policy}', expected one of {POLICIES}")
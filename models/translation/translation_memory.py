@@ -0,0 +1,125 @@
+import hashlib
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+DEFAULT_MAX_ENTRIES = 200_000
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sentence(text: str) -> str:
+    return _WHITESPACE.sub(" ", str(text)).strip()
+
+
+def sentence_key(text: str) -> str:
+    return hashlib.sha1(normalize_sentence(text).encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """
+    On-disk translation cache keyed by (model id, source language, sentence hash).
+    Sentences are whitespace-normalized before hashing. When the store grows past
+    max_entries the least recently used rows are evicted.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max(1, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                model_id TEXT NOT NULL,
+                src_lang TEXT NOT NULL,
+                sentence_hash TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model_id, src_lang, sentence_hash)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used)")
+        self._conn.commit()
+
+    def get_many(self, model_id: str, src_lang: str, sentences) -> dict:
+        """Returns {sentence: translation} for every sentence found in the memory."""
+        keys = {}
+        for sentence in sentences:
+            keys.setdefault(sentence_key(sentence), []).append(sentence)
+
+        found = {}
+        hashes = list(keys)
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT sentence_hash, translation FROM translations "
+                f"WHERE model_id = ? AND src_lang = ? AND sentence_hash IN ({placeholders})",
+                [model_id, src_lang, *chunk],
+            ).fetchall()
+            for sentence_hash, translation in rows:
+                found[sentence_hash] = translation
+
+        if found:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE translations SET last_used = ? WHERE model_id = ? AND src_lang = ? AND sentence_hash = ?",
+                [(now, model_id, src_lang, h) for h in found],
+            )
+            self._conn.commit()
+
+        result = {}
+        for sentence_hash, group in keys.items():
+            if sentence_hash in found:
+                self.hits += len(group)
+                for sentence in group:
+                    result[sentence] = found[sentence_hash]
+            else:
+                self.misses += len(group)
+        return result
+
+    def put_many(self, model_id: str, src_lang: str, pairs) -> None:
+        """Stores (sentence, translation) pairs and evicts old rows if needed."""
+        now = time.time()
+        rows = [(model_id, src_lang, sentence_key(s), t, now) for s, t in pairs]
+        if not rows:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO translations (model_id, src_lang, sentence_hash, translation, last_used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        self._evict()
+        self._conn.commit()
+
+    def _evict(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM translations WHERE rowid IN "
+                "(SELECT rowid FROM translations ORDER BY last_used ASC, rowid ASC LIMIT ?)",
+                (excess,),
+            )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def close(self) -> None:
+        self._conn.close()
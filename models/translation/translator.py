@@ -1,41 +1,263 @@
-from transformers import MarianTokenizer, MarianMTModel
-import torch
 import os
+import re
+
+from models.batching import length_sorted_batches
+from models.registry import load_pretrained, registry
 
 SUPPORTED_LANGUAGES = ["de", "fr", "it"]
 
+# Hub ids of the local models, used to key the translation memory
+MODEL_IDS = {
+    "de": "Helsinki-NLP/opus-mt-de-en",
+    "fr": "Helsinki-NLP/opus-mt-fr-en",
+    "it": "Helsinki-NLP/opus-mt-it-en",
+}
+
+# Mini-batch limits for translate_batch; tune these for throughput
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_MAX_BATCH_TOKENS = 4096
+MAX_INPUT_TOKENS = 512
+
+# Long posts are split into sentence chunks of at most this many tokens
+DEFAULT_CHUNK_TOKENS = 256
+
+# Bumped whenever split_into_chunks cuts texts differently, so stored translations are redone
+CHUNKING_VERSION = 2
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?…])\s+")
+
 def _resolve_path(relative_path):
     base = os.path.dirname(__file__)
     full_path = os.path.abspath(os.path.join(base, relative_path))
     return full_path.replace("\\", "/")  # Normalize for Hugging Face
 
-# Load models into memory
-_models = {}
+def model_name(lang):
+    """Registry name of the translation model for a source language."""
+    return f"translation_{lang}_to_en"
+
+def _make_loader(model_path):
+    def load(device):
+        if not os.path.isdir(model_path):
+            raise FileNotFoundError(f"❌ Translation model not found at {model_path}")
+        return load_pretrained(model_path, "MarianMTModel", "MarianTokenizer", device, local_files_only=True)
+    return load
+
+# Models are loaded by the registry the first time a language is translated
 for lang in SUPPORTED_LANGUAGES:
-    model_path = _resolve_path(f"local_models/{lang}_to_en")
-    if not os.path.isdir(model_path):
-        raise FileNotFoundError(f"❌ Translation model not found at {model_path}")
-    tokenizer = MarianTokenizer.from_pretrained(model_path, local_files_only=True)
-    model = MarianMTModel.from_pretrained(model_path, local_files_only=True)
-    _models[lang] = (tokenizer, model)
+    _path = _resolve_path(f"local_models/{lang}_to_en")
+    registry.register(model_name(lang), _make_loader(_path), path=_path)
+
+def _model_for(src_lang):
+    """(tokenizer, model) for a source language, loaded on first use."""
+    if src_lang not in SUPPORTED_LANGUAGES:
+        raise KeyError(src_lang)
+    return registry.get(model_name(src_lang))
+
+_memory = None
+
+# Tokenizers loaded without their models, for split_into_chunks
+_TOKENIZERS = {}
+
+def set_translation_memory(memory):
+    """Sets the TranslationMemory used by translate_batch (None disables it)."""
+    global _memory
+    _memory = memory
+
+def get_translation_memory():
+    return _memory
+
+def _memory_model_id(src_lang):
+    """Hub id plus registry version, so a swapped or re-packed model never reads the old model's translations."""
+    return f"{MODEL_IDS[src_lang]}@{registry.version(model_name(src_lang))}"
+
+def _translate_group(texts, src_lang, batch_size, max_batch_tokens):
+    # Identical chunks (quotes, boilerplate, cross-posts) are decoded once
+    unique = list(dict.fromkeys(texts))
+
+    cached = {}
+    if _memory is not None:
+        cached = _memory.get_many(_memory_model_id(src_lang), src_lang, unique)
+
+    missing = [t for t in unique if t not in cached]
+    if missing:
+        generated = _generate(missing, src_lang, batch_size, max_batch_tokens)
+        if _memory is not None:
+            _memory.put_many(_memory_model_id(src_lang), src_lang, zip(missing, generated))
+        cached.update(zip(missing, generated))
+
+    return [cached[t] for t in texts]
+
+def _generate(texts, src_lang, batch_size, max_batch_tokens):
+    import torch
+    tokenizer, model = _model_for(src_lang)
+    encoded = tokenizer(texts, truncation=True, max_length=MAX_INPUT_TOKENS)
+    input_ids = encoded["input_ids"]
+    attention_mask = encoded["attention_mask"]
+
+    outputs = [None] * len(texts)
+    batches = length_sorted_batches(
+        [len(ids) for ids in input_ids],
+        batch_size=batch_size,
+        max_batch_tokens=max_batch_tokens,
+    )
+
+    for batch in batches:
+        features = {
+            "input_ids": [input_ids[j] for j in batch],
+            "attention_mask": [attention_mask[j] for j in batch],
+        }
+        inputs = tokenizer.pad(features, padding="longest", return_tensors="pt")
+        inputs = {k: v.to(registry.device) for k, v in inputs.items()}
+
+        with torch.no_grad():
+            translated = model.generate(**inputs, max_length=512)
+        decoded = tokenizer.batch_decode(translated, skip_special_tokens=True)
+
+        for j, text in zip(batch, decoded):
+            outputs[j] = text
+
+    return outputs
+
+def _tokenizer_for(src_lang):
+    """
+    Tokenizer of a language's model, loaded on its own: split_into_chunks only
+    measures lengths, so it must not load the model weights.
+    """
+    if src_lang not in _TOKENIZERS:
+        from transformers import MarianTokenizer
+
+        _TOKENIZERS[src_lang] = MarianTokenizer.from_pretrained(registry.path(model_name(src_lang)), local_files_only=True)
+    return _TOKENIZERS[src_lang]
+
+def _token_lengths(tokenizer, texts):
+    return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+def _split_long_sentence(sentence, tokenizer, max_tokens):
+    words = sentence.split()
+    word_lengths = _token_lengths(tokenizer, words)
+
+    pieces = []
+    current = []
+    current_len = 0
+    for word, length in zip(words, word_lengths):
+        if current and current_len + length > max_tokens:
+            pieces.append(" ".join(current))
+            current = []
+            current_len = 0
+        current.append(word)
+        current_len += length
+
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+def _pack_sentences(sentences, tokenizer, max_tokens):
+    """Greedily joins adjacent sentences into chunks of at most max_tokens tokens."""
+    chunks = []
+    current = []
+    current_len = 0
+    for sentence, length in zip(sentences, _token_lengths(tokenizer, sentences)):
+        if length > max_tokens:
+            if current:
+                chunks.append(" ".join(current))
+                current, current_len = [], 0
+            chunks.extend(_split_long_sentence(sentence, tokenizer, max_tokens))
+            continue
+        if current and current_len + length > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_len = [], 0
+        current.append(sentence)
+        current_len += length
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def split_into_chunks(text, src_lang, max_tokens: int = DEFAULT_CHUNK_TOKENS):
+    """
+    Splits text into chunks that fit the model window.
+    Returns a list of paragraphs, each a list of chunk strings. A text of at
+    most max_tokens tokens is kept whole, as is every paragraph that fits.
+    Longer paragraphs are cut at sentence ends and adjacent sentences are
+    packed back together up to max_tokens; only a sentence longer than
+    max_tokens on its own is split further on word boundaries.
+    """
+    tokenizer = _tokenizer_for(src_lang)
+    text = str(text).strip()
+    if _token_lengths(tokenizer, [text])[0] <= max_tokens:
+        return [[text]] if text else []
+
+    paragraphs = []
+    for paragraph in text.split("\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if _token_lengths(tokenizer, [paragraph])[0] <= max_tokens:
+            paragraphs.append([paragraph])
+            continue
+        sentences = [s.strip() for s in _SENTENCE_SPLIT.split(paragraph) if s.strip()]
+        paragraphs.append(_pack_sentences(sentences, tokenizer, max_tokens))
 
-_device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-for _, (_, model) in _models.items():
-    model.to(_device)
+    return paragraphs
+
+def translate_batch(items, batch_size: int = DEFAULT_BATCH_SIZE, max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+                    split_sentences: bool = True, chunk_tokens: int = DEFAULT_CHUNK_TOKENS):
+    """
+    Translates a list of (text, src_lang) pairs to English.
+    Inputs are grouped by source language, sorted by token length and decoded in
+    padded mini-batches of at most batch_size texts and max_batch_tokens padded
+    tokens. Returns the translations in input order; English or unsupported
+    languages are returned unchanged.
+
+    With split_sentences=True texts longer than chunk_tokens tokens are cut into
+    chunks of whole adjacent sentences of at most chunk_tokens tokens (see
+    split_into_chunks); shorter texts are translated whole. Chunks from all
+    texts share the batch queue and are stitched back per text, so long posts
+    are translated in full instead of being truncated at the model maximum.
+    """
+    items = list(items)
+    results = [text for text, _ in items]
+
+    groups = {}
+    for i, (text, src_lang) in enumerate(items):
+        if src_lang in SUPPORTED_LANGUAGES and str(text).strip():
+            groups.setdefault(src_lang, []).append(i)
+
+    for src_lang, indices in groups.items():
+        if not split_sentences:
+            translated = _translate_group(
+                [items[i][0] for i in indices],
+                src_lang,
+                batch_size=batch_size,
+                max_batch_tokens=max_batch_tokens,
+            )
+            for i, text in zip(indices, translated):
+                results[i] = text
+            continue
+
+        layouts = {}
+        chunks = []
+        for i in indices:
+            paragraphs = split_into_chunks(items[i][0], src_lang, max_tokens=chunk_tokens)
+            layouts[i] = [len(p) for p in paragraphs]
+            for paragraph in paragraphs:
+                chunks.extend(paragraph)
+
+        translated = _translate_group(chunks, src_lang, batch_size=batch_size, max_batch_tokens=max_batch_tokens)
+
+        pos = 0
+        for i in indices:
+            paragraphs = []
+            for size in layouts[i]:
+                paragraphs.append(" ".join(translated[pos:pos + size]))
+                pos += size
+            results[i] = "\n".join(paragraphs)
+
+    return results
 
 def translate(text: str, src_lang: str) -> str:
     """
     Translates input text from src_lang ('de', 'fr', 'it') to English.
     If text is already in English or unsupported lang, returns input.
     """
-    if src_lang not in SUPPORTED_LANGUAGES:
-        return text  # Skip if English or unsupported
-
-    tokenizer, model = _models[src_lang]
-    inputs = tokenizer([text], return_tensors="pt", padding=True, truncation=True)
-    inputs = {k: v.to(_device) for k, v in inputs.items()}
-
-    with torch.no_grad():
-        translated = model.generate(**inputs, max_length=512)
-    output = tokenizer.decode(translated[0], skip_special_tokens=True)
-    return output
+    return translate_batch([(text, src_lang)])[0]
@@ -1,86 +1,390 @@
 import argparse
-import json
 import sys
 from pathlib import Path
 
-import pandas as pd
+import numpy as np
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from models.sentiment import bert_emotion
-from models.sentiment import cardiff
-from models.sentiment import hartmann
+from models.registry import log_memory_report, registry
+from models.sentiment import ensemble
+from models.sentiment.batch_inference import DEFAULT_LENGTH_POWER, DEFAULT_WINDOW_OVERLAP, configure_long_text
+from models.sentiment.student_head import HEAD_PATH
+from models.sentiment.vote_policies import label_ids, save_probabilities
+from pipelines.checkpoint import iter_checkpoint, open_checkpoint, record_key
+from pipelines.jsonl_io import find_records, read_records
+from pipelines.manifest import ResultManifest, manifest_path
+from pipelines.provenance import FieldSource, file_version, model_versions
+from pipelines.table_io import PARTITION_CHOICES, TABLE_FORMATS, table_format_error, write_table
 
 
-def majority_vote(predictions):
-    labels = [p for p in predictions if p in ("Positive", "Neutral", "Negative")]
-    if not labels:
-        return "UNKNOWN"
-    return max(set(labels), key=labels.count)
+def resolve_model_order(value, texts, batch_size):
+    if value == "auto":
+        latencies = ensemble.measure_latency(texts, batch_size=batch_size)
+        order = ensemble.order_by_latency(latencies)
+        timings = ", ".join(f"{name} {latencies[name] * 1000:.1f} ms/text" for name in order)
+        print(f"[Sentiment] Measured latency: {timings}", flush=True)
+        return order
+    return [name.strip() for name in value.split(",") if name.strip()]
 
 
-def main():
+def run_ensemble_batches(texts, order, args, batch_size):
+    """Yields (start, run_ensemble result) per batch, serially or with the parallel runner."""
+    early_exit = not args.no_early_exit
+    starts = range(0, len(texts), batch_size)
+
+    if not args.parallel:
+        for start in starts:
+            yield start, ensemble.run_ensemble(
+                texts[start:start + batch_size],
+                order=order,
+                early_exit=early_exit,
+                batch_size=batch_size,
+                long_text=args.long_text,
+            )
+        return
+
+    runner = ensemble.ParallelEnsembleRunner(
+        order=order,
+        early_exit=early_exit,
+        batch_size=batch_size,
+        threads_per_model=args.threads_per_model,
+        max_pending=args.max_pending,
+        long_text=args.long_text,
+    )
+    try:
+        yield from zip(starts, runner.run(texts[start:start + batch_size] for start in starts))
+    finally:
+        runner.close()
+
+    report = runner.report()
+    busy = ", ".join(
+        f"{name} {report['busy_seconds'][name]:.1f}s ({report['utilization'][name]:.0%})" for name in order
+    )
+    print(f"[Sentiment] Parallel run took {report['wall_seconds']:.1f}s; model busy time: {busy}", flush=True)
+    print(f"[Sentiment] Slowest model: {report['slowest_model']}", flush=True)
+
+
+def checkpoint_item(post, row, arrays):
+    """What the checkpoint keeps of a finished post: its labels and each model's probabilities and vote."""
+    return {
+        "type": post.get("type", ""),
+        "id": post.get("id", ""),
+        "fields": {key: value for key, value in post.items() if key.startswith("sentiment_")},
+        "models": {
+            name: [*probs[row].tolist(), int(votes[row])]
+            for name, (probs, votes) in arrays.items()
+            if votes[row] >= 0
+        },
+    }
+
+
+def restore_results(items, labeled_posts, model_arrays):
+    """Puts checkpointed or stored labels and probabilities back on labeled_posts; returns the restored rows."""
+    rows = {record_key(post): row for row, post in enumerate(labeled_posts)}
+    restored = set()
+    for item in items:
+        row = rows.get(record_key(item))
+        if row is None:
+            continue
+        labeled_posts[row].update(item["fields"])
+        for name, values in item["models"].items():
+            probs, votes = model_arrays(name)
+            probs[row] = values[:3]
+            votes[row] = values[3]
+        restored.add(row)
+    return restored
+
+
+def sentiment_source(sentiment_mode, settings):
+    """
+    FieldSource of the sentiment labels: the models the mode runs and the
+    stage settings. The labels of a post are one group, since the majority,
+    the early exit and the student fallback tie the models' outputs together.
+    """
+    models = {}
+    if sentiment_mode != "student":
+        models.update(model_versions(model.MODEL_NAME for model in ensemble.SENTIMENT_MODELS.values()))
+    if sentiment_mode != "ensemble":
+        from models.embedding import sentence_encoder
+
+        models["student"] = file_version(HEAD_PATH)
+        models.update(model_versions([sentence_encoder.MODEL_NAME]))
+    return FieldSource(["sentiment"], models, settings)
+
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--input-dir", required=True)
     parser.add_argument("--output-dir", required=True)
-    args = parser.parse_args()
+    parser.add_argument("--batch-size", type=int, default=64, help="Posts classified per batch")
+    parser.add_argument("--sentiment-mode", choices=["ensemble", "student", "student-fallback"], default="ensemble",
+                        help="Three-model ensemble, distilled student only, or student with ensemble fallback "
+                             "for low-confidence posts")
+    parser.add_argument("--student-confidence", type=float, default=0.8,
+                        help="With student-fallback, posts whose top student probability is below this use the ensemble")
+    parser.add_argument("--model-order", default="auto",
+                        help="Comma-separated model run order, or 'auto' to order by measured latency")
+    parser.add_argument("--no-early-exit", action="store_true",
+                        help="Always run all three models instead of skipping the third when the first two agree")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Run the three models concurrently, one worker thread per model")
+    parser.add_argument("--threads-per-model", type=int, default=None,
+                        help="Torch intra-op threads per model worker with --parallel (default: torch default)")
+    parser.add_argument("--max-pending", type=int, default=4,
+                        help="Batches in flight at once with --parallel")
+    parser.add_argument("--model-memory-mb", type=float, default=None,
+                        help="Keep resident models under this many MiB, evicting the least recently used "
+                             "(default: $MODEL_MEMORY_BUDGET_MB or unlimited)")
+    parser.add_argument("--long-text", action="store_true",
+                        help="Score posts over 512 tokens over overlapping windows instead of truncating them")
+    parser.add_argument("--window-overlap", type=int, default=DEFAULT_WINDOW_OVERLAP,
+                        help="Tokens shared by neighbouring windows with --long-text")
+    parser.add_argument("--window-length-power", type=float, default=DEFAULT_LENGTH_POWER,
+                        help="Weight window logits by length**power with --long-text (0 = uniform)")
+    parser.add_argument("--output-format", choices=TABLE_FORMATS, default="csv",
+                        help="Write sentiment_posts as CSV or as Parquet with dictionary-encoded labels")
+    parser.add_argument("--partition-by", choices=PARTITION_CHOICES, default="none",
+                        help="With --output-format parquet, split the table by subreddit or by month of created_utc")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the checkpoint of an interrupted run, skipping posts already labeled")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                        help="Do not write checkpoints while labeling")
+    parser.add_argument("--no-manifest", action="store_true",
+                        help="Label every post again instead of reusing earlier labels for unchanged posts")
+    args = parser.parse_args(argv)
 
-    output_dir = Path(args.output_dir).resolve()
+    error = table_format_error(args.output_format)
+    if error:
+        parser.error(error)
+    if args.partition_by != "none" and args.output_format != "parquet":
+        parser.error("--partition-by needs --output-format parquet")
 
-    input_path = output_dir / "preprocessed" / "processed_posts.json"
-    output_path = output_dir / "preprocessed" / "sentiment_posts.csv"
+    if args.model_order != "auto":
+        names = [name.strip() for name in args.model_order.split(",") if name.strip()]
+        if sorted(names) != sorted(ensemble.SENTIMENT_MODELS):
+            parser.error(f"--model-order must list each of {', '.join(ensemble.DEFAULT_ORDER)} once")
+
+    if args.window_overlap < 0:
+        parser.error("--window-overlap must be >= 0")
+    if args.sentiment_mode != "ensemble" and not HEAD_PATH.exists():
+        parser.error(f"--sentiment-mode {args.sentiment_mode} needs the student head at {HEAD_PATH}; "
+                     "run tools/train_sentiment_student.py first")
+    return args
 
-    if not input_path.exists():
-        print(f"[Sentiment] No processed data found at {input_path}", flush=True)
-        print("[Sentiment] Run process_reddit_posts.py first.", flush=True)
-        return
 
-    with open(input_path, "r", encoding="utf-8") as f:
-        posts = json.load(f)
+def run(args, posts=None, write_output: bool = True):
+    """
+    Runs the sentiment stage. posts are the processed items, streamed from
+    processed_posts.jsonl (or a legacy processed_posts.json) when None; only
+    the study-related items with text are kept in memory. Returns those
+    labeled posts (None when there is no input) and writes sentiment_posts
+    in --output-format unless write_output=False. The probability sidecar is
+    always written.
+    """
+    if args.model_memory_mb is not None:
+        registry.set_memory_budget(args.model_memory_mb)
 
-    total_posts = len(posts)
-    print(f"[Sentiment] Running sentiment analysis for {total_posts} items...", flush=True)
+    configure_long_text(window_overlap=args.window_overlap, length_power=args.window_length_power)
 
+    output_dir = Path(args.output_dir).resolve()
+
+    input_path = find_records(output_dir / "preprocessed", "processed_posts")
+    probs_path = output_dir / "preprocessed" / "sentiment_probs.npz"
+
+    if posts is None:
+        if input_path is None:
+            print(f"[Sentiment] No processed data found in {output_dir / 'preprocessed'}", flush=True)
+            print("[Sentiment] Run process_reddit_posts.py first.", flush=True)
+            return None
+        posts = read_records(input_path)
+
+    print("[Sentiment] Running sentiment analysis...", flush=True)
+
+    total_posts = 0
     labeled_posts = []
-    progress_every = 50 if total_posts >= 200 else 10
+    for post in posts:
+        total_posts += 1
+        if post.get("is_about_study", False) and str(post.get("translated_text", "")).strip():
+            labeled_posts.append(post)
+    print(f"[Sentiment] Kept {len(labeled_posts)}/{total_posts} study-related items with text", flush=True)
 
-    for i, post in enumerate(posts, start=1):
-        if not post.get("is_about_study", False):
-            if i % progress_every == 0 or i == total_posts:
-                print(f"[Sentiment] Checked {i}/{total_posts}", flush=True)
-            continue
+    batch_size = max(1, args.batch_size)
+    all_texts = [str(post.get("translated_text", "")).strip() for post in labeled_posts]
+    n_posts = len(labeled_posts)
 
-        text = str(post.get("translated_text", "")).strip()
-        if not text:
-            if i % progress_every == 0 or i == total_posts:
-                print(f"[Sentiment] Checked {i}/{total_posts}", flush=True)
-            continue
+    arrays = {}
+
+    def model_arrays(name):
+        """Sidecar (probs, votes) of a model, created the first time the model labels a post."""
+        if name not in arrays:
+            arrays[name] = (np.full((n_posts, 3), np.nan, dtype=np.float32), np.full(n_posts, -1, dtype=np.int8))
+        return arrays[name]
+
+    # Settings that change the labels; a checkpoint made with other settings is not resumed
+    settings = {
+        "stage": "sentiment",
+        "sentiment_mode": args.sentiment_mode,
+        "student_confidence": args.student_confidence,
+        "early_exit": not args.no_early_exit,
+        "long_text": args.long_text,
+        "window_overlap": args.window_overlap,
+        "window_length_power": args.window_length_power,
+    }
+
+    checkpoint = None
+    resumed_rows = set()
+    if not args.no_checkpoint:
+        checkpoint, restored = open_checkpoint(output_dir, "sentiment", settings, args.resume, "Sentiment")
+        if restored["keys"]:
+            resumed_rows = restore_results(iter_checkpoint(checkpoint.path), labeled_posts, model_arrays)
+    done_rows = set(resumed_rows)
+
+    manifest = source = None
+    if not args.no_manifest:
+        manifest = ResultManifest(manifest_path(output_dir))
+        source = sentiment_source(args.sentiment_mode, settings)
+        wanted = {
+            record_key(labeled_posts[row]): {"sentiment": source.key(all_texts[row])}
+            for row in range(n_posts)
+            if row not in done_rows
+        }
+        known = manifest.get_fields("sentiment", wanted)
+        done_rows |= restore_results((fields["sentiment"] for fields in known.values()), labeled_posts, model_arrays)
+        print(f"[Sentiment] Manifest: reused labels for {len(known)} posts, "
+              f"labeling {len(wanted) - len(known)} new or stale posts", flush=True)
+
+    def finish(rows):
+        """Checkpoints the rows whose labels are final and stores them in the manifest."""
+        if not rows:
+            return
+        items = [checkpoint_item(labeled_posts[row], row, arrays) for row in rows]
+        if checkpoint is not None:
+            checkpoint.add(items)
+        if manifest is not None:
+            manifest.put_fields("sentiment", [
+                (record_key(item), "sentiment", source.key(all_texts[row]), item) for row, item in zip(rows, items)
+            ])
+
+    pending_rows = [row for row in range(n_posts) if row not in done_rows]
+    ensemble_rows = pending_rows
+    student_prefix = []
+    order = []
+
+    try:
+        if args.sentiment_mode != "ensemble" and pending_rows:
+            from models.sentiment import student
+
+            student_probs, student_votes = model_arrays("student")
+            ensemble_rows = []
+            for start in range(0, len(pending_rows), batch_size):
+                rows = pending_rows[start:start + batch_size]
+                labels, probs = student.predict_batch([all_texts[row] for row in rows], batch_size=batch_size)
+                student_probs[rows] = probs
+                student_votes[rows] = label_ids(labels)
+
+                for row, label in zip(rows, labels):
+                    post = labeled_posts[row]
+                    post["sentiment_student"] = label
+                    post["sentiment_majority"] = label
+                    post["sentiment_models_run"] = "student"
+
+                if args.sentiment_mode == "student":
+                    finish(rows)
+                else:
+                    confident = student_probs[rows].max(axis=1) >= args.student_confidence
+                    finish([row for row, ok in zip(rows, confident) if ok])
+                    ensemble_rows.extend(row for row, ok in zip(rows, confident) if not ok)
+                print(f"[Sentiment] Student labeled {start + len(rows)}/{len(pending_rows)}", flush=True)
+
+            if args.sentiment_mode == "student-fallback":
+                print(
+                    f"[Sentiment] {len(ensemble_rows)}/{len(pending_rows)} posts below student confidence "
+                    f"{args.student_confidence:.2f} fall back to the ensemble",
+                    flush=True,
+                )
 
-        cardiff_result = cardiff.classify(text)
-        hartmann_result = hartmann.classify(text)
-        bert_result = bert_emotion.classify(text)
+        if args.sentiment_mode != "ensemble":
+            student_prefix = ["student"]
+        if args.sentiment_mode == "student":
+            ensemble_rows = []
 
-        post["sentiment_cardiff"] = cardiff_result
-        post["sentiment_hartmann"] = hartmann_result
-        post["sentiment_bert_emotion"] = bert_result
-        post["sentiment_majority"] = majority_vote([
-            cardiff_result,
-            hartmann_result,
-            bert_result,
-        ])
+        if ensemble_rows:
+            ensemble_texts = [all_texts[i] for i in ensemble_rows]
+            order = resolve_model_order(args.model_order, ensemble_texts, batch_size)
+            print(f"[Sentiment] Model order: {', '.join(order)}", flush=True)
 
-        labeled_posts.append(post)
+            skipped = 0
+            for start, result in run_ensemble_batches(ensemble_texts, order, args, batch_size):
+                rows = ensemble_rows[start:start + batch_size]
 
-        if i % progress_every == 0 or i == total_posts:
-            print(f"[Sentiment] Checked {i}/{total_posts} | kept {len(labeled_posts)}", flush=True)
+                skipped += result["skipped"]
+                for name in order:
+                    probs, votes = model_arrays(name)
+                    probs[rows] = result["probs"][name]
+                    votes[rows] = label_ids(result["labels"][name])
 
-    df = pd.DataFrame(labeled_posts)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_path, index=False, encoding="utf-8")
+                for i, row in enumerate(rows):
+                    post = labeled_posts[row]
+                    for name in order:
+                        post[f"sentiment_{name}"] = result["labels"][name][i]
+                    post["sentiment_majority"] = result["majority"][i]
+                    post["sentiment_models_run"] = ";".join(student_prefix + result["models_run"][i])
 
-    print(f"[Sentiment] Saved {len(labeled_posts)} sentiment-labeled posts to '{output_path}'", flush=True)
+                finish(rows)
+                print(f"[Sentiment] Ensemble labeled {start + len(rows)}/{len(ensemble_rows)}", flush=True)
+
+            print(
+                f"[Sentiment] Early exit skipped {order[-1]} for {skipped}/{len(ensemble_rows)} posts "
+                f"({skipped / len(ensemble_rows):.1%} of third-model calls saved)",
+                flush=True,
+            )
+    except BaseException:
+        if checkpoint is not None:
+            checkpoint.close()
+            print(f"[Sentiment] Interrupted; {len(resumed_rows) + checkpoint.items_written} labeled posts are "
+                  f"checkpointed in '{checkpoint.path}'. Rerun with --resume to continue.", flush=True)
+        raise
+
+    sidecar_names = [name for name in ["student", *order] if name in arrays]
+    sidecar_names += [name for name in arrays if name not in sidecar_names]
+
+    if write_output:
+        import pandas as pd
+
+        output_path = write_table(
+            pd.DataFrame(labeled_posts),
+            output_dir / "preprocessed",
+            "sentiment_posts",
+            table_format=args.output_format,
+            partition_by=args.partition_by,
+        )
+
+        print(f"[Sentiment] Saved {n_posts} sentiment-labeled posts to '{output_path}'", flush=True)
+
+    if labeled_posts:
+        save_probabilities(
+            probs_path,
+            ids=[record_key(post) for post in labeled_posts],
+            model_names=sidecar_names,
+            probs=[arrays[name][0] for name in sidecar_names],
+            votes=[arrays[name][1] for name in sidecar_names],
+        )
+        print(f"[Sentiment] Saved per-model probabilities to '{probs_path}'", flush=True)
+
+    if checkpoint is not None:
+        checkpoint.discard()
+    if manifest is not None:
+        manifest.close()
+
+    log_memory_report("Sentiment")
+    return labeled_posts
+
+
+def main():
+    run(parse_args())
 
 
 if __name__ == "__main__":
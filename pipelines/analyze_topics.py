@@ -2,58 +2,223 @@ import argparse
 import sys
 from pathlib import Path
 
-import pandas as pd
-
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from models.qa import topic_classifier
+from models.registry import log_memory_report, registry
+from models.packing import file_sha256
+from models.qa.entailment_cache import EntailmentCache
+from pipelines.checkpoint import iter_checkpoint, open_checkpoint, record_key
+from pipelines.manifest import ResultManifest, manifest_path
+from pipelines.provenance import FieldSource, model_versions
+from pipelines.table_io import PARTITION_CHOICES, TABLE_FORMATS, find_table, read_table, table_format_error, write_table
 
 
-def main():
+def classify_degrees(records):
+    degrees = topic_classifier.get_most_likely_degree_many([record["translated_text"] for record in records])
+    for record, degree in zip(records, degrees):
+        record["degree_type"] = degree
+
+
+def classify_aspects(records):
+    aspects = topic_classifier.get_main_aspect_many([record["translated_text"] for record in records])
+    for record, aspect in zip(records, aspects):
+        record["main_aspect"] = aspect
+
+
+def field_sources():
+    """
+    (FieldSource, classify function) of degree_type and main_aspect for the
+    loaded topic config. Each field only depends on its own config keys, so
+    editing aspect_keywords only recomputes main_aspect.
+    """
+    models = model_versions(topic_classifier.task_models())
+    return [
+        (FieldSource(["degree_type"], models, topic_classifier.task_config("degree")), classify_degrees),
+        (FieldSource(["main_aspect"], models, topic_classifier.task_config("aspect")), classify_aspects),
+    ]
+
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--input-dir", required=True)
     parser.add_argument("--output-dir", required=True)
-    args = parser.parse_args()
+    parser.add_argument("--batch-size", type=int, default=32, help="Posts classified per batch")
+    parser.add_argument("--model-memory-mb", type=float, default=None,
+                        help="Keep resident models under this many MiB, evicting the least recently used "
+                             "(default: $MODEL_MEMORY_BUDGET_MB or unlimited)")
+    parser.add_argument("--no-entailment-cache", action="store_true",
+                        help="Do not read or write the on-disk NLI logit cache")
+    parser.add_argument("--output-format", choices=TABLE_FORMATS, default="csv",
+                        help="Write final_posts as CSV or as Parquet with dictionary-encoded labels")
+    parser.add_argument("--partition-by", choices=PARTITION_CHOICES, default="none",
+                        help="With --output-format parquet, split the table by subreddit or by month of created_utc")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the checkpoint of an interrupted run, skipping posts already classified")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                        help="Do not write checkpoints while classifying")
+    parser.add_argument("--no-manifest", action="store_true",
+                        help="Classify every post again instead of reusing earlier topics for unchanged posts")
+    args = parser.parse_args(argv)
+
+    error = table_format_error(args.output_format)
+    if error:
+        parser.error(error)
+    if args.partition_by != "none" and args.output_format != "parquet":
+        parser.error("--partition-by needs --output-format parquet")
+    return args
+
+
+def run(args, posts=None):
+    """
+    Runs the topics stage and writes final/final_posts in --output-format.
+    posts are the sentiment-labeled posts, read from sentiment_posts (CSV or
+    Parquet) when None; the models only need translated_text, so the other
+    columns are read when the output is written. Returns the final DataFrame,
+    or None when there is no input.
+    """
+    if args.model_memory_mb is not None:
+        registry.set_memory_budget(args.model_memory_mb)
 
     input_dir = Path(args.input_dir).resolve()
     output_dir = Path(args.output_dir).resolve()
 
-    input_path = output_dir / "preprocessed" / "sentiment_posts.csv"
-    output_path = output_dir / "final" / "final_posts.csv"
+    input_path = find_table(output_dir / "preprocessed", "sentiment_posts")
 
-    if not input_path.exists():
-        print(f"[Topics] No sentiment data found at {input_path}", flush=True)
+    if posts is None and input_path is None:
+        print(f"[Topics] No sentiment data found in {output_dir / 'preprocessed'}", flush=True)
         print("[Topics] Run analyze_sentiment.py first.", flush=True)
-        return
+        return None
 
     topic_classifier.load_topic_classifier_config(input_dir)
 
-    df = pd.read_csv(input_path)
-    total_rows = len(df)
-    print(f"[Topics] Classifying topics for {total_rows} posts...", flush=True)
-
-    degree_types = []
-    main_aspects = []
-
-    progress_every = 50 if total_rows >= 200 else 10
-
-    for i, text in enumerate(df["translated_text"], start=1):
-        text = str(text).strip()
-        degree_types.append(topic_classifier.get_most_likely_degree(text))
-        main_aspects.append(topic_classifier.get_main_aspect(text))
-
-        if i % progress_every == 0 or i == total_rows:
-            print(f"[Topics] Processed {i}/{total_rows}", flush=True)
-
+    import pandas as pd
+
+    entailment_cache = None
+    if not args.no_entailment_cache:
+        entailment_cache = EntailmentCache(output_dir / "cache" / "entailment_cache.sqlite")
+        topic_classifier.set_entailment_cache(entailment_cache)
+
+    if posts is None:
+        df = None
+        inputs = read_table(input_path, columns=["type", "id", "translated_text"])
+    else:
+        df = pd.DataFrame(posts)
+        inputs = df
+    texts = [str(text).strip() for text in inputs["translated_text"]]
+    total_rows = len(texts)
+    items = [
+        {"type": str(t), "id": str(i)}
+        for t, i in zip(inputs.get("type", [""] * total_rows), inputs.get("id", [""] * total_rows))
+    ]
+    keys = [record_key(item) for item in items]
+
+    degree_types = [None] * total_rows
+    main_aspects = [None] * total_rows
+    pending = list(range(total_rows))
+
+    # Settings that change the topics; a checkpoint made with other settings is not resumed
+    settings = {"stage": "topics", "topic_config": file_sha256(input_dir / "topic_classifier_config.json")}
+
+    checkpoint = None
+    if not args.no_checkpoint:
+        checkpoint, restored = open_checkpoint(output_dir, "topics", settings, args.resume, "Topics")
+        if restored["keys"]:
+            labels = {record_key(item): item for item in iter_checkpoint(checkpoint.path)}
+            for row, key in enumerate(keys):
+                if key in labels:
+                    degree_types[row] = labels[key]["degree_type"]
+                    main_aspects[row] = labels[key]["main_aspect"]
+            pending = [row for row in pending if keys[row] not in labels]
+    resumed = total_rows - len(pending)
+
+    manifest = sources = None
+    if not args.no_manifest:
+        manifest = ResultManifest(manifest_path(output_dir))
+        sources = field_sources()
+
+    print(f"[Topics] Classifying topics for {len(pending)} posts...", flush=True)
+    batch_size = max(1, args.batch_size)
+
+    try:
+        for start in range(0, len(pending), batch_size):
+            rows = pending[start:start + batch_size]
+            records = [{"translated_text": texts[row]} for row in rows]
+            if manifest is None:
+                classify_degrees(records)
+                classify_aspects(records)
+            else:
+                for source, classify in sources:
+                    manifest.refresh(
+                        "topics",
+                        source.fields,
+                        records,
+                        [keys[row] for row in rows],
+                        [source.key(texts[row]) for row in rows],
+                        classify,
+                    )
+
+            for row, record in zip(rows, records):
+                degree_types[row] = record["degree_type"]
+                main_aspects[row] = record["main_aspect"]
+            if checkpoint is not None:
+                checkpoint.add([
+                    {**items[row], "degree_type": record["degree_type"], "main_aspect": record["main_aspect"]}
+                    for row, record in zip(rows, records)
+                ])
+
+            print(f"[Topics] Processed {start + len(rows)}/{len(pending)}", flush=True)
+    except BaseException:
+        if checkpoint is not None:
+            checkpoint.close()
+            print(f"[Topics] Interrupted; {resumed + checkpoint.items_written} classified posts "
+                  f"are checkpointed in '{checkpoint.path}'. Rerun with --resume to continue.", flush=True)
+        raise
+
+    if df is None:
+        df = read_table(input_path)
     df["degree_type"] = degree_types
     df["main_aspect"] = main_aspects
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_path, index=False, encoding="utf-8")
+    if topic_classifier.cascade_stats()["texts"]:
+        cs = topic_classifier.cascade_stats()
+        print(f"[Topics] Cascade escalated {cs['escalated']}/{cs['texts']} texts to NLI "
+              f"({cs['escalation_rate']:.1%})", flush=True)
+
+    if entailment_cache is not None:
+        ec_stats = entailment_cache.stats()
+        print(
+            f"[Topics] Entailment cache: {ec_stats['hits']} hits, {ec_stats['misses']} misses "
+            f"({ec_stats['hit_rate']:.1%} hit rate)",
+            flush=True,
+        )
+        topic_classifier.set_entailment_cache(None)
+        entailment_cache.close()
+
+    output_path = write_table(
+        df,
+        output_dir / "final",
+        "final_posts",
+        table_format=args.output_format,
+        partition_by=args.partition_by,
+    )
 
     print(f"[Topics] Saved topic-annotated data to '{output_path}'", flush=True)
+    if checkpoint is not None:
+        checkpoint.discard()
+    if manifest is not None:
+        m_stats = manifest.stats()
+        print(f"[Topics] Manifest: reused {m_stats['hits']} fields, recomputed {m_stats['misses']} "
+              f"fields that were new or stale", flush=True)
+        manifest.close()
+    log_memory_report("Topics")
+    return df
+
+
+def main():
+    run(parse_args())
 
 
 if __name__ == "__main__":
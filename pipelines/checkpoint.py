@@ -0,0 +1,177 @@
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+# Seconds between fsyncs of a checkpoint file; every batch is still flushed to the OS right away
+DEFAULT_SYNC_SECONDS = 10.0
+
+_STOP = object()
+
+
+def checkpoint_path(output_dir, stage: str) -> Path:
+    return Path(output_dir) / "checkpoints" / f"{stage}.jsonl"
+
+
+def record_key(record) -> str:
+    """Identity of a Reddit item across stages: posts and comments have separate id spaces."""
+    return f"{record.get('type', '')}:{record.get('id', '')}"
+
+
+def table_record_keys(df):
+    """record_key of every row of a posts table, as a Series aligned with df."""
+    # Parquet tables may hold these columns as categoricals
+    types = df["type"].astype(object).fillna("").astype(str) if "type" in df.columns else ""
+    return types + ":" + df["id"].astype(object).fillna("").astype(str)
+
+
+def _lines(path: Path):
+    """Parsed lines of a checkpoint; a last line cut short by a crash ends the file."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                return
+            try:
+                yield json.loads(line)
+            except ValueError:
+                return
+
+
+def load_checkpoint(path, meta: dict) -> dict | None:
+    """
+    The state saved with the batches of a checkpoint written with the same
+    meta, or None when there is no such checkpoint. Each batch's state dict
+    is merged into the result in write order; dict values are merged one
+    level deep, so per-batch deltas such as {"parent_map": {...}} add up.
+    The result also holds "keys", the record_key of every checkpointed item.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    lines = _lines(path)
+    header = next(lines, None)
+    if header is None or header.get("meta") != meta:
+        return None
+
+    state = {"keys": set()}
+    for line in lines:
+        state["keys"].update(record_key(item) for item in line.get("items", []))
+        for key, value in line.get("state", {}).items():
+            if isinstance(value, dict):
+                state.setdefault(key, {}).update(value)
+            else:
+                state[key] = value
+    return state
+
+
+def iter_checkpoint(path):
+    """Yields the checkpointed items of path in write order."""
+    lines = _lines(Path(path))
+    next(lines, None)
+    for line in lines:
+        yield from line.get("items", [])
+
+
+def _trim_partial_line(path: Path) -> None:
+    """Cuts a last line left unfinished by a crash, so appended batches start on a line of their own."""
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            f.truncate(end)
+
+
+class CheckpointWriter:
+    """
+    Appends batches of finished items to a JSONL checkpoint from a background
+    thread, so the inference loop only pays for a queue put. The first line
+    holds meta; every batch is one line {"items": [...], "state": {...}}.
+    Each line is flushed as soon as it is written and the file is fsynced at
+    most every sync_seconds and on close. Items and state must not be changed
+    after add().
+    """
+
+    def __init__(self, path, meta: dict, append: bool = False, sync_seconds: float = DEFAULT_SYNC_SECONDS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.sync_seconds = sync_seconds
+        self.items_written = 0
+        self._error = None
+        self._queue = queue.Queue()
+
+        if append and self.path.exists():
+            _trim_partial_line(self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._queue.put({"meta": meta})
+
+        self._thread = threading.Thread(target=self._run, name=f"checkpoint-{self.path.stem}", daemon=True)
+        self._thread.start()
+
+    def add(self, items, state: dict | None = None) -> None:
+        """Queues a batch of finished items, plus any state needed to resume after them."""
+        if self._error is not None:
+            raise self._error
+        line = {"items": list(items)}
+        if state:
+            line["state"] = state
+        self._queue.put(line)
+
+    def _run(self):
+        last_sync = time.monotonic()
+        while True:
+            line = self._queue.get()
+            if line is _STOP:
+                return
+            if self._error is not None:
+                continue
+            try:
+                self._file.write(json.dumps(line, ensure_ascii=False))
+                self._file.write("\n")
+                self._file.flush()
+                self.items_written += len(line.get("items", []))
+                if time.monotonic() - last_sync >= self.sync_seconds:
+                    os.fsync(self._file.fileno())
+                    last_sync = time.monotonic()
+            except OSError as e:
+                self._error = e
+
+    def close(self) -> None:
+        """Writes the queued batches, fsyncs and closes the file."""
+        if self._file is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        try:
+            if self._error is None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+            self._file = None
+        if self._error is not None:
+            raise self._error
+
+    def discard(self) -> None:
+        """Closes and deletes the checkpoint, once the stage's output is complete."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+def open_checkpoint(output_dir, stage: str, meta: dict, resume: bool, tag: str):
+    """
+    Starts a stage's checkpoint, or with resume continues a matching one.
+    Returns (writer, restored state); the state is {"keys": set()} when
+    starting from the beginning.
+    """
+    path = checkpoint_path(output_dir, stage)
+    state = load_checkpoint(path, meta) if resume else None
+    if state is not None:
+        print(f"[{tag}] Resuming from '{path}': {len(state['keys'])} items already done", flush=True)
+    elif resume:
+        print(f"[{tag}] No checkpoint with these settings at '{path}'; starting from the beginning", flush=True)
+    return CheckpointWriter(path, meta, append=state is not None), state or {"keys": set()}
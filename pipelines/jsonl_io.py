@@ -0,0 +1,132 @@
+import gzip
+import io
+import json
+import os
+from pathlib import Path
+
+# Suffix written for each --compression choice
+COMPRESSION_SUFFIXES = {
+    "none": ".jsonl",
+    "gzip": ".jsonl.gz",
+    "zstd": ".jsonl.zst",
+}
+
+# Whole-file JSON arrays written by earlier versions; still readable, never written
+LEGACY_SUFFIX = ".json"
+
+
+def compression_error(compression: str) -> str | None:
+    """Why compression cannot be used here, or None when it can."""
+    if compression not in COMPRESSION_SUFFIXES:
+        return f"Unknown compression '{compression}' (choose from {', '.join(COMPRESSION_SUFFIXES)})"
+    if compression == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            return "zstd compression needs the zstandard package: pip install zstandard"
+    return None
+
+
+def records_path(directory, stem: str, compression: str = "none") -> Path:
+    """Path a stage writes stem to, e.g. raw/raw_posts.jsonl.gz for gzip."""
+    return Path(directory) / f"{stem}{COMPRESSION_SUFFIXES[compression]}"
+
+
+def find_records(directory, stem: str) -> Path | None:
+    """
+    The newest existing file for stem in directory: any of the JSONL variants
+    or the legacy stem.json array. None when there is none.
+    """
+    directory = Path(directory)
+    candidates = [directory / f"{stem}{suffix}" for suffix in [*COMPRESSION_SUFFIXES.values(), LEGACY_SUFFIX]]
+    existing = [p for p in candidates if p.is_file()]
+    if not existing:
+        return None
+    return max(existing, key=lambda p: p.stat().st_mtime_ns)
+
+
+def _open_text(path: Path, mode: str, name: str | None = None):
+    """Text stream for path, compressed according to name (default: the file's own name)."""
+    name = name or path.name
+    if name.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if name.endswith(".zst"):
+        import zstandard
+
+        raw = open(path, mode + "b")
+        if mode == "r":
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read_records(path):
+    """
+    Yields one dict per record. JSONL files (optionally .gz/.zst) are read line
+    by line; a legacy .json array is loaded whole and then yielded item by item.
+    """
+    path = Path(path)
+    if path.suffix == LEGACY_SUFFIX:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+        return
+
+    with _open_text(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class RecordWriter:
+    """
+    Streams records to a JSONL file. The records go to '<path>.tmp', which
+    replaces path only when the writer is closed without an error, so readers
+    never see a half-written file.
+
+        with RecordWriter(path) as writer:
+            for record in records:
+                writer.write(record)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.count = 0
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = _open_text(self._tmp_path, "w", name=self.path.name)
+
+    def write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+        self.count += 1
+
+    def write_many(self, records) -> None:
+        for record in records:
+            self.write(record)
+
+    def close(self, commit: bool = True) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        if commit:
+            os.replace(self._tmp_path, self.path)
+        else:
+            self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+        return False
+
+
+def write_records(path, records) -> int:
+    """Writes an iterable of records to path as JSONL and returns how many were written."""
+    with RecordWriter(path) as writer:
+        writer.write_many(records)
+    return writer.count
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+
+def text_hash(text) -> str:
+    return hashlib.sha1(str(text).encode("utf-8")).hexdigest()
+
+
+def manifest_path(output_dir) -> Path:
+    return Path(output_dir) / "cache" / "manifest.sqlite"
+
+
+class ResultManifest:
+    """
+    On-disk enriched fields of earlier runs keyed by (stage, item key, field),
+    each stored with its provenance key (see pipelines.provenance). A field is
+    only reused while its provenance is unchanged, so a stage runs its models
+    just for new or changed items and for fields whose models or config
+    changed, and merges in the rest.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Whole-item results of earlier versions; their fields are recomputed once
+        self._conn.execute("DROP TABLE IF EXISTS results")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fields (
+                stage TEXT NOT NULL,
+                item_key TEXT NOT NULL,
+                field TEXT NOT NULL,
+                provenance TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (stage, item_key, field)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get_fields(self, stage: str, wanted: dict) -> dict:
+        """
+        Looks up fields given as {item key: {field: provenance key}}.
+        Returns {item key: {field: value}} for the fields stored with that provenance.
+        """
+        keys = list(wanted)
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT item_key, field, provenance, value FROM fields "
+                f"WHERE stage = ? AND item_key IN ({placeholders})",
+                [stage, *chunk],
+            ).fetchall()
+            for key, field, provenance, value in rows:
+                if wanted[key].get(field) == provenance:
+                    found.setdefault(key, {})[field] = json.loads(value)
+
+        requested = sum(len(fields) for fields in wanted.values())
+        reused = sum(len(fields) for fields in found.values())
+        self.hits += reused
+        self.misses += requested - reused
+        return found
+
+    def put_fields(self, stage: str, items) -> None:
+        """Stores (item key, field, provenance key, value) items, replacing earlier values of the same fields."""
+        rows = [
+            (stage, key, field, provenance, json.dumps(value, ensure_ascii=False))
+            for key, field, provenance, value in items
+        ]
+        if not rows:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO fields (stage, item_key, field, provenance, value) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        self._conn.commit()
+
+    def refresh(self, stage: str, fields, records, keys, provenances, compute) -> int:
+        """
+        Plans one group of fields for records (with their item keys and
+        provenance keys): records whose stored fields all have the wanted
+        provenance get them back, compute(stale records) sets the fields on
+        the others, and their new values are stored. Returns how many records
+        were stale.
+        """
+        fields = list(fields)
+        found = self.get_fields(stage, {key: dict.fromkeys(fields, p) for key, p in zip(keys, provenances)})
+
+        stale = []
+        for i, (record, key) in enumerate(zip(records, keys)):
+            values = found.get(key, {})
+            if len(values) == len(fields):
+                record.update(values)
+            else:
+                stale.append(i)
+
+        if stale:
+            compute([records[i] for i in stale])
+            self.put_fields(stage, [
+                (keys[i], field, provenances[i], records[i][field]) for i in stale for field in fields
+            ])
+        return len(stale)
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM fields").fetchone()[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,6 +1,7 @@
 import argparse
-import json
 import sys
+import time
+from functools import partial
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -9,72 +10,427 @@ if str(PROJECT_ROOT) not in sys.path:
 
 from models.language import language_detector
 from models.translation import translator
+from models.translation.translation_memory import DEFAULT_MAX_ENTRIES, TranslationMemory
 from models.qa import topic_classifier
+from models.registry import log_memory_report, registry
+from models.packing import file_sha256
+from models.qa.entailment_cache import EntailmentCache
+from pipelines.checkpoint import iter_checkpoint, open_checkpoint, record_key
+from pipelines.jsonl_io import COMPRESSION_SUFFIXES, RecordWriter, compression_error, find_records, read_records, records_path
+from pipelines.manifest import ResultManifest, manifest_path
+from pipelines.provenance import FieldSource, model_versions
+
+
+def _post_text(post):
+    return f"{post.get('title', '')} {post.get('selftext', '')}".strip()
+
+
+def detect_post_languages(posts, lid_max_tokens=language_detector.LID_MAX_TOKENS):
+    langs, confs = language_detector.detect_languages([_post_text(post) for post in posts], max_tokens=lid_max_tokens)
+
+    for post, lang, conf in zip(posts, langs, confs):
+        post["lang"] = str(lang)
+        post["lang_confidence"] = float(conf)
+
+
+def translate_posts(posts, translate_batch_size=translator.DEFAULT_BATCH_SIZE,
+                    translate_max_tokens=translator.DEFAULT_MAX_BATCH_TOKENS,
+                    split_sentences=True,
+                    chunk_tokens=translator.DEFAULT_CHUNK_TOKENS,
+                    stats=None):
+    started = time.perf_counter()
+    translations = translator.translate_batch(
+        [(_post_text(post), post["lang"]) for post in posts],
+        batch_size=translate_batch_size,
+        max_batch_tokens=translate_max_tokens,
+        split_sentences=split_sentences,
+        chunk_tokens=chunk_tokens,
+    )
+    if stats is not None:
+        stats["translate_seconds"] = stats.get("translate_seconds", 0.0) + time.perf_counter() - started
+        stats["translated_texts"] = stats.get("translated_texts", 0) + sum(
+            1 for post in posts if post["lang"] in translator.SUPPORTED_LANGUAGES
+        )
+
+    for post, translated in zip(posts, translations):
+        post["translated_text"] = translated
+
+
+def inherit_labels(items, parent_map):
+    """Records the label of each post in parent_map, then gives every comment its post's label."""
+    for item in items:
+        if item["type"] == "post":
+            parent_map[item["id"]] = item["is_about_study"]
+    for item in items:
+        if item["type"] != "post":
+            item["is_about_study"] = parent_map.get(item.get("post_id"), False)
+
+
+def label_posts(posts, parent_map):
+    # Posts first, so comments in the same batch can inherit their parent's label
+    top_level = [post for post in posts if post["type"] == "post"]
+    relevance = topic_classifier.is_about_main_topic_many([post["translated_text"] for post in top_level])
+    for post, is_about in zip(top_level, relevance):
+        post["is_about_study"] = is_about
+
+    inherit_labels(posts, parent_map)
+
+
+def enrich_posts(posts, parent_map, lid_max_tokens=language_detector.LID_MAX_TOKENS,
+                 translate_batch_size=translator.DEFAULT_BATCH_SIZE,
+                 translate_max_tokens=translator.DEFAULT_MAX_BATCH_TOKENS,
+                 split_sentences=True,
+                 chunk_tokens=translator.DEFAULT_CHUNK_TOKENS,
+                 stats=None):
+    detect_post_languages(posts, lid_max_tokens=lid_max_tokens)
+    translate_posts(
+        posts,
+        translate_batch_size=translate_batch_size,
+        translate_max_tokens=translate_max_tokens,
+        split_sentences=split_sentences,
+        chunk_tokens=chunk_tokens,
+        stats=stats,
+    )
+    label_posts(posts, parent_map)
+    return posts
 
 
 def enrich_post(post, parent_map):
-    text = f"{post.get('title', '')} {post.get('selftext', '')}".strip()
+    return enrich_posts([post], parent_map)[0]
 
-    lang, conf = language_detector.detect_language(text, return_confidence=True)
-    post["lang"] = lang
-    post["lang_confidence"] = conf
 
-    translated = translator.translate(text, lang)
-    post["translated_text"] = translated
+def field_sources(lid_max_tokens=language_detector.LID_MAX_TOKENS, split_sentences=True,
+                  chunk_tokens=translator.DEFAULT_CHUNK_TOKENS):
+    """
+    FieldSource of each field group enrich_posts sets, for the loaded topic
+    config. Translations have one source per language, so swapping one
+    translation model only re-translates that language; other languages are
+    kept as they are (source None).
+    """
+    chunking = {
+        "split_sentences": split_sentences,
+        "chunk_tokens": chunk_tokens,
+        "chunking_version": translator.CHUNKING_VERSION,
+    }
+    translation = {
+        lang: FieldSource(["translated_text"], model_versions([translator.model_name(lang)]), chunking)
+        for lang in translator.SUPPORTED_LANGUAGES
+    }
+    translation[None] = FieldSource(["translated_text"])
+    return {
+        "lang": FieldSource(
+            ["lang", "lang_confidence"],
+            model_versions([language_detector.MODEL_NAME]),
+            {"lid_max_tokens": lid_max_tokens},
+        ),
+        "translated_text": translation,
+        "is_about_study": FieldSource(
+            ["is_about_study"],
+            model_versions(topic_classifier.task_models()),
+            topic_classifier.task_config("main_topic"),
+        ),
+    }
 
-    if post["type"] == "post":
-        post["is_about_study"] = topic_classifier.is_about_main_topic(translated)
-        parent_map[post["id"]] = post["is_about_study"]
-    else:
-        parent_id = post.get("post_id")
-        post["is_about_study"] = parent_map.get(parent_id, False)
 
-    return post
+def enrich_changed(batch, parent_map, manifest, sources, lid_max_tokens=language_detector.LID_MAX_TOKENS,
+                   translate_batch_size=translator.DEFAULT_BATCH_SIZE,
+                   translate_max_tokens=translator.DEFAULT_MAX_BATCH_TOKENS,
+                   split_sentences=True,
+                   chunk_tokens=translator.DEFAULT_CHUNK_TOKENS,
+                   stats=None):
+    """
+    enrich_posts that only recomputes stale fields. Each field group of every
+    item is planned against its provenance in manifest: groups whose models,
+    config slice and inputs are unchanged are restored and the others are
+    recomputed in order, so a changed translation also re-labels its post.
+    """
+    keys = [record_key(item) for item in batch]
+    texts = [_post_text(item) for item in batch]
 
+    lang = sources["lang"]
+    manifest.refresh(
+        "process",
+        lang.fields,
+        batch,
+        keys,
+        [lang.key(text) for text in texts],
+        partial(detect_post_languages, lid_max_tokens=lid_max_tokens),
+    )
 
-def main():
+    translation = sources["translated_text"]
+    manifest.refresh(
+        "process",
+        ["translated_text"],
+        batch,
+        keys,
+        [translation.get(item["lang"], translation[None]).key(text, item["lang"]) for item, text in zip(batch, texts)],
+        partial(
+            translate_posts,
+            translate_batch_size=translate_batch_size,
+            translate_max_tokens=translate_max_tokens,
+            split_sentences=split_sentences,
+            chunk_tokens=chunk_tokens,
+            stats=stats,
+        ),
+    )
+
+    # Comments are not classified; they take their post's label below
+    posts = [i for i, item in enumerate(batch) if item["type"] == "post"]
+    label = sources["is_about_study"]
+    manifest.refresh(
+        "process",
+        label.fields,
+        [batch[i] for i in posts],
+        [keys[i] for i in posts],
+        [label.key(batch[i]["translated_text"]) for i in posts],
+        partial(label_posts, parent_map=parent_map),
+    )
+
+    inherit_labels(batch, parent_map)
+    return batch
+
+
+def ordered_batches(items, batch_size, seen_posts=None):
+    """
+    Yields batches of items in input order. Comments whose post has not been
+    seen yet (in items or in seen_posts) are held back and yielded after all
+    other items, so they can still inherit their post's label. The fetch stage
+    writes every post before its comments, so usually nothing is held back.
+    """
+    seen_posts = set(seen_posts or ())
+    batch, deferred = [], []
+    for item in items:
+        if item.get("type") == "post":
+            seen_posts.add(item.get("id"))
+        elif item.get("post_id") not in seen_posts:
+            deferred.append(item)
+            continue
+
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+    for start in range(0, len(deferred), batch_size):
+        yield deferred[start:start + batch_size]
+
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--input-dir", required=True)
     parser.add_argument("--output-dir", required=True)
-    args = parser.parse_args()
+    parser.add_argument("--batch-size", type=int, default=64, help="Items enriched per batch")
+    parser.add_argument("--lid-max-tokens", type=int, default=language_detector.LID_MAX_TOKENS,
+                        help="Token window used for language detection")
+    parser.add_argument("--translate-batch-size", type=int, default=translator.DEFAULT_BATCH_SIZE,
+                        help="Maximum texts per translation mini-batch")
+    parser.add_argument("--translate-max-tokens", type=int, default=translator.DEFAULT_MAX_BATCH_TOKENS,
+                        help="Maximum padded tokens per translation mini-batch")
+    parser.add_argument("--chunk-tokens", type=int, default=translator.DEFAULT_CHUNK_TOKENS,
+                        help="Posts longer than this many tokens are translated in chunks of whole sentences "
+                             "of at most this size")
+    parser.add_argument("--no-sentence-chunks", action="store_true",
+                        help="Translate whole posts (truncated at the model maximum) instead of sentence chunks")
+    parser.add_argument("--no-translation-memory", action="store_true",
+                        help="Do not read or write the on-disk translation memory")
+    parser.add_argument("--translation-memory-size", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="Maximum sentences kept in the translation memory")
+    parser.add_argument("--model-memory-mb", type=float, default=None,
+                        help="Keep resident models under this many MiB, evicting the least recently used "
+                             "(default: $MODEL_MEMORY_BUDGET_MB or unlimited)")
+    parser.add_argument("--no-entailment-cache", action="store_true",
+                        help="Do not read or write the on-disk NLI logit cache")
+    parser.add_argument("--compression", choices=list(COMPRESSION_SUFFIXES), default="none",
+                        help="Compress preprocessed/processed_posts.jsonl with gzip or zstd")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the checkpoint of an interrupted run, skipping items already enriched")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                        help="Do not write checkpoints while processing")
+    parser.add_argument("--no-manifest", action="store_true",
+                        help="Enrich every item again instead of reusing earlier results for unchanged items")
+    args = parser.parse_args(argv)
+
+    error = compression_error(args.compression)
+    if error:
+        parser.error(error)
+    return args
+
+
+def run(args, raw_items=None, write_output: bool = True):
+    """
+    Runs the process stage. raw_items are the fetched items, streamed from
+    raw/raw_posts.jsonl (or a legacy raw_posts.json) when None. Enriched items
+    are streamed to preprocessed/processed_posts.jsonl and their count is
+    returned; with write_output=False they are returned as a list instead.
+    Returns None when there is no input.
+    """
+    if args.model_memory_mb is not None:
+        registry.set_memory_budget(args.model_memory_mb)
 
     input_dir = Path(args.input_dir).resolve()
     output_dir = Path(args.output_dir).resolve()
 
-    raw_path = output_dir / "raw" / "raw_posts.json"
-    processed_path = output_dir / "preprocessed" / "processed_posts.json"
+    raw_path = find_records(output_dir / "raw", "raw_posts")
+    processed_path = records_path(output_dir / "preprocessed", "processed_posts", args.compression)
 
-    if not raw_path.exists():
-        print(f"[Process] No raw data found at {raw_path}", flush=True)
+    if raw_items is None and raw_path is None:
+        print(f"[Process] No raw data found in {output_dir / 'raw'}", flush=True)
         print("[Process] Run the Reddit fetch script first.", flush=True)
-        return
+        return None
 
     topic_classifier.load_topic_classifier_config(input_dir)
 
-    with open(raw_path, "r", encoding="utf-8") as f:
-        raw_items = json.load(f)
+    entailment_cache = None
+    if not args.no_entailment_cache:
+        entailment_cache = EntailmentCache(output_dir / "cache" / "entailment_cache.sqlite")
+        topic_classifier.set_entailment_cache(entailment_cache)
 
-    raw_items.sort(key=lambda x: 0 if x.get("type") == "post" else 1)
+    memory = None
+    if not args.no_translation_memory:
+        memory = TranslationMemory(
+            output_dir / "cache" / "translation_memory.sqlite",
+            max_entries=args.translation_memory_size,
+        )
+        translator.set_translation_memory(memory)
 
-    total_items = len(raw_items)
-    print(f"[Process] Processing {total_items} posts and comments...", flush=True)
+    if raw_items is None:
+        print(f"[Process] Streaming posts and comments from '{raw_path}'...", flush=True)
+        items, total_items = read_records(raw_path), None
+    else:
+        items, total_items = raw_items, len(raw_items) if hasattr(raw_items, "__len__") else None
+        print(f"[Process] Processing {total_items or 'all'} posts and comments...", flush=True)
 
     parent_map = {}
     enriched = []
+    writer = RecordWriter(processed_path) if write_output else None
+
+    # Settings that change the enriched fields; a checkpoint made with other settings is not resumed
+    settings = {
+        "stage": "process",
+        "lid_max_tokens": args.lid_max_tokens,
+        "split_sentences": not args.no_sentence_chunks,
+        "chunk_tokens": args.chunk_tokens,
+        "topic_config": file_sha256(input_dir / "topic_classifier_config.json"),
+    }
 
-    progress_every = 50 if total_items >= 200 else 10
+    manifest = sources = None
+    if not args.no_manifest:
+        manifest = ResultManifest(manifest_path(output_dir))
+        sources = field_sources(
+            lid_max_tokens=args.lid_max_tokens,
+            split_sentences=not args.no_sentence_chunks,
+            chunk_tokens=args.chunk_tokens,
+        )
 
-    for i, item in enumerate(raw_items, start=1):
-        enriched.append(enrich_post(item, parent_map))
+    checkpoint = None
+    done_keys = set()
+    if not args.no_checkpoint:
+        checkpoint, restored = open_checkpoint(output_dir, "process", settings, args.resume, "Process")
+        done_keys = restored["keys"]
+        if done_keys:
+            parent_map.update(restored.get("parent_map", {}))
+            for item in iter_checkpoint(checkpoint.path):
+                if writer is not None:
+                    writer.write(item)
+                else:
+                    enriched.append(item)
+            items = (item for item in items if record_key(item) not in done_keys)
 
-        if i % progress_every == 0 or i == total_items:
-            print(f"[Process] Processed {i}/{total_items}", flush=True)
+    batch_size = max(1, args.batch_size)
+    stats = {}
+    done = len(done_keys)
+    enrich_args = dict(
+        lid_max_tokens=args.lid_max_tokens,
+        translate_batch_size=args.translate_batch_size,
+        translate_max_tokens=args.translate_max_tokens,
+        split_sentences=not args.no_sentence_chunks,
+        chunk_tokens=args.chunk_tokens,
+        stats=stats,
+    )
 
-    processed_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(processed_path, "w", encoding="utf-8") as f:
-        json.dump(enriched, f, ensure_ascii=False, indent=2)
+    try:
+        for batch in ordered_batches(items, batch_size, seen_posts=parent_map):
+            if manifest is not None:
+                batch = enrich_changed(batch, parent_map, manifest, sources, **enrich_args)
+            else:
+                batch = enrich_posts(batch, parent_map, **enrich_args)
+            if writer is not None:
+                writer.write_many(batch)
+            else:
+                enriched.extend(batch)
+            if checkpoint is not None:
+                posts_done = {post["id"]: post["is_about_study"] for post in batch if post["type"] == "post"}
+                checkpoint.add(batch, state={"parent_map": posts_done})
 
-    print(f"[Process] Saved {len(enriched)} enriched items to '{processed_path}'", flush=True)
+            done += len(batch)
+            progress = f"{done}/{total_items}" if total_items is not None else str(done)
+            print(f"[Process] Processed {progress}", flush=True)
+    except BaseException:
+        if writer is not None:
+            writer.close(commit=False)
+        if checkpoint is not None:
+            checkpoint.close()
+            print(f"[Process] Interrupted; {len(done_keys) + checkpoint.items_written} enriched items are checkpointed in "
+                  f"'{checkpoint.path}'. Rerun with --resume to continue.", flush=True)
+        raise
+
+    translate_seconds = stats.get("translate_seconds", 0.0)
+    translated_texts = stats.get("translated_texts", 0)
+    if translated_texts and translate_seconds > 0:
+        print(
+            f"[Process] Translated {translated_texts} texts in {translate_seconds:.1f}s "
+            f"({translated_texts / translate_seconds:.2f} texts/sec)",
+            flush=True,
+        )
+
+    if memory is not None:
+        tm_stats = memory.stats()
+        print(
+            f"[Process] Translation memory: {tm_stats['hits']} hits, {tm_stats['misses']} misses "
+            f"({tm_stats['hit_rate']:.1%} hit rate, {tm_stats['entries']} entries)",
+            flush=True,
+        )
+        translator.set_translation_memory(None)
+        memory.close()
+
+    if manifest is not None:
+        m_stats = manifest.stats()
+        print(
+            f"[Process] Manifest: reused {m_stats['hits']} fields, recomputed {m_stats['misses']} "
+            f"fields that were new or stale",
+            flush=True,
+        )
+        manifest.close()
+
+    if topic_classifier.cascade_stats()["texts"]:
+        cs = topic_classifier.cascade_stats()
+        print(f"[Process] Cascade escalated {cs['escalated']}/{cs['texts']} texts to NLI "
+              f"({cs['escalation_rate']:.1%})", flush=True)
+
+    if entailment_cache is not None:
+        ec_stats = entailment_cache.stats()
+        print(
+            f"[Process] Entailment cache: {ec_stats['hits']} hits, {ec_stats['misses']} misses "
+            f"({ec_stats['hit_rate']:.1%} hit rate)",
+            flush=True,
+        )
+        topic_classifier.set_entailment_cache(None)
+        entailment_cache.close()
+
+    if writer is not None:
+        writer.close()
+        print(f"[Process] Saved {writer.count} enriched items to '{processed_path}'", flush=True)
+    if checkpoint is not None:
+        checkpoint.discard()
+
+    log_memory_report("Process")
+    return writer.count if writer is not None else enriched
+
+
+def main():
+    run(parse_args())
 
 
 if __name__ == "__main__":
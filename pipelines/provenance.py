@@ -0,0 +1,39 @@
+import json
+from pathlib import Path
+
+from pipelines.manifest import text_hash
+
+
+def model_versions(names) -> dict:
+    """{registry name: version} for the models that produce a field."""
+    from models.registry import registry
+
+    return {name: registry.version(name) for name in names}
+
+
+def file_version(path) -> str:
+    """Version of a model stored as a single file, such as the sentiment student head."""
+    path = Path(path)
+    fingerprint = [path.name]
+    if path.exists():
+        fingerprint += [path.stat().st_size, path.stat().st_mtime_ns]
+    return text_hash(json.dumps(fingerprint))[:16]
+
+
+class FieldSource:
+    """
+    What a group of enriched fields is computed from: the models that produce
+    them (id and version) and the slice of the config they read. key(*inputs)
+    is the provenance key of one item's fields, so a stored field is stale as
+    soon as its models, its config slice or its input text change.
+    """
+
+    def __init__(self, fields, models: dict | None = None, config: dict | None = None):
+        self.fields = list(fields)
+        self._base = text_hash(json.dumps(
+            {"fields": self.fields, "models": models or {}, "config": config or {}},
+            sort_keys=True,
+        ))
+
+    def key(self, *inputs) -> str:
+        return text_hash(json.dumps([self._base, *(text_hash(value) for value in inputs)]))
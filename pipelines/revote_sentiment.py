@@ -0,0 +1,77 @@
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from models.sentiment.vote_policies import POLICIES, apply_policy, load_probabilities
+from pipelines.checkpoint import table_record_keys
+from pipelines.table_io import find_table, partitioning_of, read_table, write_table
+
+
+def parse_weights(value, model_names):
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight)
+
+    missing = [name for name in model_names if name not in weights]
+    if missing:
+        raise ValueError(f"--weights is missing models: {missing}")
+    return [weights[name] for name in model_names]
+
+
+def revote_file(path: Path, ids, labels, column):
+    """
+    Rewrites the vote column of a CSV or Parquet table in place, keeping its
+    format and partitioning. Rows are matched to the sidecar by record key.
+    """
+    df = read_table(path)
+    previous = df[column].astype(object) if column in df.columns else "UNKNOWN"
+    df[column] = table_record_keys(df).map(dict(zip(ids, labels))).fillna(previous)
+    write_table(df, path.parent, path.stem, table_format=path.suffix[1:], partition_by=partitioning_of(path))
+    return len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute the sentiment vote from stored per-model probabilities.")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--policy", choices=POLICIES, default="majority")
+    parser.add_argument("--weights", default=None,
+                        help="Per-model weights for the weighted policy, e.g. cardiff=1,hartmann=0.5,bert_emotion=1")
+    parser.add_argument("--column", default="sentiment_majority", help="Column to write the new vote into")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir).resolve()
+    probs_path = output_dir / "preprocessed" / "sentiment_probs.npz"
+
+    if not probs_path.exists():
+        print(f"[Revote] No probability sidecar found at {probs_path}", flush=True)
+        print("[Revote] Run analyze_sentiment.py first.", flush=True)
+        return
+
+    ids, model_names, probs, votes = load_probabilities(probs_path)
+    weights = parse_weights(args.weights, model_names) if args.weights else None
+    if args.policy == "weighted" and weights is None:
+        parser.error("--policy weighted needs --weights")
+
+    labels = apply_policy(args.policy, probs, votes, weights=weights)
+
+    counts = Counter(labels).most_common()
+    summary = ", ".join(f"{label} {count}" for label, count in counts)
+    print(f"[Revote] {args.policy} over {', '.join(model_names)}: {summary}", flush=True)
+
+    for path in (
+        find_table(output_dir / "preprocessed", "sentiment_posts"),
+        find_table(output_dir / "final", "final_posts"),
+    ):
+        if path is not None:
+            rows = revote_file(path, ids, labels, args.column)
+            print(f"[Revote] Updated '{args.column}' for {rows} rows in '{path}'", flush=True)
+
+
+if __name__ == "__main__":
+    main()
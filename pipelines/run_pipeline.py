@@ -0,0 +1,107 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from models.registry import log_memory_report, registry
+from pipelines import analyze_sentiment, analyze_topics, process_reddit_posts
+from pipelines.table_io import PARTITION_CHOICES, TABLE_FORMATS, table_format_error
+from reddit import reddit_fetch_posts_with_comments as fetch_reddit
+
+def stage_argv(args) -> list[str]:
+    return ["--input-dir", args.input_dir, "--output-dir", args.output_dir]
+
+
+def checkpoint_argv(args) -> list[str]:
+    """Extra arguments for the stages that checkpoint (process, sentiment and topics)."""
+    return ["--resume"] if args.resume else []
+
+
+def table_argv(args) -> list[str]:
+    """Extra arguments for the stages that write tables (sentiment and topics)."""
+    return ["--output-format", args.output_format, "--partition-by", args.partition_by]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run fetch, process, sentiment and topics in one process, keeping models loaded between stages."
+    )
+    parser.add_argument("--input-dir", required=True)
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--skip-fetch", action="store_true",
+                        help="Start from the existing raw/raw_posts.jsonl instead of fetching from Reddit")
+    parser.add_argument("--no-intermediate-files", action="store_true",
+                        help="Pass data between stages in memory only; just the final table and caches are written")
+    parser.add_argument("--model-memory-mb", type=float, default=None,
+                        help="Keep resident models under this many MiB, evicting the least recently used")
+    parser.add_argument("--output-format", choices=TABLE_FORMATS, default="csv",
+                        help="Format of the sentiment and final tables")
+    parser.add_argument("--partition-by", choices=PARTITION_CHOICES, default="none",
+                        help="With --output-format parquet, split the tables by subreddit or by month")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue interrupted process, sentiment and topics stages from their checkpoints "
+                             "(usually together with --skip-fetch)")
+    args = parser.parse_args()
+
+    error = table_format_error(args.output_format)
+    if error:
+        parser.error(error)
+    if args.partition_by != "none" and args.output_format != "parquet":
+        parser.error("--partition-by needs --output-format parquet")
+
+    input_dir = Path(args.input_dir).resolve()
+    if not input_dir.exists():
+        parser.error(f"Input folder not found: {input_dir}")
+
+    if args.model_memory_mb is not None:
+        registry.set_memory_budget(args.model_memory_mb)
+
+    write_intermediate = not args.no_intermediate_files
+    argv = stage_argv(args)
+    timings = {}
+
+    # With intermediate files each stage streams its input from the previous stage's
+    # JSONL output; without them the records are handed over in memory
+    raw_items = None
+    if not args.skip_fetch:
+        started = time.perf_counter()
+        fetched = fetch_reddit.run(fetch_reddit.parse_args(argv), write_output=write_intermediate)
+        raw_items = None if write_intermediate else fetched
+        timings["fetch"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    processed = process_reddit_posts.run(process_reddit_posts.parse_args(argv + checkpoint_argv(args)), raw_items=raw_items,
+                                         write_output=write_intermediate)
+    timings["process"] = time.perf_counter() - started
+    if processed is None:
+        sys.exit(1)
+    enriched = None if write_intermediate else processed
+    del raw_items, processed
+
+    started = time.perf_counter()
+    labeled = analyze_sentiment.run(
+        analyze_sentiment.parse_args(argv + table_argv(args) + checkpoint_argv(args)),
+        posts=enriched,
+        write_output=write_intermediate,
+    )
+    timings["sentiment"] = time.perf_counter() - started
+    del enriched
+
+    if not labeled:
+        print("[Pipeline] No study-related posts to classify; skipping the topics stage.", flush=True)
+    else:
+        started = time.perf_counter()
+        analyze_topics.run(analyze_topics.parse_args(argv + table_argv(args) + checkpoint_argv(args)), posts=labeled)
+        timings["topics"] = time.perf_counter() - started
+
+    summary = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in timings.items())
+    print(f"[Pipeline] Finished: {summary}", flush=True)
+    log_memory_report("Pipeline")
+
+
+if __name__ == "__main__":
+    main()
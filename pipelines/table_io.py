@@ -0,0 +1,144 @@
+import os
+import shutil
+from pathlib import Path
+
+TABLE_FORMATS = ["csv", "parquet"]
+PARTITION_CHOICES = ["none", "subreddit", "month"]
+
+# Column added for --partition-by month: "YYYY-MM" of created_utc
+MONTH_COLUMN = "created_month"
+
+# Low-cardinality label columns, stored dictionary-encoded in Parquet
+LABEL_COLUMNS = [
+    "type",
+    "subreddit",
+    "query",
+    "lang",
+    "sentiment_cardiff",
+    "sentiment_hartmann",
+    "sentiment_bert_emotion",
+    "sentiment_student",
+    "sentiment_majority",
+    "sentiment_models_run",
+    "degree_type",
+    "main_aspect",
+]
+
+# Read as strings from CSV so ids such as "1e5abc" are not parsed as numbers
+_STRING_COLUMNS = {"id": str, "post_id": str}
+
+
+def table_format_error(table_format: str) -> str | None:
+    """Why table_format cannot be written here, or None when it can."""
+    if table_format not in TABLE_FORMATS:
+        return f"Unknown output format '{table_format}' (choose from {', '.join(TABLE_FORMATS)})"
+    if table_format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return "Parquet output needs the pyarrow package: pip install pyarrow"
+    return None
+
+
+def table_path(directory, stem: str, table_format: str = "csv") -> Path:
+    """stem.csv, or stem.parquet (a file, or a folder of partitions)."""
+    return Path(directory) / f"{stem}.{table_format}"
+
+
+def find_table(directory, stem: str) -> Path | None:
+    """The newest existing stem.parquet or stem.csv in directory, or None."""
+    existing = [p for p in (table_path(directory, stem, f) for f in TABLE_FORMATS) if p.exists()]
+    if not existing:
+        return None
+    return max(existing, key=lambda p: p.stat().st_mtime_ns)
+
+
+def partitioning_of(path) -> str:
+    """The partition_by a table at path was written with: 'none', 'subreddit' or 'month'."""
+    path = Path(path)
+    if not path.is_dir():
+        return "none"
+    names = [p.name for p in path.iterdir() if p.is_dir()]
+    if any(name.startswith(f"{MONTH_COLUMN}=") for name in names):
+        return "month"
+    if any(name.startswith("subreddit=") for name in names):
+        return "subreddit"
+    return "none"
+
+
+def _partition_column(df, partition_by: str) -> str | None:
+    if partition_by == "none":
+        return None
+    if partition_by == "subreddit":
+        return "subreddit"
+
+    import pandas as pd
+
+    created = pd.to_datetime(pd.to_numeric(df["created_utc"], errors="coerce"), unit="s", utc=True)
+    df[MONTH_COLUMN] = created.dt.strftime("%Y-%m").fillna("unknown")
+    return MONTH_COLUMN
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def write_table(df, directory, stem: str, table_format: str = "csv", partition_by: str = "none") -> Path:
+    """
+    Writes df as stem.csv or stem.parquet in directory and returns the path.
+    Parquet stores the label columns dictionary-encoded; with partition_by
+    'subreddit' or 'month' it is a folder with one sub-folder per value.
+    Readers use find_table, which picks the newest format written.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = table_path(directory, stem, table_format)
+    tmp_path = path.with_name(path.name + ".tmp")
+    _remove(tmp_path)
+
+    if table_format == "csv":
+        df.to_csv(tmp_path, index=False, encoding="utf-8")
+    else:
+        df = df.copy()
+        partition_column = _partition_column(df, partition_by)
+        if partition_column is not None:
+            df[partition_column] = df[partition_column].astype(object).fillna("unknown").astype(str)
+
+        for column in LABEL_COLUMNS:
+            if column in df.columns and column != partition_column:
+                df[column] = df[column].astype("category")
+
+        if partition_column is None:
+            df.to_parquet(tmp_path, engine="pyarrow", index=False)
+        else:
+            df.to_parquet(tmp_path, engine="pyarrow", index=False, partition_cols=[partition_column])
+
+    _remove(path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_table(path, columns=None):
+    """
+    Reads a table written by write_table into a DataFrame. With columns, only
+    those columns are read (columns missing from the file are skipped).
+    """
+    import pandas as pd
+
+    path = Path(path)
+    if path.suffix == ".parquet":
+        if columns is None:
+            return pd.read_parquet(path, engine="pyarrow")
+
+        import pyarrow.dataset as ds
+
+        available = set(ds.dataset(path, format="parquet", partitioning="hive").schema.names)
+        return pd.read_parquet(path, engine="pyarrow", columns=[c for c in columns if c in available])
+
+    wanted = None if columns is None else set(columns)
+    usecols = None if wanted is None else (lambda c: c in wanted)
+    dtype = {c: t for c, t in _STRING_COLUMNS.items() if columns is None or c in columns}
+    return pd.read_csv(path, usecols=usecols, dtype=dtype)
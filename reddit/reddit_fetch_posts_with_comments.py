@@ -1,9 +1,15 @@
 import argparse
+import hashlib
 import json
+import sys
 import time
 from pathlib import Path
 
-import praw
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from pipelines.jsonl_io import COMPRESSION_SUFFIXES, RecordWriter, compression_error, records_path
 
 
 def load_json_list(file_path, limit=None):
@@ -55,7 +61,20 @@ def word_count(text: str) -> int:
     return len(text.strip().split())
 
 
-def fetch_reddit_posts(queries, subreddits, output_dir: Path, reddit_cfg):
+def _post_key(post) -> bytes:
+    """Digest of a post's title and text, so duplicate detection does not keep every text in memory."""
+    return hashlib.sha1(f"{post.title.strip()}\0{post.selftext.strip()}".encode("utf-8")).digest()
+
+
+def fetch_reddit_posts(queries, subreddits, output_dir: Path, reddit_cfg, write_output: bool = True,
+                       compression: str = "none"):
+    """
+    Collects posts and their comments. With write_output the items are streamed
+    to raw/raw_posts.jsonl (.gz/.zst with compression) as they arrive and the
+    number written is returned; otherwise the items are returned as a list.
+    """
+    import praw
+
     reddit = praw.Reddit(
         client_id=reddit_cfg["client_id"],
         client_secret=reddit_cfg["client_secret"],
@@ -71,110 +90,133 @@ def fetch_reddit_posts(queries, subreddits, output_dir: Path, reddit_cfg):
 
     seen_post_keys = set()
     all_items = []
+    counts = {"post": 0, "comment": 0}
+
+    output_path = records_path(output_dir / "raw", "raw_posts", compression)
+    writer = RecordWriter(output_path) if write_output else None
+
+    def emit(item):
+        if writer is not None:
+            writer.write(item)
+        else:
+            all_items.append(item)
+        counts[item["type"]] += 1
+        n_items = counts["post"] + counts["comment"]
+        if n_items % progress_every_n_items == 0:
+            print(f"[Reddit] Collected {n_items} items so far...", flush=True)
 
     total_subreddits = len(subreddits)
     total_queries = len(queries)
     total_pairs = total_subreddits * total_queries
     pair_counter = 0
 
-    for subreddit_idx, subreddit in enumerate(subreddits, start=1):
-        print(f"[Reddit] Subreddit {subreddit_idx}/{total_subreddits}: r/{subreddit}", flush=True)
-
-        for query_idx, q in enumerate(queries, start=1):
-            pair_counter += 1
-            print(
-                f"[Reddit] Query {query_idx}/{total_queries} in r/{subreddit} "
-                f"(overall {pair_counter}/{total_pairs}): {q}",
-                flush=True,
-            )
-
-            try:
-                for post in reddit.subreddit(subreddit).search(q, sort="new", limit=search_limit):
-                    if not post.author or post.score < min_post_score:
-                        continue
-
-                    if word_count(post.selftext) < min_post_words:
-                        continue
-
-                    post_key = (post.title.strip(), post.selftext.strip())
-                    if post_key in seen_post_keys:
-                        continue
-                    seen_post_keys.add(post_key)
-
-                    all_items.append(
-                        {
-                            "id": post.id,
-                            "author": post.author.name,
-                            "title": post.title,
-                            "selftext": post.selftext,
-                            "subreddit": post.subreddit.display_name,
-                            "query": q,
-                            "score": post.score,
-                            "url": post.url,
-                            "created_utc": post.created_utc,
-                            "type": "post",
-                        }
-                    )
-
-                    if len(all_items) % progress_every_n_items == 0:
-                        print(f"[Reddit] Collected {len(all_items)} items so far...", flush=True)
-
-                    post.comments.replace_more(limit=0)
-                    for comment in post.comments.list():
-                        if not comment.author:
+    try:
+        for subreddit_idx, subreddit in enumerate(subreddits, start=1):
+            print(f"[Reddit] Subreddit {subreddit_idx}/{total_subreddits}: r/{subreddit}", flush=True)
+
+            for query_idx, q in enumerate(queries, start=1):
+                pair_counter += 1
+                print(
+                    f"[Reddit] Query {query_idx}/{total_queries} in r/{subreddit} "
+                    f"(overall {pair_counter}/{total_pairs}): {q}",
+                    flush=True,
+                )
+
+                try:
+                    for post in reddit.subreddit(subreddit).search(q, sort="new", limit=search_limit):
+                        if not post.author or post.score < min_post_score:
                             continue
-                        if word_count(comment.body) < min_comment_words:
+
+                        if word_count(post.selftext) < min_post_words:
+                            continue
+
+                        post_key = _post_key(post)
+                        if post_key in seen_post_keys:
                             continue
+                        seen_post_keys.add(post_key)
 
-                        all_items.append(
+                        emit(
                             {
-                                "id": comment.id,
-                                "post_id": post.id,
-                                "author": comment.author.name,
-                                "title": "",
-                                "selftext": comment.body,
+                                "id": post.id,
+                                "author": post.author.name,
+                                "title": post.title,
+                                "selftext": post.selftext,
                                 "subreddit": post.subreddit.display_name,
                                 "query": q,
-                                "score": comment.score,
-                                "url": f"https://reddit.com{comment.permalink}",
-                                "created_utc": comment.created_utc,
-                                "type": "comment",
+                                "score": post.score,
+                                "url": post.url,
+                                "created_utc": post.created_utc,
+                                "type": "post",
                             }
                         )
 
-                        if len(all_items) % progress_every_n_items == 0:
-                            print(f"[Reddit] Collected {len(all_items)} items so far...", flush=True)
-
-            except Exception as e:
-                print(f"[Reddit] Error on query '{q}' in r/{subreddit}: {e}", flush=True)
-
-            time.sleep(sleep_seconds)
-
-    raw_dir = output_dir / "raw"
-    raw_dir.mkdir(parents=True, exist_ok=True)
-
-    output_path = raw_dir / "raw_posts.json"
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(all_items, f, ensure_ascii=False, indent=2)
-
-    post_count = sum(1 for item in all_items if item.get("type") == "post")
-    comment_count = sum(1 for item in all_items if item.get("type") == "comment")
-
+                        post.comments.replace_more(limit=0)
+                        for comment in post.comments.list():
+                            if not comment.author:
+                                continue
+                            if word_count(comment.body) < min_comment_words:
+                                continue
+
+                            emit(
+                                {
+                                    "id": comment.id,
+                                    "post_id": post.id,
+                                    "author": comment.author.name,
+                                    "title": "",
+                                    "selftext": comment.body,
+                                    "subreddit": post.subreddit.display_name,
+                                    "query": q,
+                                    "score": comment.score,
+                                    "url": f"https://reddit.com{comment.permalink}",
+                                    "created_utc": comment.created_utc,
+                                    "type": "comment",
+                                }
+                            )
+
+                except Exception as e:
+                    print(f"[Reddit] Error on query '{q}' in r/{subreddit}: {e}", flush=True)
+
+                time.sleep(sleep_seconds)
+    except BaseException:
+        if writer is not None:
+            writer.close(commit=False)
+        raise
+
+    post_count, comment_count = counts["post"], counts["comment"]
+    if writer is None:
+        print(f"[Reddit] Collected {len(all_items)} items ({post_count} posts + {comment_count} comments)", flush=True)
+        return all_items
+
+    writer.close()
     print(
-        f"[Reddit] Saved {len(all_items)} items ({post_count} posts + {comment_count} comments) to '{output_path}'",
+        f"[Reddit] Saved {writer.count} items ({post_count} posts + {comment_count} comments) to '{output_path}'",
         flush=True,
     )
+    return writer.count
 
 
-def main():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--input-dir", required=True)
     parser.add_argument("--output-dir", required=True)
     parser.add_argument("--query-limit", type=int, default=None)
     parser.add_argument("--subreddit-limit", type=int, default=None)
     parser.add_argument("--reddit-search-limit", type=int, default=None)
-    args = parser.parse_args()
+    parser.add_argument("--compression", choices=list(COMPRESSION_SUFFIXES), default="none",
+                        help="Compress raw/raw_posts.jsonl with gzip or zstd")
+    args = parser.parse_args(argv)
 
+    error = compression_error(args.compression)
+    if error:
+        parser.error(error)
+    return args
+
+
+def run(args, write_output: bool = True):
+    """
+    Runs the fetch stage. Returns the number of items written, or the items
+    themselves with write_output=False.
+    """
     input_dir = Path(args.input_dir).resolve()
     output_dir = Path(args.output_dir).resolve()
 
@@ -198,12 +240,18 @@ def main():
 
     print(f"[Reddit] Loaded {len(queries)} queries and {len(subreddits)} subreddits.", flush=True)
 
-    fetch_reddit_posts(
+    return fetch_reddit_posts(
         queries=queries,
         subreddits=subreddits,
         output_dir=output_dir,
         reddit_cfg=reddit_cfg,
+        write_output=write_output,
+        compression=args.compression,
     )
 
+
+def main():
+    run(parse_args())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,31 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.batching import length_sorted_batches
+
+
+def test_every_index_is_batched_once():
+    lengths = [5, 1, 9, 3, 3, 7, 2]
+    batches = length_sorted_batches(lengths, batch_size=3)
+    flat = sorted(i for batch in batches for i in batch)
+    assert flat == list(range(len(lengths)))
+    assert all(len(batch) <= 3 for batch in batches)
+
+
+def test_batches_are_sorted_by_length():
+    lengths = [5, 1, 9, 3, 3, 7, 2]
+    batches = length_sorted_batches(lengths, batch_size=2)
+    order = [lengths[i] for batch in batches for i in batch]
+    assert order == sorted(lengths, reverse=True)
+
+
+def test_token_budget_limits_padded_size():
+    lengths = [100, 90, 80, 10, 10, 10, 10]
+    batches = length_sorted_batches(lengths, batch_size=32, max_batch_tokens=200)
+    for batch in batches:
+        assert max(lengths[i] for i in batch) * len(batch) <= 200 or len(batch) == 1
+
+
+def test_empty_input():
+    assert length_sorted_batches([], batch_size=4) == []
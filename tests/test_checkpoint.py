@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pipelines.checkpoint import CheckpointWriter, checkpoint_path, iter_checkpoint, load_checkpoint, open_checkpoint
+
+META = {"stage": "process", "chunk_tokens": 400}
+
+
+def _write(path, batches, append=False):
+    writer = CheckpointWriter(path, META, append=append)
+    for items, state in batches:
+        writer.add(items, state=state)
+    writer.close()
+
+
+def test_roundtrip_merges_state(tmp_path):
+    path = checkpoint_path(tmp_path, "process")
+    _write(path, [
+        ([{"type": "post", "id": "p1"}, {"type": "comment", "id": "c1"}], {"parent_map": {"p1": True}}),
+        ([{"type": "post", "id": "p2"}], {"parent_map": {"p2": False}}),
+    ])
+
+    state = load_checkpoint(path, META)
+    assert state["keys"] == {"post:p1", "comment:c1", "post:p2"}
+    assert state["parent_map"] == {"p1": True, "p2": False}
+    assert [item["id"] for item in iter_checkpoint(path)] == ["p1", "c1", "p2"]
+
+
+def test_other_settings_are_not_resumed(tmp_path):
+    path = checkpoint_path(tmp_path, "process")
+    _write(path, [([{"type": "post", "id": "p1"}], None)])
+
+    assert load_checkpoint(path, {**META, "chunk_tokens": 200}) is None
+    assert load_checkpoint(tmp_path / "missing.jsonl", META) is None
+
+
+def test_append_after_truncated_line(tmp_path):
+    path = checkpoint_path(tmp_path, "process")
+    _write(path, [([{"type": "post", "id": "p1"}], {"parent_map": {"p1": True}})])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"items": [{"type": "post", "id": "p2"')
+
+    assert load_checkpoint(path, META)["keys"] == {"post:p1"}
+
+    _write(path, [([{"type": "post", "id": "p3"}], {"parent_map": {"p3": False}})], append=True)
+    state = load_checkpoint(path, META)
+    assert state["keys"] == {"post:p1", "post:p3"}
+    assert state["parent_map"] == {"p1": True, "p3": False}
+
+
+def test_open_checkpoint_starts_over_without_resume(tmp_path):
+    path = checkpoint_path(tmp_path, "process")
+    _write(path, [([{"type": "post", "id": "p1"}], None)])
+
+    writer, state = open_checkpoint(tmp_path, "process", META, resume=True, tag="Process")
+    writer.close()
+    assert state["keys"] == {"post:p1"}
+
+    writer, state = open_checkpoint(tmp_path, "process", META, resume=False, tag="Process")
+    writer.discard()
+    assert state == {"keys": set()}
+    assert not path.exists()
@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from models.qa.entailment_cache import EntailmentCache
+
+
+def test_roundtrip_by_text_and_hypothesis(tmp_path):
+    cache = EntailmentCache(tmp_path / "nli.sqlite")
+    cache.put_many("bart", [(("post text", "This example is food."), [0.1, -1.0, 2.5])])
+
+    found = cache.get_many("bart", [
+        ("post text", "This example is food."),
+        ("post text", "This example is sports."),
+    ])
+    assert list(found) == [("post text", "This example is food.")]
+    np.testing.assert_allclose(found[("post text", "This example is food.")], [0.1, -1.0, 2.5], rtol=1e-6)
+    assert cache.hits == 1 and cache.misses == 1
+    cache.close()
+
+
+def test_model_id_is_part_of_the_key(tmp_path):
+    cache = EntailmentCache(tmp_path / "nli.sqlite")
+    cache.put_many("bart", [(("t", "h"), [1.0, 2.0, 3.0])])
+    assert cache.get_many("other-model", [("t", "h")]) == {}
+    cache.close()
+
+
+def test_persists_across_instances(tmp_path):
+    path = tmp_path / "nli.sqlite"
+    cache = EntailmentCache(path)
+    cache.put_many("bart", [(("t", "h"), [1.0, 2.0, 3.0])])
+    cache.close()
+
+    reopened = EntailmentCache(path)
+    assert ("t", "h") in reopened.get_many("bart", [("t", "h")])
+    assert len(reopened) == 1
+    reopened.close()
@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+
+import pytest
+from pipelines.jsonl_io import RecordWriter, find_records, read_records, records_path, write_records
+
+RECORDS = [
+    {"id": "p1", "type": "post", "selftext": "Grüezi mitenand\nsecond line"},
+    {"id": "c1", "type": "comment", "post_id": "p1", "selftext": "Merci"},
+]
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_roundtrip(tmp_path, compression):
+    path = records_path(tmp_path, "raw_posts", compression)
+    assert write_records(path, iter(RECORDS)) == 2
+    assert list(read_records(path)) == RECORDS
+
+
+def test_zstd_roundtrip(tmp_path):
+    pytest.importorskip("zstandard")
+    path = records_path(tmp_path, "raw_posts", "zstd")
+    write_records(path, RECORDS)
+    assert list(read_records(path)) == RECORDS
+
+
+def test_legacy_json_array_is_readable(tmp_path):
+    path = tmp_path / "raw_posts.json"
+    path.write_text(json.dumps(RECORDS, indent=2), encoding="utf-8")
+
+    assert find_records(tmp_path, "raw_posts") == path
+    assert list(read_records(path)) == RECORDS
+
+
+def test_find_records_prefers_newest_file(tmp_path):
+    legacy = tmp_path / "raw_posts.json"
+    legacy.write_text("[]", encoding="utf-8")
+    os.utime(legacy, ns=(1, 1))
+    path = records_path(tmp_path, "raw_posts", "gzip")
+    write_records(path, RECORDS)
+
+    assert find_records(tmp_path, "raw_posts") == path
+    assert find_records(tmp_path, "processed_posts") is None
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    path = records_path(tmp_path, "raw_posts")
+    write_records(path, RECORDS)
+
+    with pytest.raises(RuntimeError):
+        with RecordWriter(path) as writer:
+            writer.write({"id": "partial"})
+            raise RuntimeError("fetch interrupted")
+
+    assert list(read_records(path)) == RECORDS
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["raw_posts.jsonl"]
+
+
+def test_ordered_batches_defers_comments_before_their_post():
+    from pipelines.process_reddit_posts import ordered_batches
+
+    items = [
+        {"id": "c0", "type": "comment", "post_id": "p2"},
+        {"id": "p1", "type": "post"},
+        {"id": "c1", "type": "comment", "post_id": "p1"},
+        {"id": "p2", "type": "post"},
+    ]
+    batches = list(ordered_batches(iter(items), batch_size=2))
+    assert [[item["id"] for item in batch] for batch in batches] == [["p1", "c1"], ["p2"], ["c0"]]
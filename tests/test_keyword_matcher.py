@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from models.qa.keyword_matcher import KeywordMatcher
+
+DEGREE_KEYWORDS = {
+    "bachelor studies": ["bachelor", "undergraduate", "bsc", "ba"],
+    "master studies": ["master", "graduate program", "msc", "ma"],
+    "phd studies": ["phd", "doctoral", "doctorate", "dphil"],
+}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("I want to start my bachelor in Switzerland.", "bachelor studies"),
+    ("Considering an MSc program at EPFL.", "master studies"),
+    ("I am applying for a doctoral program.", "phd studies"),
+    ("I live in Basel and make cheese.", None),          # 'ba'/'ma' inside words
+    ("Is a BA enough to find a job?", "bachelor studies"),
+])
+def test_whole_word_matching(text, expected):
+    matcher = KeywordMatcher(DEGREE_KEYWORDS, word_boundary=True)
+    assert matcher.first_label(text) == expected
+
+
+def test_substring_mode_matches_old_loop():
+    matcher = KeywordMatcher(DEGREE_KEYWORDS, word_boundary=False)
+    text = "I live in Basel and make cheese."
+    assert matcher.first_label(text) == "bachelor studies"
+    assert matcher.match_labels(text) == {"bachelor studies", "master studies"}
+
+
+def test_overlapping_keywords_from_different_labels():
+    matcher = KeywordMatcher({"a": ["undergraduate"], "b": ["graduate"]}, word_boundary=False)
+    assert matcher.match_labels("an undergraduate course") == {"a", "b"}
+
+
+def test_prefix_keywords_respect_boundaries():
+    matcher = KeywordMatcher({"a": ["work"], "b": ["work experience"]}, word_boundary=True)
+    assert matcher.match_labels("some work experience") == {"a", "b"}
+    assert matcher.match_labels("working abroad") == set()
+
+
+def test_first_label_follows_config_order():
+    matcher = KeywordMatcher({"x": ["zurich"], "y": ["tuition"]})
+    assert matcher.first_label("Tuition in Zurich is high") == "x"
+
+
+def test_empty_matcher():
+    matcher = KeywordMatcher({})
+    assert matcher.match_labels("anything") == set()
+    assert matcher.first_label("anything") is None
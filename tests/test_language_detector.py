@@ -57,3 +57,18 @@ def test_invalid_input_returns_unknown(text):
     print(f"⚠️ '{text}' -> Detected: {label}, Confidence: {confidence:.2f}")
     assert label == "unknown", f"Expected 'unknown', got {label} (confidence={confidence:.2f}) for: {text}"
 
+
+# === Batched detection must match the single-text API ===
+
+def test_detect_languages_matches_single():
+    texts = [
+        "Ich möchte in der Schweiz studieren.",
+        "",
+        "Je veux étudier en Suisse.",
+        "This is an English sentence.",
+        "Voglio studiare in Svizzera.",
+    ]
+    labels, confidences = language_detector.detect_languages(texts, batch_size=2)
+    assert len(labels) == len(texts) and len(confidences) == len(texts)
+    for text, label in zip(texts, labels):
+        assert label == language_detector.detect_language(text), f"Batch mismatch for: {text}"
@@ -0,0 +1,122 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import shutil
+from pathlib import Path
+
+from pipelines.manifest import ResultManifest
+from pipelines.provenance import FieldSource
+
+CONFIG_PATH = Path(__file__).resolve().parents[1] / "data_input" / "studying_in_switzerland" / "topic_classifier_config.json"
+
+
+def test_fields_are_reused_while_provenance_matches(tmp_path):
+    manifest = ResultManifest(tmp_path / "manifest.sqlite")
+    manifest.put_fields("topics", [
+        ("post:p1", "main_aspect", "k1", "housing"),
+        ("post:p1", "degree_type", "k2", "master studies"),
+        ("post:p2", "main_aspect", "k3", "costs"),
+    ])
+
+    found = manifest.get_fields("topics", {
+        "post:p1": {"main_aspect": "k1", "degree_type": "changed"},
+        "post:p2": {"main_aspect": "k3"},
+        "post:p3": {"main_aspect": "k4"},
+    })
+    assert found == {"post:p1": {"main_aspect": "housing"}, "post:p2": {"main_aspect": "costs"}}
+    assert manifest.stats()["hits"] == 2
+    assert manifest.stats()["misses"] == 2
+    assert manifest.get_fields("sentiment", {"post:p1": {"main_aspect": "k1"}}) == {}
+    manifest.close()
+
+
+def test_refresh_computes_only_stale_records(tmp_path):
+    path = tmp_path / "manifest.sqlite"
+    source = FieldSource(["main_aspect"], {"nli": "v1"}, {"aspect_keywords": {"costs": ["rent"]}})
+    computed = []
+
+    def classify(records):
+        computed.extend(record["text"] for record in records)
+        for record in records:
+            record["main_aspect"] = record["text"].upper()
+
+    records = [{"text": "rent"}, {"text": "exams"}]
+    manifest = ResultManifest(path)
+    manifest.refresh("topics", source.fields, records, ["post:p1", "post:p2"],
+                     [source.key(r["text"]) for r in records], classify)
+    manifest.close()
+
+    computed.clear()
+    records = [{"text": "rent"}, {"text": "exams, edited"}]
+    manifest = ResultManifest(path)
+    stale = manifest.refresh("topics", source.fields, records, ["post:p1", "post:p2"],
+                             [source.key(r["text"]) for r in records], classify)
+    assert stale == 1
+    assert computed == ["exams, edited"]
+    assert [record["main_aspect"] for record in records] == ["RENT", "EXAMS, EDITED"]
+
+    other_config = FieldSource(["main_aspect"], {"nli": "v1"}, {"aspect_keywords": {"costs": ["rent", "fees"]}})
+    assert other_config.key("rent") != source.key("rent")
+    swapped_model = FieldSource(["main_aspect"], {"nli": "v2"}, {"aspect_keywords": {"costs": ["rent"]}})
+    assert swapped_model.key("rent") != source.key("rent")
+    manifest.close()
+
+
+def test_enrich_changed_recomputes_only_stale_fields(tmp_path, monkeypatch):
+    from pipelines import process_reddit_posts as process
+
+    calls = {"lid": 0, "translate": 0, "topic": 0}
+
+    def detect_languages(texts, max_tokens):
+        calls["lid"] += len(texts)
+        return ["de"] * len(texts), [0.9] * len(texts)
+
+    def translate_batch(items, **kwargs):
+        calls["translate"] += len(items)
+        return [text.upper() for text, _ in items]
+
+    def is_about_main_topic_many(texts):
+        calls["topic"] += len(texts)
+        return [True] * len(texts)
+
+    monkeypatch.setattr(process.language_detector, "detect_languages", detect_languages)
+    monkeypatch.setattr(process.translator, "translate_batch", translate_batch)
+    monkeypatch.setattr(process.topic_classifier, "is_about_main_topic_many", is_about_main_topic_many)
+    # Config loads below must not leak into other tests
+    monkeypatch.setattr(process.topic_classifier, "_CONFIG", dict(process.topic_classifier._CONFIG))
+
+    config = json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+    shutil.copy(CONFIG_PATH, tmp_path / "topic_classifier_config.json")
+    process.topic_classifier.load_topic_classifier_config(tmp_path)
+
+    items = [
+        {"type": "post", "id": "p1", "title": "Studium", "selftext": "in Zürich"},
+        {"type": "comment", "id": "c1", "post_id": "p1", "selftext": "Gleich hier"},
+    ]
+    manifest = ResultManifest(tmp_path / "manifest.sqlite")
+
+    def enrich():
+        for key in calls:
+            calls[key] = 0
+        batch = [dict(item) for item in items]
+        process.enrich_changed(batch, {}, manifest, process.field_sources())
+        return batch
+
+    enrich()
+    assert calls == {"lid": 2, "translate": 2, "topic": 1}
+
+    config["aspect_keywords"]["job opportunities after graduation"].append("salary")
+    (tmp_path / "topic_classifier_config.json").write_text(json.dumps(config), encoding="utf-8")
+    process.topic_classifier.load_topic_classifier_config(tmp_path)
+    batch = enrich()
+    assert calls == {"lid": 0, "translate": 0, "topic": 0}
+    assert [item["is_about_study"] for item in batch] == [True, True]
+
+    config["candidate_labels"].append("weather")
+    (tmp_path / "topic_classifier_config.json").write_text(json.dumps(config), encoding="utf-8")
+    process.topic_classifier.load_topic_classifier_config(tmp_path)
+    enrich()
+    assert calls == {"lid": 0, "translate": 0, "topic": 1}
+    manifest.close()
@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import packing
+
+
+def _model_dir(tmp_path):
+    model_dir = tmp_path / "cardiff"
+    model_dir.mkdir()
+    (model_dir / "config.json").write_text("{}")
+    (model_dir / "pytorch_model.bin").write_bytes(b"weights")
+    return model_dir
+
+
+def _pack(model_dir):
+    packed_dir = model_dir / packing.PACKED_DIRNAME
+    packed_dir.mkdir()
+    (packed_dir / "model.safetensors").write_bytes(b"packed")
+    packing.write_manifest(model_dir, {
+        "dtype": "float32",
+        "source_fingerprint": packing.source_fingerprint(model_dir),
+        "files": {"model.safetensors": {"sha256": packing.file_sha256(packed_dir / "model.safetensors"), "bytes": 6}},
+    })
+    return packed_dir
+
+
+def test_unpacked_model_resolves_to_original(tmp_path):
+    model_dir = _model_dir(tmp_path)
+    assert packing.packed_path(model_dir) is None
+    assert packing.resolve_model_path(str(model_dir)) == (str(model_dir), None)
+
+
+def test_packed_model_resolves_to_pack(tmp_path):
+    model_dir = _model_dir(tmp_path)
+    packed_dir = _pack(model_dir)
+
+    path, manifest = packing.resolve_model_path(str(model_dir))
+    assert path == str(packed_dir).replace("\\", "/")
+    assert manifest["dtype"] == "float32"
+
+
+def test_changed_source_weights_invalidate_pack(tmp_path):
+    model_dir = _model_dir(tmp_path)
+    _pack(model_dir)
+
+    (model_dir / "pytorch_model.bin").write_bytes(b"new weights")
+    assert packing.packed_path(model_dir) is None
+
+
+def test_missing_packed_file_invalidates_pack(tmp_path):
+    model_dir = _model_dir(tmp_path)
+    packed_dir = _pack(model_dir)
+
+    (packed_dir / "model.safetensors").unlink()
+    assert packing.packed_path(model_dir) is None
+
+
+def test_packing_can_be_disabled(tmp_path, monkeypatch):
+    model_dir = _model_dir(tmp_path)
+    _pack(model_dir)
+
+    monkeypatch.setenv(packing.USE_PACKED_ENV_VAR, "0")
+    assert packing.packed_path(model_dir) is None
+
+
+def test_weight_files_ignore_packed_folder(tmp_path):
+    model_dir = _model_dir(tmp_path)
+    _pack(model_dir)
+    assert [f.name for f in packing.weight_files(model_dir)] == ["pytorch_model.bin"]
+
+
+def test_registry_version_follows_packed_dtype(tmp_path):
+    from models.registry import ModelRegistry
+
+    model_dir = _model_dir(tmp_path)
+    registry = ModelRegistry()
+    registry.register("cardiff", lambda device: None, path=str(model_dir))
+    unpacked = registry.version("cardiff")
+
+    _pack(model_dir)
+    packed = registry.version("cardiff")
+    manifest = packing.read_manifest(model_dir)
+    packing.write_manifest(model_dir, {**manifest, "dtype": "float16"})
+
+    assert len({unpacked, packed, registry.version("cardiff")}) == 3
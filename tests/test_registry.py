@@ -0,0 +1,145 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import subprocess
+import threading
+
+import pytest
+import torch
+from models.registry import ModelRegistry, module_bytes
+
+
+def _linear_loader(calls):
+    def load(device):
+        calls.append(device)
+        return None, torch.nn.Linear(4, 2).to(device)
+    return load
+
+
+def test_loads_on_first_use_only():
+    registry = ModelRegistry(device="cpu")
+    calls = []
+    registry.register("tiny", _linear_loader(calls))
+
+    assert not registry.is_loaded("tiny")
+    first = registry.get("tiny")
+    second = registry.get("tiny")
+
+    assert first is second
+    assert calls == [torch.device("cpu")]
+    stats = registry.stats()["tiny"]
+    assert stats["loaded"] and stats["loads"] == 1
+    assert stats["bytes"] == (4 * 2 + 2) * 4
+
+
+def test_unload_and_reload():
+    registry = ModelRegistry(device="cpu")
+    calls = []
+    registry.register("tiny", _linear_loader(calls))
+
+    registry.get("tiny")
+    assert registry.unload("tiny")
+    assert not registry.unload("tiny")
+    assert not registry.is_loaded("tiny")
+
+    registry.get("tiny")
+    assert len(calls) == 2
+    assert registry.stats()["tiny"]["loads"] == 2
+
+
+def test_concurrent_get_loads_once():
+    registry = ModelRegistry(device="cpu")
+    calls = []
+    registry.register("tiny", _linear_loader(calls))
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("tiny"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_unknown_model():
+    with pytest.raises(KeyError):
+        ModelRegistry(device="cpu").get("missing")
+
+
+def test_module_bytes_walks_containers():
+    a, b = torch.nn.Linear(2, 2), torch.nn.Linear(3, 1)
+    assert module_bytes({"x": (a, None), "y": [b]}) == module_bytes(a) + module_bytes(b)
+
+
+def test_importing_model_modules_does_not_load_weights():
+    code = (
+        "from models.registry import registry\n"
+        "from models.language import language_detector\n"
+        "from models.translation import translator\n"
+        "from models.qa import topic_classifier\n"
+        "from models.sentiment import cardiff, hartmann, bert_emotion\n"
+        "print(registry.loaded())\n"
+    )
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def _sized_loader(n_features):
+    # Linear(n, 1) without bias holds n float32 parameters
+    return lambda device: (None, torch.nn.Linear(n_features, 1, bias=False).to(device))
+
+
+def test_budget_evicts_least_recently_used():
+    registry = ModelRegistry(device="cpu", budget_bytes=250 * 4)
+    for name in ("a", "b", "c"):
+        registry.register(name, _sized_loader(100))
+
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")      # b is now the least recently used
+    registry.get("c")
+
+    assert registry.loaded() == ["a", "c"]
+    assert registry.stats()["b"]["evictions"] == 1
+    assert registry.resident_bytes() <= registry.budget_bytes
+
+
+def test_evicted_model_reloads_transparently():
+    registry = ModelRegistry(device="cpu", budget_bytes=150 * 4)
+    registry.register("a", _sized_loader(100))
+    registry.register("b", _sized_loader(100))
+
+    registry.get("a")
+    registry.get("b")
+    tokenizer, model = registry.get("a")
+
+    assert model.weight.shape == (1, 100)
+    assert registry.stats()["a"]["loads"] == 2
+    assert registry.loaded() == ["a"]
+
+
+def test_model_larger_than_budget_loads_alone():
+    registry = ModelRegistry(device="cpu", budget_bytes=50 * 4)
+    registry.register("small", _sized_loader(10))
+    registry.register("big", _sized_loader(100))
+
+    registry.get("small")
+    registry.get("big")
+
+    assert registry.loaded() == ["big"]
+    assert registry.memory_report()["evictions"] == 1
+
+
+def test_lowering_the_budget_evicts():
+    registry = ModelRegistry(device="cpu")
+    registry.register("a", _sized_loader(100))
+    registry.register("b", _sized_loader(100))
+    registry.get("a")
+    registry.get("b")
+
+    registry.set_memory_budget(100 * 4 / 2 ** 20)
+    assert registry.loaded() == ["b"]
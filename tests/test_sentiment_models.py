@@ -55,3 +55,116 @@ def test_all_models_agree_on_negative():
     for name, model in MODELS.items():
         mood = model.classify(text)
         assert mood == "Negative", f"{name} classified as {mood}, expected Negative"
+
+# === Batched classification must match the scalar path ===
+
+@pytest.mark.parametrize("name", sorted(MODELS))
+def test_classify_batch_matches_classify(name):
+    model = MODELS[name]
+    texts = [
+        "I love Swiss universities, they are amazing!",
+        "",
+        "I'm extremely frustrated with the Swiss visa process.",
+        "The semester starts in September.",
+        "Studying abroad makes me anxious. " * 40,  # long text, gets truncated
+    ]
+    assert model.classify_batch(texts, batch_size=2) == [model.classify(t) for t in texts]
+
+# === Early-exit ensemble must not change the majority ===
+
+def test_early_exit_keeps_majority():
+    from models.sentiment import ensemble
+
+    texts = [
+        "I love Swiss universities, they are amazing!",
+        "I'm extremely frustrated with the Swiss visa process.",
+        "The semester starts in September.",
+        "Housing is expensive but the lectures are great.",
+    ]
+    full = ensemble.run_ensemble(texts, early_exit=False)
+    fast = ensemble.run_ensemble(texts, early_exit=True)
+
+    assert fast["majority"] == full["majority"]
+    assert full["skipped"] == 0
+    for ran in fast["models_run"]:
+        assert len(ran) in (2, 3)
+
+# === Parallel runner must match the serial ensemble ===
+
+def test_parallel_runner_matches_serial():
+    from models.sentiment import ensemble
+
+    texts = [
+        "I love Swiss universities, they are amazing!",
+        "I'm extremely frustrated with the Swiss visa process.",
+        "The semester starts in September.",
+        "Housing is expensive but the lectures are great.",
+        "",
+    ]
+    batches = [texts[:2], texts[2:4], texts[4:]]
+
+    runner = ensemble.ParallelEnsembleRunner(threads_per_model=1, max_pending=2)
+    try:
+        parallel = list(runner.run(batches))
+    finally:
+        runner.close()
+
+    assert len(parallel) == len(batches)
+    for batch, result in zip(batches, parallel):
+        serial = ensemble.run_ensemble(batch)
+        assert result["majority"] == serial["majority"]
+        assert result["labels"] == serial["labels"]
+    assert set(runner.report()["busy_seconds"]) == set(ensemble.DEFAULT_ORDER)
+
+# === Long-text windows ===
+
+def test_split_windows_cover_all_tokens():
+    from models.sentiment.batch_inference import split_windows
+
+    ids = list(range(1000))
+    windows = split_windows(ids, window_tokens=510, overlap=128)
+    assert all(len(w) <= 510 for w in windows)
+    assert windows[0][0] == 0 and windows[-1][-1] == 999
+    assert sorted(set(t for w in windows for t in w)) == ids
+    assert split_windows(ids[:10], window_tokens=510, overlap=128) == [ids[:10]]
+
+
+def test_aggregate_windows_weights_by_length():
+    import numpy as np
+    from models.sentiment.batch_inference import aggregate_windows, softmax
+
+    logits = np.array([[1.0, 0.0, 0.0], [0.0, 2.0, 0.0], [3.0, 0.0, 0.0]])
+    probs = aggregate_windows(logits, owners=[0, 0, 1], lengths=[10, 30, 5], n_texts=2, length_power=1.0)
+    expected = softmax(np.array([[0.25, 1.5, 0.0], [3.0, 0.0, 0.0]]))
+    np.testing.assert_allclose(probs, expected, rtol=1e-5)
+
+    uniform = aggregate_windows(logits, owners=[0, 0, 1], lengths=[10, 30, 5], n_texts=2, length_power=0.0)
+    np.testing.assert_allclose(uniform[0], softmax(np.array([[0.5, 1.0, 0.0]]))[0], rtol=1e-5)
+
+
+@pytest.mark.parametrize("name", sorted(MODELS))
+def test_long_text_mode_matches_truncation_for_short_texts(name):
+    model = MODELS[name]
+    texts = [
+        "I love Swiss universities, they are amazing!",
+        "",
+        "I'm extremely frustrated with the Swiss visa process.",
+    ]
+    assert model.classify_batch(texts, long_text=True) == model.classify_batch(texts)
+
+
+@pytest.mark.parametrize("name", sorted(MODELS))
+def test_long_text_mode_reads_past_the_first_window(name):
+    import numpy as np
+
+    model = MODELS[name]
+    # Over 512 tokens of praise, then an even longer negative tail that truncation never sees
+    text = "I love my classes here, they are wonderful. " * 70 + "I absolutely hate this, it is a terrible nightmare. " * 150
+    _, truncated = model.predict_batch([text])
+    _, long = model.predict_batch([text], long_text=True)
+
+    assert long.shape == truncated.shape == (1, 3)
+    assert not np.allclose(long, truncated, atol=1e-3)
+    # Columns are Negative/Neutral/Positive
+    assert long[0, 0] > truncated[0, 0]
+    assert long[0, 2] < truncated[0, 2]
@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import subprocess
+
+import pytest
+from tools.benchmark_startup import ENTRY_POINTS, HEAVY_MODULES, find_regressions
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _heavy_modules_after(code):
+    probe = code + f"\nimport sys\nprint([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_importing_pipelines_loads_no_ml_stack():
+    code = (
+        "from pipelines import analyze_sentiment, analyze_topics, process_reddit_posts, run_pipeline\n"
+        "from models.sentiment import ensemble\n"
+    )
+    assert _heavy_modules_after(code) == "[]"
+
+
+@pytest.mark.parametrize("name", sorted(ENTRY_POINTS))
+def test_help_exits_before_heavy_imports(name):
+    script = os.path.join(ROOT, ENTRY_POINTS[name])
+    code = (
+        "import contextlib, io, runpy, sys\n"
+        f"sys.argv = [{script!r}, '--help']\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    try:\n"
+        f"        runpy.run_path({script!r}, run_name='__main__')\n"
+        "    except SystemExit as e:\n"
+        "        assert e.code == 0\n"
+    )
+    assert _heavy_modules_after(code) == "[]"
+
+
+def test_find_regressions_flags_slowdowns_and_new_heavy_imports():
+    baseline = {"entry_points": {"sentiment": {"help_wall_seconds": 0.2, "heavy_imports": []}}}
+    current = {"entry_points": {"sentiment": {"help_wall_seconds": 2.0, "heavy_imports": ["torch"]}}}
+
+    problems = find_regressions(current, baseline, tolerance=0.25, min_seconds=0.05)
+    assert len(problems) == 2
+    assert find_regressions(baseline, baseline, tolerance=0.25, min_seconds=0.05) == []
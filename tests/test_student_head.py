@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from models.sentiment import student_head
+from models.sentiment.vote_policies import SENTIMENT_LABELS
+
+
+def _clusters(n_per_class=60, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(3, dim)) * 3
+    features = np.concatenate([c + rng.normal(size=(n_per_class, dim)) for c in centers])
+    features /= np.linalg.norm(features, axis=1, keepdims=True)
+    classes = np.repeat(np.arange(3), n_per_class)
+    return features, classes
+
+
+def test_head_learns_separable_classes():
+    features, classes = _clusters()
+    targets = np.eye(3)[classes]
+
+    weights, bias = student_head.train_head(features, targets, epochs=300)
+    probs = student_head.predict_head(weights, bias, features)
+
+    assert probs.shape == (len(classes), 3)
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0, rtol=1e-5)
+    assert (probs.argmax(axis=1) == classes).mean() > 0.95
+
+
+def test_soft_targets_are_accepted():
+    features, classes = _clusters()
+    targets = 0.5 * np.eye(3)[classes] + 0.5 / 3
+
+    weights, bias = student_head.train_head(features, targets, epochs=300)
+    probs = student_head.predict_head(weights, bias, features)
+    assert (probs.argmax(axis=1) == classes).mean() > 0.95
+    assert probs.max() < 0.99
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    weights = np.arange(12, dtype=np.float32).reshape(4, 3)
+    bias = np.array([0.1, 0.2, 0.3], dtype=np.float32)
+    path = tmp_path / "head.npz"
+
+    student_head.save_head(path, weights, bias, encoder_id="some/encoder")
+    head = student_head.load_head(path)
+
+    np.testing.assert_array_equal(head["weights"], weights)
+    np.testing.assert_array_equal(head["bias"], bias)
+    assert head["encoder_id"] == "some/encoder"
+    assert head["labels"] == SENTIMENT_LABELS
+
+
+def test_agreement_report():
+    student = ["Positive", "Negative", "Neutral", "Positive", "UNKNOWN"]
+    ensemble = ["Positive", "Negative", "Positive", "Positive", "Neutral"]
+
+    report = student_head.agreement_report(student, ensemble)
+
+    assert report["n"] == 4
+    assert report["agreement"] == pytest.approx(0.75)
+    assert report["per_label"]["Positive"] == {"support": 3, "agreement": pytest.approx(2 / 3)}
+    assert report["per_label"]["Neutral"]["support"] == 0
+    assert report["confusion"][2][1] == 1
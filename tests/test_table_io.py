@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from pipelines.table_io import MONTH_COLUMN, find_table, partitioning_of, read_table, write_table
+
+
+def _posts():
+    return pd.DataFrame([
+        {"id": "1e5", "subreddit": "zurich", "created_utc": 1704067200.0, "sentiment_majority": "Positive",
+         "translated_text": "I love it here.\nReally."},
+        {"id": "abc", "subreddit": "geneva", "created_utc": 1706745600.0, "sentiment_majority": "Negative",
+         "translated_text": "Rent is too high."},
+        {"id": "def", "subreddit": "zurich", "created_utc": 1706745600.0, "sentiment_majority": "Positive",
+         "translated_text": "Lectures are fine."},
+    ])
+
+
+def _sorted(df):
+    return df.sort_values("id").reset_index(drop=True)
+
+
+def test_csv_roundtrip_keeps_string_ids(tmp_path):
+    path = write_table(_posts(), tmp_path, "sentiment_posts")
+
+    assert path.name == "sentiment_posts.csv"
+    df = read_table(path)
+    assert df["id"].tolist() == ["1e5", "abc", "def"]
+    assert df["translated_text"][0] == "I love it here.\nReally."
+
+
+def test_csv_column_projection(tmp_path):
+    path = write_table(_posts(), tmp_path, "sentiment_posts")
+    assert list(read_table(path, columns=["translated_text"]).columns) == ["translated_text"]
+
+
+def test_parquet_labels_are_categorical(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = write_table(_posts(), tmp_path, "final_posts", table_format="parquet")
+
+    df = read_table(path)
+    assert isinstance(df["sentiment_majority"].dtype, pd.CategoricalDtype)
+    assert df["id"].tolist() == ["1e5", "abc", "def"]
+    assert list(read_table(path, columns=["id", "missing"]).columns) == ["id"]
+
+
+@pytest.mark.parametrize("partition_by, column", [("subreddit", "subreddit"), ("month", MONTH_COLUMN)])
+def test_partitioned_parquet(tmp_path, partition_by, column):
+    pytest.importorskip("pyarrow")
+    path = write_table(_posts(), tmp_path, "final_posts", table_format="parquet", partition_by=partition_by)
+
+    assert path.is_dir()
+    assert partitioning_of(path) == partition_by
+    df = _sorted(read_table(path))
+    assert df["translated_text"].tolist() == _sorted(_posts())["translated_text"].tolist()
+    if partition_by == "month":
+        assert df[column].astype(str).tolist() == ["2024-01", "2024-02", "2024-02"]
+
+
+def test_find_table_prefers_newest_format(tmp_path):
+    pytest.importorskip("pyarrow")
+    csv_path = write_table(_posts(), tmp_path, "final_posts")
+    os.utime(csv_path, ns=(1, 1))
+    parquet_path = write_table(_posts(), tmp_path, "final_posts", table_format="parquet")
+
+    assert find_table(tmp_path, "final_posts") == parquet_path
+    assert find_table(tmp_path, "sentiment_posts") is None
+
+
+def test_revote_joins_posts_and_comments_by_record_key(tmp_path):
+    pytest.importorskip("pyarrow")
+    from pipelines.revote_sentiment import revote_file
+
+    df = pd.DataFrame([
+        {"type": "post", "id": "abc", "sentiment_majority": "Positive"},
+        {"type": "comment", "id": "abc", "sentiment_majority": "Positive"},
+        {"type": "comment", "id": "xyz", "sentiment_majority": "Neutral"},
+    ])
+    path = write_table(df, tmp_path, "sentiment_posts", table_format="parquet")
+
+    assert revote_file(path, ["comment:abc", "post:abc"], ["Negative", "Neutral"], "sentiment_majority") == 3
+    assert read_table(path)["sentiment_majority"].astype(str).tolist() == ["Neutral", "Negative", "Neutral"]
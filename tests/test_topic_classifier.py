@@ -1,3 +1,7 @@
+import re
+from collections import Counter
+
+import numpy as np
 import pytest
 from models.qa import topic_classifier
 
@@ -64,3 +68,99 @@ def test_is_about_phd(text, expected):
 def test_get_main_aspect_mentioned(text, expected):
     result = topic_classifier.get_main_aspect_mentioned(text)
     assert result == expected, f"Expected {expected}, got {result} for: {text}"
+
+
+# ===== Tests for batched zero-shot scoring =====
+def test_classify_many_matches_pipeline():
+    texts = [
+        "I'm considering studying at ETH Zurich next year.",
+        "Let's go hiking in the Alps this summer.",
+        "Is it expensive to live as a student in Lausanne?",
+    ]
+    labels = ["studying in Switzerland", "tourism", "food"]
+    scores = topic_classifier.classify_many(texts, labels, batch_size=2)
+
+    assert scores.shape == (len(texts), len(labels))
+    for text, row in zip(texts, scores):
+        result = topic_classifier.classifier(text, candidate_labels=labels)
+        expected = dict(zip(result["labels"], result["scores"]))
+        for label, score in zip(labels, row):
+            assert score == pytest.approx(expected[label], abs=1e-4)
+
+
+def _counter_main_aspect(text, sentence_scores, labels, threshold=0.2):
+    """The per-post sentence vote as get_main_aspect did it before batching."""
+    sentences = re.split(r"[.!?]\s+", text.strip())
+    sentences = [s for s in sentences if len(s) > 5]
+
+    votes = Counter()
+    for sentence in sentences:
+        row = sentence_scores[sentence]
+        label_id = int(row.argmax())
+        score = float(row[label_id])
+        if score >= threshold:
+            votes[labels[label_id]] += score
+
+    if votes:
+        return max(votes, key=votes.get)
+    return "unknown"
+
+
+def test_aggregate_aspect_votes_matches_counter_vote():
+    labels = ["costs", "housing", "exams"]
+    sentence_scores = {
+        "Rent is steep": np.array([0.5, 0.25, 0.25]),
+        "Rooms are tiny": np.array([0.25, 0.5, 0.25]),
+        "Deposits too": np.array([0.75, 0.125, 0.125]),
+        "Exams are hard": np.array([0.125, 0.125, 0.75]),
+        "Quiet hours": np.array([0.25, 0.375, 0.375]),
+        "Nothing fits": np.array([0.0625, 0.125, 0.0625]),
+        "Short": np.array([0.0, 0.0, 1.0]),
+        "Ok": np.array([0.0, 0.0, 1.0]),
+    }
+    texts = [
+        # Tie between housing and costs: the label voted first wins
+        "Rooms are tiny. Rent is steep",
+        "Rent is steep. Rooms are tiny",
+        # Costs wins on its total, not on the single best sentence
+        "Rent is steep. Deposits too. Exams are hard. Rooms are tiny",
+        # Tied top scores within a row go to the first label
+        "Quiet hours! Rooms are tiny",
+        # Sentences below the threshold do not vote
+        "Nothing fits. Nothing fits",
+        # Sentences of five characters or less are dropped before voting
+        "Short. Ok. Rooms are tiny",
+        "Short. Ok",
+    ]
+
+    sentences, owners = [], []
+    for i, text in enumerate(texts):
+        text_sentences = topic_classifier._split_sentences(text)
+        sentences.extend(text_sentences)
+        owners.extend([i] * len(text_sentences))
+    assert "Short" not in sentences and "Ok" not in sentences
+
+    scores = np.stack([sentence_scores[s] for s in sentences]).astype(np.float32)
+    winners = topic_classifier._aggregate_aspect_votes(scores, np.asarray(owners), len(texts), 0.2)
+
+    batched = [labels[w] if w >= 0 else "unknown" for w in winners]
+    expected = [_counter_main_aspect(text, sentence_scores, labels) for text in texts]
+    assert batched == expected
+    assert batched == ["housing", "costs", "costs", "housing", "unknown", "housing", "unknown"]
+
+
+# ===== Tests for the embedding cascade =====
+def test_cascade_without_confident_texts_equals_nli():
+    texts = ["I'm considering studying at ETH Zurich next year.", "I love Rösti and other Swiss dishes."]
+    labels = ["studying in Switzerland", "food", "sports"]
+
+    cascade = topic_classifier.cascade_classify(texts, labels, margin_threshold=float("inf"))
+    assert cascade == pytest.approx(topic_classifier.classify_many(texts, labels))
+
+
+def test_cascade_report_shape():
+    texts = ["I'm considering studying at ETH Zurich next year.", "Let's go hiking in the Alps this summer."]
+    report = topic_classifier.cascade_report(texts, ["studying in Switzerland", "tourism"], [0.0, 1.0])
+
+    assert [row["escalation_rate"] for row in report] == [0.0, 1.0]
+    assert report[1]["agreement"] == 1.0
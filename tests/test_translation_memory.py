@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.translation.translation_memory import TranslationMemory, normalize_sentence
+
+
+def test_roundtrip_and_counters(tmp_path):
+    memory = TranslationMemory(tmp_path / "tm.sqlite")
+    memory.put_many("opus-de", "de", [("Danke im Voraus!", "Thanks in advance!")])
+
+    found = memory.get_many("opus-de", "de", ["Danke  im Voraus! ", "Hallo zusammen"])
+    assert found == {"Danke  im Voraus! ": "Thanks in advance!"}
+    assert memory.hits == 1 and memory.misses == 1
+    memory.close()
+
+
+def test_keys_include_model_and_language(tmp_path):
+    memory = TranslationMemory(tmp_path / "tm.sqlite")
+    memory.put_many("opus-de", "de", [("Bonjour", "Hello")])
+
+    assert memory.get_many("opus-fr", "fr", ["Bonjour"]) == {}
+    assert memory.get_many("opus-de", "fr", ["Bonjour"]) == {}
+    memory.close()
+
+
+def test_persists_across_instances(tmp_path):
+    path = tmp_path / "tm.sqlite"
+    memory = TranslationMemory(path)
+    memory.put_many("opus-it", "it", [("Ciao", "Hello")])
+    memory.close()
+
+    reopened = TranslationMemory(path)
+    assert reopened.get_many("opus-it", "it", ["Ciao"]) == {"Ciao": "Hello"}
+    reopened.close()
+
+
+def test_eviction_keeps_store_bounded(tmp_path):
+    memory = TranslationMemory(tmp_path / "tm.sqlite", max_entries=3)
+    for i in range(10):
+        memory.put_many("opus-de", "de", [(f"Satz {i}", f"Sentence {i}")])
+
+    assert len(memory) == 3
+    assert memory.get_many("opus-de", "de", ["Satz 9"]) == {"Satz 9": "Sentence 9"}
+    memory.close()
+
+
+def test_normalize_sentence():
+    assert normalize_sentence("  a \n b\t c ") == "a b c"
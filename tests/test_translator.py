@@ -23,3 +23,57 @@ def test_translation_accuracy(text, lang):
         expected_options = ACCEPTABLE_TRANSLATIONS.get(lang, [])
         assert any(opt.lower() in result.lower() for opt in expected_options), \
             f"❌ Unexpected translation for '{text}' ({lang}): got → '{result}'"
+
+
+def test_translate_batch_keeps_input_order():
+    items = [
+        ("Questa è una frase in italiano.", "it"),
+        ("This is already English.", "en"),
+        ("Das ist ein deutscher Satz.", "de"),
+        ("Je veux étudier en Suisse.", "fr"),
+        ("Das ist ein deutscher Satz.", "de"),
+    ]
+    results = translator.translate_batch(items, batch_size=2)
+
+    assert len(results) == len(items)
+    assert results[1] == "This is already English."
+    for (text, lang), result in zip(items, results):
+        if lang != "en":
+            assert any(opt.lower() in result.lower() for opt in ACCEPTABLE_TRANSLATIONS[lang]), \
+                f"❌ Unexpected batch translation for '{text}' ({lang}): got → '{result}'"
+
+
+def test_short_text_is_kept_whole():
+    text = "Ich studiere in Zürich. Die Mieten sind hoch.\nAber die Uni ist gut."
+    assert translator.split_into_chunks(text, "de", max_tokens=64) == [[text]]
+
+
+def test_long_text_is_packed_into_sentence_chunks():
+    translator.registry.unload(translator.model_name("de"))
+    sentence = "Das ist ein deutscher Satz."
+    text = " ".join([sentence] * 120)
+
+    chunks = [c for paragraph in translator.split_into_chunks(text, "de", max_tokens=64) for c in paragraph]
+    tokenizer = translator._tokenizer_for("de")
+    lengths = [len(ids) for ids in tokenizer(chunks, add_special_tokens=False)["input_ids"]]
+
+    assert 1 < len(chunks) < 120
+    assert max(lengths) <= 64
+    assert " ".join(chunks) == text
+    # Counting tokens only needs the tokenizer
+    assert not translator.registry.is_loaded(translator.model_name("de"))
+
+
+def test_overlong_sentence_is_split_on_words():
+    text = " ".join(["Wort"] * 200) + ". Kurzer Satz."
+    chunks = translator.split_into_chunks(text, "de", max_tokens=32)[0]
+    assert chunks[-1] == "Kurzer Satz."
+    assert " ".join(chunks) == text
+
+
+def test_long_text_is_translated_in_full():
+    sentence = "Das ist ein deutscher Satz."
+    text = " ".join([sentence] * 120)  # far beyond the Marian input window
+
+    result = translator.translate_batch([(text, "de")], chunk_tokens=64)[0]
+    assert result.lower().count("german sentence") == 120
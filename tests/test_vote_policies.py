@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from models.sentiment import vote_policies
+
+NAN = [np.nan, np.nan, np.nan]
+
+# 3 models x 4 items, columns Negative/Neutral/Positive
+PROBS = np.array([
+    [[0.1, 0.2, 0.7], [0.8, 0.1, 0.1], [0.3, 0.4, 0.3], [0.2, 0.2, 0.6]],
+    [[0.2, 0.2, 0.6], [0.6, 0.3, 0.1], [0.1, 0.2, 0.7], [0.5, 0.4, 0.1]],
+    [NAN,             NAN,             [0.9, 0.05, 0.05], [0.1, 0.8, 0.1]],
+], dtype=np.float32)
+VOTES = np.array([
+    [2, 0, 1, 2],
+    [2, 0, 2, 0],
+    [-1, -1, 0, 1],
+], dtype=np.int8)
+
+
+def test_majority_uses_model_votes():
+    assert vote_policies.majority(PROBS, VOTES)[:2] == ["Positive", "Negative"]
+
+
+def test_majority_three_way_tie_goes_to_largest_mass():
+    # item 2: votes Neutral/Positive/Negative; summed Negative mass 1.3 is the largest
+    assert vote_policies.majority(PROBS, VOTES)[2] == "Negative"
+
+
+def test_mean_ignores_skipped_models():
+    assert vote_policies.mean(PROBS)[0] == "Positive"
+
+
+def test_weighted_can_flip_the_decision():
+    # item 3: only the third model strongly says Neutral
+    assert vote_policies.weighted(PROBS, [0.0, 0.0, 1.0])[3] == "Neutral"
+    assert vote_policies.weighted(PROBS, [1.0, 0.0, 0.0])[3] == "Positive"
+
+
+def test_max_confidence():
+    assert vote_policies.max_confidence(PROBS) == ["Positive", "Negative", "Negative", "Neutral"]
+
+
+def test_all_models_missing_is_unknown():
+    probs = np.full((3, 1, 3), np.nan, dtype=np.float32)
+    votes = np.full((3, 1), -1, dtype=np.int8)
+    for policy in vote_policies.POLICIES:
+        assert vote_policies.apply_policy(policy, probs, votes, weights=[1, 1, 1]) == ["UNKNOWN"]
+
+
+def test_sidecar_roundtrip(tmp_path):
+    path = tmp_path / "probs.npz"
+    vote_policies.save_probabilities(path, ["a", "b", "c", "d"], ["m1", "m2", "m3"], PROBS, VOTES)
+    ids, names, probs, votes = vote_policies.load_probabilities(path)
+
+    assert ids == ["a", "b", "c", "d"]
+    assert names == ["m1", "m2", "m3"]
+    np.testing.assert_array_equal(np.isnan(probs), np.isnan(PROBS))
+    np.testing.assert_array_equal(votes, VOTES)
+
+
+def test_label_ids():
+    assert vote_policies.label_ids(["Positive", None, "Negative"]).tolist() == [2, -1, 0]
@@ -0,0 +1,91 @@
+import argparse
+import json
+import random
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from models.qa.keyword_matcher import KeywordMatcher
+from pipelines.jsonl_io import find_records, read_records
+
+
+def loop_first_label(text, keywords_by_label):
+    """The original per-label substring scan, kept as the benchmark baseline."""
+    text_lower = text.lower()
+    for label, keywords in keywords_by_label.items():
+        if any(kw in text_lower for kw in keywords):
+            return label
+    return None
+
+
+def load_texts(output_dir, sample_size):
+    processed_path = find_records(output_dir / "preprocessed", "processed_posts") if output_dir else None
+    if processed_path:
+        return [str(p.get("translated_text", "")) for p in islice(read_records(processed_path), sample_size)]
+
+    sentences = [
+        "I moved here last year and the first months were hard.",
+        "The people are friendly but it takes time to settle in.",
+        "Everything is organised differently than back home.",
+        "My master program at ETH is demanding but fair.",
+        "Rent in Zurich is way more expensive than I expected.",
+        "Most professors explain things well during the lectures.",
+    ]
+    rng = random.Random(0)
+    return [" ".join(rng.choices(sentences, k=rng.randint(1, 8))) for _ in range(sample_size)]
+
+
+def time_call(fn, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [fn(t) for t in texts]
+        best = min(best, time.perf_counter() - started)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input-dir", required=True)
+    parser.add_argument("--output-dir", default=None, help="Use translated texts from this output folder")
+    parser.add_argument("--sample-size", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cfg_path = Path(args.input_dir).resolve() / "topic_classifier_config.json"
+    if not cfg_path.exists():
+        raise FileNotFoundError(f"Missing file: {cfg_path}")
+
+    with open(cfg_path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+
+    output_dir = Path(args.output_dir).resolve() if args.output_dir else None
+    texts = load_texts(output_dir, args.sample_size)
+    print(f"[Benchmark] {len(texts)} texts", flush=True)
+
+    for field in ("degree_keywords", "aspect_keywords"):
+        keywords = cfg[field]
+        substring = KeywordMatcher(keywords, word_boundary=False)
+        whole_word = KeywordMatcher(keywords, word_boundary=True)
+
+        loop_time, loop_results = time_call(lambda t: loop_first_label(t, keywords), texts, args.repeat)
+        sub_time, sub_results = time_call(substring.first_label, texts, args.repeat)
+        word_time, word_results = time_call(whole_word.first_label, texts, args.repeat)
+
+        assert sub_results == loop_results, "Substring matcher disagrees with the keyword loop"
+        changed = sum(1 for a, b in zip(loop_results, word_results) if a != b)
+
+        print(f"[Benchmark] {field}:", flush=True)
+        print(f"  loop              {loop_time * 1000:8.1f} ms", flush=True)
+        print(f"  matcher (substr)  {sub_time * 1000:8.1f} ms  ({loop_time / max(sub_time, 1e-9):.1f}x)", flush=True)
+        print(f"  matcher (words)   {word_time * 1000:8.1f} ms  ({loop_time / max(word_time, 1e-9):.1f}x)", flush=True)
+        print(f"  word boundaries change {changed}/{len(texts)} keyword decisions", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Entry points whose startup is tracked: name -> script relative to the project root
+ENTRY_POINTS = {
+    "fetch": "reddit/reddit_fetch_posts_with_comments.py",
+    "process": "pipelines/process_reddit_posts.py",
+    "sentiment": "pipelines/analyze_sentiment.py",
+    "topics": "pipelines/analyze_topics.py",
+    "run_pipeline": "pipelines/run_pipeline.py",
+    "revote": "pipelines/revote_sentiment.py",
+    "train_student": "tools/train_sentiment_student.py",
+    "tune_cascade": "tools/tune_cascade.py",
+    "pack_models": "tools/pack_models.py",
+}
+
+# Modules that must not be imported before a script starts working
+HEAVY_MODULES = ["torch", "transformers", "pandas", "matplotlib", "praw"]
+
+# First-inference probes: name -> (module, call on that module); timed after the import, twice
+INFERENCE_PROBES = {
+    "language_detector": ("models.language.language_detector", "detect_languages(['Ich studiere in Zürich.'])"),
+    "translator_de": ("models.translation.translator", "translate('Ich studiere in Zürich.', 'de')"),
+    "sentiment_cardiff": ("models.sentiment.cardiff", "classify('I love studying here.')"),
+    "sentiment_hartmann": ("models.sentiment.hartmann", "classify('I love studying here.')"),
+    "sentiment_bert_emotion": ("models.sentiment.bert_emotion", "classify('I love studying here.')"),
+    "sentence_encoder": ("models.embedding.sentence_encoder", "encode(['I love studying here.'])"),
+    "topic_bart_mnli": ("models.qa.topic_classifier", "classify_many(['I love studying here.'], ['studying', 'travel'])"),
+}
+
+# Runs a script's main() with --help in the child and reports the heavy modules it pulled in
+_HELP_PROBE = """
+import contextlib, io, json, runpy, sys, time
+script = sys.argv[1]
+sys.argv = [script, "--help"]
+started = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit:
+        pass
+seconds = time.perf_counter() - started
+print(json.dumps({"seconds": seconds, "heavy": [m for m in %r if m in sys.modules]}))
+"""
+
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - started}}))
+"""
+
+_INFERENCE_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import {module} as m
+import_seconds = time.perf_counter() - started
+started = time.perf_counter()
+m.{call}
+first = time.perf_counter() - started
+started = time.perf_counter()
+m.{call}
+second = time.perf_counter() - started
+print(json.dumps({{"import_seconds": import_seconds, "first_call_seconds": first, "warm_call_seconds": second}}))
+"""
+
+
+def run_probe(code: str, *args) -> tuple[float, dict | None, str]:
+    """(wall seconds, JSON printed on the last stdout line or None, stderr tail) of a fresh interpreter."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", code, *args],
+        cwd=str(PROJECT_ROOT),
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    wall = time.perf_counter() - started
+
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        return wall, None, proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+    return wall, json.loads(lines[-1]), ""
+
+
+def benchmark_entry_points(names, repeat: int) -> dict:
+    """Best-of-repeat wall and in-process time of 'script --help', plus heavy modules it imported."""
+    results = {}
+    for name in names:
+        script = str(PROJECT_ROOT / ENTRY_POINTS[name])
+        best_wall, best = float("inf"), None
+        for _ in range(repeat):
+            wall, data, error = run_probe(_HELP_PROBE % HEAVY_MODULES, script)
+            if data is None:
+                results[name] = {"error": error}
+                break
+            if wall < best_wall:
+                best_wall, best = wall, data
+        else:
+            results[name] = {"help_wall_seconds": best_wall, "help_seconds": best["seconds"], "heavy_imports": best["heavy"]}
+    return results
+
+
+def benchmark_heavy_imports(repeat: int) -> dict:
+    """Cold import time of each heavy module on its own, for reference; None when not installed."""
+    results = {}
+    for module in HEAVY_MODULES:
+        times = []
+        for _ in range(repeat):
+            _, data, _ = run_probe(_IMPORT_PROBE.format(module=module))
+            if data is None:
+                break
+            times.append(data["seconds"])
+        results[module] = min(times) if times else None
+    return results
+
+
+def benchmark_inference(names) -> dict:
+    """Import, first-call (includes the model load) and warm-call time per model, each in a fresh process."""
+    results = {}
+    for name in names:
+        module, call = INFERENCE_PROBES[name]
+        _, data, error = run_probe(_INFERENCE_PROBE.format(root=str(PROJECT_ROOT), module=module, call=call))
+        results[name] = data if data is not None else {"error": error}
+    return results
+
+
+def find_regressions(current: dict, baseline: dict, tolerance: float, min_seconds: float) -> list[str]:
+    """
+    Timings in current that grew by more than tolerance (a fraction) over the
+    baseline, ignoring differences under min_seconds, plus scripts that now
+    import a heavy module at startup.
+    """
+    problems = []
+    for section in ("entry_points", "inference"):
+        for name, now in current.get(section, {}).items():
+            before = baseline.get(section, {}).get(name)
+            if not before or "error" in now or "error" in before:
+                continue
+            for key, value in now.items():
+                old = before.get(key)
+                if not isinstance(value, float) or not isinstance(old, float):
+                    continue
+                if value - old > min_seconds and value > old * (1.0 + tolerance):
+                    problems.append(f"{section}.{name}.{key}: {old:.3f}s -> {value:.3f}s")
+            added = sorted(set(now.get("heavy_imports", [])) - set(before.get("heavy_imports", [])))
+            if added:
+                problems.append(f"{section}.{name} now imports {', '.join(added)} at startup")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Track CLI startup and first-inference latency per entry point.")
+    parser.add_argument("--only", nargs="*", default=None, help="Entry points and model probes to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per startup measurement; the best is kept")
+    parser.add_argument("--skip-inference", action="store_true", help="Only measure startup, without loading models")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="Compare against results saved earlier with --output")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown over the baseline, as a fraction")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    known = set(ENTRY_POINTS) | set(INFERENCE_PROBES)
+    unknown = sorted(set(args.only or []) - known)
+    if unknown:
+        parser.error(f"Unknown names in --only: {', '.join(unknown)} (choose from {', '.join(sorted(known))})")
+    if args.baseline and not Path(args.baseline).exists():
+        parser.error(f"Baseline file not found: {args.baseline}")
+
+    entry_names = [n for n in ENTRY_POINTS if not args.only or n in args.only]
+    probe_names = [] if args.skip_inference else [n for n in INFERENCE_PROBES if not args.only or n in args.only]
+    repeat = max(1, args.repeat)
+
+    results = {"python": sys.version.split()[0], "measured_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+    results["heavy_imports"] = benchmark_heavy_imports(repeat)
+    for module, seconds in results["heavy_imports"].items():
+        shown = f"{seconds * 1000:8.0f} ms" if seconds is not None else "   not installed"
+        print(f"[Startup] import {module:24s} {shown}", flush=True)
+
+    results["entry_points"] = benchmark_entry_points(entry_names, repeat)
+    for name, row in results["entry_points"].items():
+        if "error" in row:
+            print(f"[Startup] {name:30s} failed: {row['error']}", flush=True)
+            continue
+        heavy = f"  imports {', '.join(row['heavy_imports'])}" if row["heavy_imports"] else ""
+        print(f"[Startup] {name + ' --help':30s} {row['help_wall_seconds'] * 1000:8.0f} ms{heavy}", flush=True)
+
+    if probe_names:
+        results["inference"] = benchmark_inference(probe_names)
+        for name, row in results["inference"].items():
+            if "error" in row:
+                print(f"[Startup] {name:30s} failed: {row['error']}", flush=True)
+                continue
+            print(f"[Startup] {name:30s} import {row['import_seconds'] * 1000:6.0f} ms, "
+                  f"first call {row['first_call_seconds']:6.2f}s, warm call {row['warm_call_seconds'] * 1000:6.0f} ms",
+                  flush=True)
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[Startup] Saved results to '{output_path}'", flush=True)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = find_regressions(results, baseline, args.tolerance, args.min_seconds)
+        for problem in problems:
+            print(f"[Startup] Regression: {problem}", flush=True)
+        if problems:
+            sys.exit(1)
+        print("[Startup] No regressions against the baseline", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,33 @@
 import argparse
+import sys
 from collections import Counter, defaultdict
 from pathlib import Path
 
-import matplotlib.pyplot as plt
-import pandas as pd
 import tkinter as tk
 from tkinter import messagebox, ttk
 
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from pipelines.table_io import find_table, read_table
+
 MAIN_LANGS = ["de", "en", "fr", "it"]
 
+# The only columns the dashboard uses; the rest of the final table is not read
+REQUIRED_COLUMNS = [
+    "is_about_study",
+    "type",
+    "author",
+    "title",
+    "selftext",
+    "created_utc",
+    "lang",
+    "sentiment_majority",
+    "main_aspect",
+    "degree_type",
+]
+
 
 def filter_data(df, allow_duplicates, allow_multiple_per_author, lang_order, sort_order, prioritize, source_mode):
     df = df[df["is_about_study"] == True]
@@ -34,6 +53,8 @@ def filter_data(df, allow_duplicates, allow_multiple_per_author, lang_order, sor
 
 
 def plot_pie_chart(title, labels, sizes):
+    import matplotlib.pyplot as plt
+
     plt.figure()
     plt.title(title)
     plt.pie(sizes, labels=labels, autopct="%1.1f%%", startangle=90)
@@ -42,6 +63,8 @@ def plot_pie_chart(title, labels, sizes):
 
 
 def plot_stacked_bar(title, breakdown):
+    import matplotlib.pyplot as plt
+
     aspects = list(breakdown.keys())
     sentiments = set()
     for asp in breakdown.values():
@@ -64,40 +87,28 @@ def plot_stacked_bar(title, breakdown):
 
 
 class FullSentimentApp:
-    def __init__(self, root, csv_path: Path):
+    def __init__(self, root, table_path: Path):
         self.root = root
         self.root.title("Full Sentiment Dashboard")
-        self.csv_path = csv_path
+        self.table_path = table_path
 
-        if not self.csv_path.exists():
-            messagebox.showerror("Missing file", f"Could not find:\n{self.csv_path}")
+        if not self.table_path.exists():
+            messagebox.showerror("Missing file", f"Could not find:\n{self.table_path}")
             self.root.after(100, self.root.destroy)
             return
 
         try:
-            self.data = pd.read_csv(self.csv_path)
+            self.data = read_table(self.table_path, columns=REQUIRED_COLUMNS)
         except Exception as e:
-            messagebox.showerror("Read error", f"Could not read CSV:\n{self.csv_path}\n\n{e}")
+            messagebox.showerror("Read error", f"Could not read table:\n{self.table_path}\n\n{e}")
             self.root.after(100, self.root.destroy)
             return
 
-        required_cols = {
-            "is_about_study",
-            "type",
-            "author",
-            "title",
-            "selftext",
-            "created_utc",
-            "lang",
-            "sentiment_majority",
-            "main_aspect",
-            "degree_type",
-        }
-        missing_cols = sorted(c for c in required_cols if c not in self.data.columns)
+        missing_cols = sorted(c for c in REQUIRED_COLUMNS if c not in self.data.columns)
         if missing_cols:
             messagebox.showerror(
                 "Missing columns",
-                "The final CSV is missing required columns:\n\n" + "\n".join(missing_cols),
+                "The final table is missing required columns:\n\n" + "\n".join(missing_cols),
             )
             self.root.after(100, self.root.destroy)
             return
@@ -244,12 +255,12 @@ def main():
     args = parser.parse_args()
 
     output_dir = Path(args.output_dir).resolve()
-    csv_path = output_dir / "final" / "final_posts.csv"
+    table_path = find_table(output_dir / "final", "final_posts") or output_dir / "final" / "final_posts.csv"
 
-    print(f"[Visualizer] Opening dashboard with file: {csv_path}", flush=True)
+    print(f"[Visualizer] Opening dashboard with file: {table_path}", flush=True)
 
     root = tk.Tk()
-    FullSentimentApp(root, csv_path)
+    FullSentimentApp(root, table_path)
     root.mainloop()
 
 
@@ -0,0 +1,171 @@
+import argparse
+import json
+import shutil
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from models.packing import (
+    PACKED_DIRNAME,
+    file_sha256,
+    packed_path,
+    read_manifest,
+    source_fingerprint,
+    weight_files,
+    write_manifest,
+)
+
+DTYPES = ["float32", "float16", "bfloat16"]
+
+
+def find_model_dirs(models_root: Path) -> list[Path]:
+    """Every models/*/local_model and models/*/local_models/* folder with a config.json."""
+    candidates = list(models_root.glob("*/local_model")) + list(models_root.glob("*/local_models/*"))
+    return sorted(p for p in candidates if p.is_dir() and (p / "config.json").exists())
+
+
+def model_class_for(model_dir: Path):
+    import transformers
+
+    with open(model_dir / "config.json", "r", encoding="utf-8") as f:
+        architectures = json.load(f).get("architectures") or ["AutoModel"]
+    return getattr(transformers, architectures[0])
+
+
+def time_load(model_class, path, **kwargs) -> float:
+    started = time.perf_counter()
+    model = model_class.from_pretrained(path, **kwargs)
+    elapsed = time.perf_counter() - started
+    del model
+    return elapsed
+
+
+def pack_model(model_dir: Path, dtype: str, benchmark: bool) -> dict:
+    """
+    Writes <model_dir>/packed: safetensors weights (cast to dtype), the
+    config and tokenizer files, and a manifest with hashes and load times.
+    """
+    import torch
+
+    model_class = model_class_for(model_dir)
+    packed_dir = model_dir / PACKED_DIRNAME
+    if packed_dir.exists():
+        shutil.rmtree(packed_dir)
+
+    model = model_class.from_pretrained(str(model_dir))
+    if dtype != "float32":
+        model = model.to(getattr(torch, dtype))
+    model.save_pretrained(str(packed_dir), safe_serialization=True)
+    del model
+
+    # Tokenizer, vocab and generation files are copied unchanged
+    weights = {f.name for f in weight_files(model_dir)}
+    for f in model_dir.iterdir():
+        if f.is_file() and f.name not in weights and not (packed_dir / f.name).exists():
+            shutil.copy2(f, packed_dir / f.name)
+
+    manifest = {
+        "architecture": model_class.__name__,
+        "dtype": dtype,
+        "source_fingerprint": source_fingerprint(model_dir),
+        "files": {
+            f.name: {"sha256": file_sha256(f), "bytes": f.stat().st_size}
+            for f in sorted(packed_dir.iterdir())
+            if f.is_file()
+        },
+        "packed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    if benchmark:
+        manifest["load_seconds"] = {
+            "original": time_load(model_class, str(model_dir)),
+            "packed": time_load(model_class, str(packed_dir), torch_dtype="auto"),
+        }
+
+    write_manifest(model_dir, manifest)
+    return manifest
+
+
+def verify_model(model_dir: Path) -> list[str]:
+    """Problems with an existing pack: stale source weights or hash mismatches."""
+    manifest = read_manifest(model_dir)
+    if manifest is None:
+        return ["not packed"]
+
+    problems = []
+    if manifest.get("source_fingerprint") != source_fingerprint(model_dir):
+        problems.append("original weights changed since packing")
+    for name, info in manifest.get("files", {}).items():
+        path = model_dir / PACKED_DIRNAME / name
+        if not path.exists():
+            problems.append(f"missing {name}")
+        elif file_sha256(path) != info["sha256"]:
+            problems.append(f"hash mismatch for {name}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert local models to memory-mapped safetensors packs.")
+    parser.add_argument("--models-root", default=str(PROJECT_ROOT / "models"))
+    parser.add_argument("--dtype", choices=DTYPES, default="float32",
+                        help="Precision of the packed weights; float16 is meant for CUDA, bfloat16 also runs on CPU")
+    parser.add_argument("--only", nargs="*", default=None, help="Pack only model folders whose path contains any of these")
+    parser.add_argument("--force", action="store_true", help="Repack models whose pack is still up to date")
+    parser.add_argument("--no-benchmark", action="store_true", help="Skip measuring original vs packed load times")
+    parser.add_argument("--verify", action="store_true", help="Check existing packs against their manifest hashes")
+    args = parser.parse_args()
+
+    models_root = Path(args.models_root).resolve()
+    model_dirs = find_model_dirs(models_root)
+    if args.only:
+        needles = [s.lower() for s in args.only]
+        model_dirs = [p for p in model_dirs if any(n in str(p).lower() for n in needles)]
+
+    if not model_dirs:
+        print(f"[Pack] No local models found under {models_root}", flush=True)
+        return
+
+    summary = {}
+    for model_dir in model_dirs:
+        name = str(model_dir.relative_to(models_root)).replace("\\", "/")
+
+        if args.verify:
+            problems = verify_model(model_dir)
+            print(f"[Pack] {name}: {'OK' if not problems else '; '.join(problems)}", flush=True)
+            continue
+
+        manifest = read_manifest(model_dir)
+        if (
+            not args.force
+            and manifest is not None
+            and manifest.get("dtype") == args.dtype
+            and packed_path(model_dir) is not None
+        ):
+            print(f"[Pack] {name}: up to date ({args.dtype})", flush=True)
+            summary[name] = manifest
+            continue
+
+        print(f"[Pack] {name}: packing as {args.dtype}...", flush=True)
+        manifest = pack_model(model_dir, args.dtype, benchmark=not args.no_benchmark)
+        summary[name] = manifest
+
+        size = sum(f["bytes"] for f in manifest["files"].values()) / 2 ** 20
+        timing = ""
+        if "load_seconds" in manifest:
+            t = manifest["load_seconds"]
+            timing = f", load {t['original']:.1f}s -> {t['packed']:.1f}s"
+        print(f"[Pack] {name}: {size:.0f} MiB{timing}", flush=True)
+
+    if summary:
+        summary_path = models_root / "packed_models.json"
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"[Pack] Wrote manifest summary to '{summary_path}'", flush=True)
+
+
+if __name__ == "__main__":
+    main()
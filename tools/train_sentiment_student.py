@@ -0,0 +1,120 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from models.sentiment.student_head import HEAD_PATH, agreement_report, predict_head, save_head, train_head
+from models.sentiment.vote_policies import SENTIMENT_LABELS, load_probabilities
+from pipelines.checkpoint import table_record_keys
+from pipelines.table_io import find_table, read_table
+
+STUDENT_DIR = HEAD_PATH.parent
+
+
+def load_training_data(output_dir: Path, soft_weight: float):
+    """
+    Joins sentiment_posts (CSV or Parquet) with the probability sidecar by record key.
+    Targets mix the one-hot ensemble majority with the mean probability of
+    the ensemble models that ran: (1 - soft_weight) * hard + soft_weight * soft.
+    """
+    posts_path = find_table(output_dir / "preprocessed", "sentiment_posts")
+    probs_path = output_dir / "preprocessed" / "sentiment_probs.npz"
+    if posts_path is None:
+        raise FileNotFoundError(f"No sentiment_posts table in {output_dir / 'preprocessed'}. "
+                                "Run analyze_sentiment.py in ensemble mode first.")
+    if not probs_path.exists():
+        raise FileNotFoundError(f"Missing file: {probs_path}. Run analyze_sentiment.py in ensemble mode first.")
+
+    df = read_table(posts_path, columns=["type", "id", "sentiment_majority", "translated_text"])
+    df = df[df["sentiment_majority"].isin(SENTIMENT_LABELS)]
+
+    ids, model_names, probs, _ = load_probabilities(probs_path)
+    ensemble_rows = [m for m, name in enumerate(model_names) if name != "student"]
+    row_by_key = {key: i for i, key in enumerate(ids)}
+
+    keys = table_record_keys(df)
+    known = keys.isin(row_by_key)
+    df, keys = df[known], keys[known]
+    rows = [row_by_key[key] for key in keys]
+
+    hard = np.zeros((len(df), len(SENTIMENT_LABELS)), dtype=np.float32)
+    hard[np.arange(len(df)), [SENTIMENT_LABELS.index(label) for label in df["sentiment_majority"]]] = 1.0
+
+    model_probs = probs[ensemble_rows][:, rows]
+    soft = np.nanmean(model_probs, axis=0) if len(rows) else hard
+    soft = np.where(np.isnan(soft), hard, soft)
+
+    targets = (1.0 - soft_weight) * hard + soft_weight * soft
+    texts = df["translated_text"].fillna("").astype(str).tolist()
+    return texts, df["sentiment_majority"].tolist(), targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distil the sentiment ensemble into a single student model.")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--soft-weight", type=float, default=0.5,
+                        help="Share of the averaged model probabilities in the training targets (0 = majority labels only)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of posts held out for the agreement report")
+    parser.add_argument("--epochs", type=int, default=500)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=1e-4)
+    parser.add_argument("--batch-size", type=int, default=64, help="Texts per embedding batch")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not 0.0 <= args.soft_weight <= 1.0:
+        parser.error("--soft-weight must be between 0 and 1")
+    if not 0.0 <= args.holdout < 1.0:
+        parser.error("--holdout must be in [0, 1)")
+
+    output_dir = Path(args.output_dir).resolve()
+    texts, majority, targets = load_training_data(output_dir, args.soft_weight)
+    if not texts:
+        print("[Student] No labeled posts to train on.", flush=True)
+        return
+
+    from models.embedding import sentence_encoder
+
+    print(f"[Student] Encoding {len(texts)} posts with {sentence_encoder.MODEL_ID}...", flush=True)
+    started = time.perf_counter()
+    embeddings = sentence_encoder.encode(texts, batch_size=args.batch_size)
+    print(f"[Student] Encoded in {time.perf_counter() - started:.1f}s", flush=True)
+
+    order = np.random.default_rng(args.seed).permutation(len(texts))
+    n_holdout = int(round(len(texts) * args.holdout))
+    holdout, train = order[:n_holdout], order[n_holdout:]
+
+    weights, bias = train_head(
+        embeddings[train],
+        targets[train],
+        epochs=args.epochs,
+        learning_rate=args.learning_rate,
+        l2=args.l2,
+    )
+
+    eval_rows = holdout if n_holdout else train
+    predicted = predict_head(weights, bias, embeddings[eval_rows]).argmax(axis=1)
+    report = agreement_report([SENTIMENT_LABELS[i] for i in predicted], [majority[i] for i in eval_rows])
+    report["split"] = "holdout" if n_holdout else "train"
+    report["train_size"] = int(len(train))
+
+    save_head(HEAD_PATH, weights, bias, encoder_id=sentence_encoder.MODEL_ID)
+    with open(STUDENT_DIR / "agreement_report.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"[Student] Agreement with the ensemble on {report['n']} {report['split']} posts: "
+          f"{report['agreement']:.1%}", flush=True)
+    for label, row in report["per_label"].items():
+        print(f"  {label:8s} support {row['support']:6d}  agreement {row['agreement']:.1%}", flush=True)
+    print(f"[Student] Saved student head to '{HEAD_PATH}'", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from models.qa import topic_classifier
+from pipelines.jsonl_io import find_records, read_records
+
+DEFAULT_THRESHOLDS = [0.0, 0.02, 0.05, 0.1, 0.15, 0.2, 0.3]
+
+
+def load_texts(output_dir: Path, sample_size: int):
+    processed_path = find_records(output_dir / "preprocessed", "processed_posts")
+    if processed_path is None:
+        return None
+
+    texts = (
+        str(p.get("translated_text", "")).strip()
+        for p in read_records(processed_path)
+        if p.get("type") == "post"
+    )
+    return list(islice((t for t in texts if t), sample_size))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input-dir", required=True)
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--sample-size", type=int, default=300)
+    parser.add_argument("--thresholds", type=float, nargs="*", default=DEFAULT_THRESHOLDS)
+    args = parser.parse_args()
+
+    input_dir = Path(args.input_dir).resolve()
+    output_dir = Path(args.output_dir).resolve()
+
+    texts = load_texts(output_dir, args.sample_size)
+    if not texts:
+        print(f"[Cascade] No processed posts found in {output_dir / 'preprocessed'}", flush=True)
+        print("[Cascade] Run process_reddit_posts.py first.", flush=True)
+        return
+
+    topic_classifier.load_topic_classifier_config(input_dir)
+
+    label_sets = {
+        "topic": topic_classifier.get_topic_labels(),
+        "degree": topic_classifier.get_degree_labels(),
+        "aspect": topic_classifier.get_aspect_labels(),
+    }
+
+    for name, labels in label_sets.items():
+        started = time.perf_counter()
+        topic_classifier.embedding_scores(texts, labels)
+        embed_per_text = (time.perf_counter() - started) / len(texts)
+
+        started = time.perf_counter()
+        topic_classifier.classify_many(texts, labels)
+        nli_per_text = (time.perf_counter() - started) / len(texts)
+
+        report = topic_classifier.cascade_report(texts, labels, args.thresholds)
+
+        print(f"[Cascade] {name} labels ({len(texts)} texts, "
+              f"embedding {embed_per_text * 1000:.1f} ms/text, NLI {nli_per_text * 1000:.1f} ms/text)", flush=True)
+        print("  margin  escalated  agreement  accepted-agreement  est. texts/sec", flush=True)
+        for row in report:
+            cost = embed_per_text + row["escalation_rate"] * nli_per_text
+            print(
+                f"  {row['margin_threshold']:6.3f}  {row['escalation_rate']:9.1%}  {row['agreement']:9.1%}"
+                f"  {row['agreement_on_accepted']:18.1%}  {1.0 / cost if cost else 0.0:14.1f}",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()